@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -9,6 +9,27 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     FRONTEND_URL: str = "http://localhost:5173"
 
+    # Judging queue — in-process workers per API process (0 = enqueue only)
+    JUDGE_WORKERS: int = 2
+    JUDGE_POLL_INTERVAL_SECONDS: float = 1.0
+    # A running job whose worker has not heartbeaten for this long is requeued
+    JUDGE_JOB_LEASE_SECONDS: int = 60
+    JUDGE_HEARTBEAT_SECONDS: float = 10.0
+    JUDGE_MAX_ATTEMPTS: int = 3
+    # Comma-separated languages this process judges ("" = every installed toolchain)
+    JUDGE_LANGUAGES: str = ""
+
+    # "local" runs /run and /run-samples in this process; "remote" queues them
+    # for judge workers, so the API needs no execution capacity of its own
+    EXECUTION_MODE: Literal["local", "remote"] = "local"
+    REMOTE_RUN_TIMEOUT_SECONDS: float = 60.0
+    REMOTE_RUN_POLL_SECONDS: float = 0.1
+
+    # Bulk rejudges — submissions per batch, and the pause between batches so a
+    # rejudge during a live contest leaves room for candidates' runs
+    REJUDGE_BATCH_SIZE: int = 20
+    REJUDGE_BATCH_PAUSE_SECONDS: float = 1.0
+
     @property
     def CORS_ORIGINS(self) -> List[str]:
         if self.ENVIRONMENT == "production":
@@ -0,0 +1,413 @@
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.File;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.io.PrintWriter;
+import java.io.StringWriter;
+import java.lang.management.ManagementFactory;
+import java.lang.management.ThreadMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.security.Permission;
+import java.util.Arrays;
+import java.util.PropertyPermission;
+import java.util.Set;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+/**
+ * Persistent JVM worker driven by jvm_pool.py, one job at a time, as
+ * `java CodeshieldJavaWorker <request_fd> <reply_fd>`.
+ *
+ * The protocol runs over those two inherited pipes, never fds 0-2: the JVM's
+ * own stdin/stdout/stderr are /dev/null, so a submission writing to
+ * FileDescriptor.out cannot corrupt it. (jvm_pool.py sends submissions that
+ * use raw descriptors to a cold JVM, where they work as usual.)
+ *
+ * Requests are a header line, optionally followed by a payload:
+ *
+ *   COMPILE <dir>                       compile dir/Solution.java into dir
+ *   -> <ok|error> <ms> <len>\n <len bytes of diagnostics>
+ *
+ *   RUN <class_dir> <time_ms> <memory_bytes> <stdout_limit> <stderr_limit> <input_len>\n <input>
+ *   -> <ok|error|timeout|memory|output_limit> <exit_code> <cpu_ms> <wall_ms> <memory_kb>
+ *      <stdout_len> <stderr_len> <recycle>\n <stdout bytes> <stderr bytes>
+ *
+ * Each run loads Solution in a fresh class loader whose parent is the platform
+ * loader, so static state never leaks between submissions and the worker's own
+ * classes are not visible to it. Threads other than the worker's main thread
+ * are held to the default policy's permissions (see ExitTrap): no files,
+ * class loaders, reflection into JDK internals or security manager changes;
+ * jvm_pool.py runs code that needs those cold.
+ * That is all the isolation this JVM adds — submissions share its process, and
+ * the launcher's process sandbox is what confines them.
+ *
+ * A run that times out, exhausts memory, floods output or leaves any new
+ * thread alive ends this JVM after the reply (recycle = 1) — the pool starts a
+ * clean one.
+ *
+ * Run with --warmup once under -XX:ArchiveClassesAtExit to build the CDS archive.
+ */
+public class CodeshieldJavaWorker {
+    static final JavaCompiler COMPILER = ToolProvider.getSystemJavaCompiler();
+    static final ThreadMXBean THREADS = ManagementFactory.getThreadMXBean();
+    static final Runtime RUNTIME = Runtime.getRuntime();
+    // Watchdog poll interval while a submission runs
+    static final long POLL_MS = 5;
+
+    static InputStream requests;
+    static OutputStream replies;
+    // Runs the protocol and the watchdog; every other thread may be running submitted code
+    static Thread workerThread;
+    static volatile boolean jobRunning = false;
+    // Forced collections during the current run, not charged to its time limit
+    static long gcPauseNanos = 0;
+
+    /** Thrown instead of exiting the JVM when a submission calls System.exit(). */
+    static final class ExitTrapped extends SecurityException {
+        final int status;
+
+        ExitTrapped(int status) {
+            super("System.exit(" + status + ")");
+            this.status = status;
+        }
+    }
+
+    /**
+     * Traps System.exit() during a run, and holds every thread but the worker's
+     * to the usual access-controller check — submitted classes get the default
+     * policy's handful of permissions, JDK code keeps its own.
+     */
+    static final class ExitTrap extends SecurityManager {
+        // Reading system properties stays open — judges' templates test ONLINE_JUDGE
+        static boolean allowed(Permission perm) {
+            return Thread.currentThread() == workerThread
+                || (perm instanceof PropertyPermission && perm.getActions().equals("read"));
+        }
+
+        @Override
+        public void checkPermission(Permission perm) {
+            if (!allowed(perm)) {
+                super.checkPermission(perm);
+            }
+        }
+
+        @Override
+        public void checkPermission(Permission perm, Object context) {
+            if (!allowed(perm)) {
+                super.checkPermission(perm, context);
+            }
+        }
+
+        @Override
+        public void checkExit(int status) {
+            if (jobRunning) {
+                throw new ExitTrapped(status);
+            }
+        }
+    }
+
+    /** Capped capture buffer: stdout flags overflow, stderr just keeps its head. */
+    static final class BoundedOutput extends OutputStream {
+        final ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        final int limit;
+        final boolean truncate;
+        volatile boolean exceeded = false;
+
+        BoundedOutput(int limit, boolean truncate) {
+            this.limit = limit;
+            this.truncate = truncate;
+        }
+
+        @Override
+        public synchronized void write(int b) throws IOException {
+            write(new byte[] {(byte) b}, 0, 1);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) throws IOException {
+            int room = limit - buffer.size();
+            if (len > room) {
+                if (!truncate) {
+                    exceeded = true;
+                    throw new IOException("Output limit exceeded");
+                }
+                len = Math.max(room, 0);
+            }
+            buffer.write(b, off, len);
+        }
+    }
+
+    static final class Job implements Runnable {
+        final Method entry;
+        Throwable failure = null;
+        int exitCode = 0;
+        long cpuNanos = 0;
+
+        Job(Method entry) {
+            this.entry = entry;
+        }
+
+        @Override
+        public void run() {
+            try {
+                entry.invoke(null, (Object) new String[0]);
+            } catch (InvocationTargetException e) {
+                Throwable cause = e.getCause();
+                if (cause instanceof ExitTrapped) {
+                    exitCode = ((ExitTrapped) cause).status;
+                } else {
+                    failure = cause;
+                    exitCode = 1;
+                }
+            } catch (Throwable e) {
+                failure = e;
+                exitCode = 1;
+            }
+            cpuNanos = THREADS.getCurrentThreadCpuTime();
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        if (args.length > 0 && args[0].equals("--warmup")) {
+            warmup();
+            return;
+        }
+
+        requests = new BufferedInputStream(new FileInputStream("/dev/fd/" + Integer.parseInt(args[0])));
+        replies = new BufferedOutputStream(new FileOutputStream("/dev/fd/" + Integer.parseInt(args[1])));
+        workerThread = Thread.currentThread();
+        try {
+            System.setSecurityManager(new ExitTrap());
+        } catch (UnsupportedOperationException e) {
+            // JDKs without a security manager: System.exit() ends the worker, and
+            // the pool re-runs that submission cold. Submitted code then runs
+            // unrestricted, confined only by the process sandbox
+        }
+
+        String line;
+        while ((line = readLine(requests)) != null) {
+            String[] parts = line.split(" ");
+            if (parts[0].equals("COMPILE")) {
+                compile(parts[1]);
+            } else if (parts[0].equals("RUN")) {
+                byte[] input = requests.readNBytes(Integer.parseInt(parts[6]));
+                run(
+                    parts[1],
+                    Long.parseLong(parts[2]),
+                    Long.parseLong(parts[3]),
+                    Integer.parseInt(parts[4]),
+                    Integer.parseInt(parts[5]),
+                    input
+                );
+            } else {
+                throw new IllegalArgumentException("Unknown request: " + parts[0]);
+            }
+        }
+    }
+
+    static String readLine(InputStream in) throws IOException {
+        ByteArrayOutputStream line = new ByteArrayOutputStream();
+        int b;
+        while ((b = in.read()) != '\n') {
+            if (b == -1) {
+                return line.size() == 0 ? null : line.toString(StandardCharsets.UTF_8);
+            }
+            line.write(b);
+        }
+        return line.toString(StandardCharsets.UTF_8);
+    }
+
+    static void reply(String header, byte[]... bodies) throws IOException {
+        replies.write((header + "\n").getBytes(StandardCharsets.UTF_8));
+        for (byte[] body : bodies) {
+            replies.write(body);
+        }
+        replies.flush();
+    }
+
+    static void compile(String dir) throws IOException {
+        StringWriter diagnostics = new StringWriter();
+        long start = System.nanoTime();
+        boolean ok;
+        try (StandardJavaFileManager files = COMPILER.getStandardFileManager(null, null, StandardCharsets.UTF_8)) {
+            Iterable<? extends JavaFileObject> units = files.getJavaFileObjects(new File(dir, "Solution.java"));
+            ok = COMPILER.getTask(diagnostics, files, null, Arrays.asList("-d", dir), null, units).call();
+        }
+        long elapsedMs = (System.nanoTime() - start) / 1_000_000;
+
+        // Report paths relative to the source dir, as `javac Solution.java` would
+        byte[] text = diagnostics.toString()
+            .replace(new File(dir).getAbsolutePath() + File.separator, "")
+            .getBytes(StandardCharsets.UTF_8);
+        reply((ok ? "ok" : "error") + " " + elapsedMs + " " + text.length, text);
+    }
+
+    static long heapUsed() {
+        return RUNTIME.totalMemory() - RUNTIME.freeMemory();
+    }
+
+    /**
+     * Heap the submission still holds, after a full collection. A plain
+     * heapUsed() sample includes garbage not yet collected, so it only
+     * suggests a memory limit breach; this confirms one. The pause is
+     * added to the run's wall deadline.
+     */
+    static long liveHeapUsed(long baseline) {
+        long gcStart = System.nanoTime();
+        System.gc();
+        gcPauseNanos += System.nanoTime() - gcStart;
+        return heapUsed() - baseline;
+    }
+
+    static void run(
+        String classDir,
+        long timeLimitMs,
+        long memoryLimitBytes,
+        int stdoutLimit,
+        int stderrLimit,
+        byte[] input
+    ) throws Exception {
+        BoundedOutput stdout = new BoundedOutput(stdoutLimit, false);
+        BoundedOutput stderr = new BoundedOutput(stderrLimit, true);
+        PrintStream jobOut = new PrintStream(stdout, false);
+        PrintStream jobErr = new PrintStream(stderr, true);
+        InputStream originalIn = System.in;
+        PrintStream originalOut = System.out;
+        PrintStream originalErr = System.err;
+
+        URLClassLoader loader = new URLClassLoader(
+            new URL[] {new File(classDir).toURI().toURL()},
+            ClassLoader.getPlatformClassLoader()
+        );
+        Method entry = loader.loadClass("Solution").getMethod("main", String[].class);
+        Job job = new Job(entry);
+        ThreadGroup group = new ThreadGroup("submission");
+        Thread main = new Thread(group, job, "main", 256L << 20);
+        // Otherwise it inherits the worker's application class loader
+        main.setContextClassLoader(loader);
+        // Submissions can start threads in any group, or through executors
+        Set<Thread> threadsBefore = Thread.getAllStackTraces().keySet();
+
+        // Only the submission's own allocations count against its limit
+        System.gc();
+        long baseline = heapUsed();
+        long peak = 0;
+        gcPauseNanos = 0;
+        String status = null;
+
+        System.setIn(new ByteArrayInputStream(input));
+        System.setOut(jobOut);
+        System.setErr(jobErr);
+        jobRunning = true;
+        long start = System.nanoTime();
+        long deadline = start + timeLimitMs * 1_000_000;
+        main.start();
+
+        while (main.isAlive()) {
+            main.join(POLL_MS);
+            long used = heapUsed() - baseline;
+            if (used > memoryLimitBytes) {
+                used = liveHeapUsed(baseline);
+                if (used > memoryLimitBytes) {
+                    peak = used;
+                    status = "memory";
+                    break;
+                }
+            }
+            peak = Math.max(peak, used);
+            if (stdout.exceeded) {
+                status = "output_limit";
+                break;
+            }
+            if (System.nanoTime() > deadline + gcPauseNanos) {
+                status = "timeout";
+                break;
+            }
+        }
+        long wallMs = (System.nanoTime() - start) / 1_000_000;
+        long cpuNanos = main.isAlive() ? THREADS.getThreadCpuTime(main.getId()) : job.cpuNanos;
+        jobRunning = false;
+
+        jobOut.flush();
+        System.setIn(originalIn);
+        System.setOut(originalOut);
+        System.setErr(originalErr);
+
+        if (status == null) {
+            if (job.failure instanceof OutOfMemoryError) {
+                status = "memory";
+            } else if (stdout.exceeded) {
+                status = "output_limit";
+            } else {
+                status = job.exitCode == 0 ? "ok" : "error";
+            }
+        }
+        if (job.failure != null) {
+            StringWriter trace = new StringWriter();
+            trace.write("Exception in thread \"main\" ");
+            job.failure.printStackTrace(new PrintWriter(trace));
+            jobErr.write(trace.toString().getBytes(StandardCharsets.UTF_8));
+        }
+
+        // Threads the submission left running cannot be stopped safely
+        boolean finished = status.equals("ok") || status.equals("error");
+        boolean recycle = !finished || leftThreads(threadsBefore);
+        byte[] out = finished ? stdout.buffer.toByteArray() : new byte[0];
+        byte[] err = stderr.buffer.toByteArray();
+        reply(
+            status + " " + job.exitCode + " " + (cpuNanos / 1_000_000) + " " + wallMs + " "
+                + (Math.max(peak, 0) / 1024) + " " + out.length + " " + err.length + " " + (recycle ? 1 : 0),
+            out,
+            err
+        );
+        loader.close();
+
+        if (recycle) {
+            RUNTIME.halt(0);
+        }
+    }
+
+    /** Whether any thread not in before is still alive. */
+    static boolean leftThreads(Set<Thread> before) {
+        for (Thread thread : Thread.getAllStackTraces().keySet()) {
+            if (thread.isAlive() && !before.contains(thread)) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    /** Exercise the compiler and a run so their classes land in the CDS archive. */
+    static void warmup() throws Exception {
+        Path dir = Files.createTempDirectory("codeshield-jvm-warmup");
+        Files.writeString(
+            dir.resolve("Solution.java"),
+            "import java.util.*;\n"
+                + "public class Solution {\n"
+                + "    public static void main(String[] args) {\n"
+                + "        Scanner sc = new Scanner(System.in);\n"
+                + "        System.out.println(sc.nextInt() * 2);\n"
+                + "    }\n"
+                + "}\n"
+        );
+        requests = InputStream.nullInputStream();
+        replies = OutputStream.nullOutputStream();
+        compile(dir.toString());
+        run(dir.toString(), 5000, 64L << 20, 1 << 20, 1 << 16, "21\n".getBytes(StandardCharsets.UTF_8));
+    }
+}
@@ -0,0 +1,91 @@
+
+// Batch harness — appended to Solution.java by the engine and run as
+// `java CodeshieldBatch <count> <time_limit> <input_fd> <status_fd>`; same
+// protocol as batch_python.py: each input arrives only after the previous
+// case's status line has been sent.
+// Fully qualified names only: imports cannot follow the submission's classes.
+class CodeshieldBatch {
+    // Next "<size>\n<bytes>" frame from the server, in a file deleted as soon as it is open
+    static java.io.InputStream receiveInput(java.io.DataInputStream inputs, int index) throws Exception {
+        StringBuilder header = new StringBuilder();
+        for (int c = inputs.read(); c != '\n'; c = inputs.read()) {
+            if (c < 0) throw new java.io.EOFException("no input for case " + index);
+            header.append((char) c);
+        }
+        long size = Long.parseLong(header.toString());
+        java.io.File file = new java.io.File("batch/" + index + ".in");
+        byte[] chunk = new byte[1 << 20];
+        try (java.io.FileOutputStream out = new java.io.FileOutputStream(file)) {
+            while (size > 0) {
+                int n = inputs.read(chunk, 0, (int) Math.min(chunk.length, size));
+                if (n < 0) throw new java.io.EOFException("input frame cut short");
+                out.write(chunk, 0, n);
+                size -= n;
+            }
+        }
+        java.io.InputStream in = new java.io.BufferedInputStream(new java.io.FileInputStream(file));
+        file.delete();
+        return in;
+    }
+
+    public static void main(String[] args) throws Exception {
+        int count = Integer.parseInt(args[0]);
+        long timeLimitMs = (long) (Double.parseDouble(args[1]) * 1000);
+        java.io.DataInputStream inputs = new java.io.DataInputStream(
+            new java.io.BufferedInputStream(new java.io.FileInputStream("/dev/fd/" + args[2])));
+        java.io.PrintStream statusOut = new java.io.PrintStream(new java.io.FileOutputStream("/dev/fd/" + args[3]), true);
+        new java.io.File("batch").mkdirs();
+        java.net.URL[] classPath = { new java.io.File(".").toURI().toURL() };
+        java.lang.management.ThreadMXBean threads = java.lang.management.ManagementFactory.getThreadMXBean();
+
+        for (int i = 0; i < count; i++) {
+            java.io.PrintStream caseOut = new java.io.PrintStream(
+                new java.io.BufferedOutputStream(new java.io.FileOutputStream("batch/" + i + ".out")), false);
+            System.setIn(receiveInput(inputs, i));
+            System.setOut(caseOut);
+
+            // A fresh class loader per case re-runs static initialisers, as a new JVM would
+            ClassLoader loader = new java.net.URLClassLoader(classPath, ClassLoader.getPlatformClassLoader());
+            java.lang.reflect.Method entry = loader.loadClass("Solution").getMethod("main", String[].class);
+            Throwable[] failure = new Throwable[1];
+            long[] cpuNanos = new long[1];
+
+            Thread runner = new Thread(null, () -> {
+                try {
+                    entry.invoke(null, (Object) new String[0]);
+                } catch (java.lang.reflect.InvocationTargetException e) {
+                    failure[0] = e.getCause();
+                } catch (Throwable e) {
+                    failure[0] = e;
+                }
+                cpuNanos[0] = threads.getCurrentThreadCpuTime();
+            }, "main", 256L << 20);
+
+            long start = System.nanoTime();
+            runner.start();
+            runner.join(timeLimitMs);
+            long wallMs = (System.nanoTime() - start) / 1_000_000;
+
+            if (runner.isAlive()) {
+                statusOut.println(i + " timeout " + wallMs + " " + wallMs);
+                statusOut.flush();
+                Runtime.getRuntime().halt(0);
+            }
+
+            caseOut.flush();
+            caseOut.close();
+            String status = "ok";
+            if (failure[0] != null) {
+                status = "error";
+                java.io.StringWriter trace = new java.io.StringWriter();
+                trace.write("Exception in thread \"main\" ");
+                failure[0].printStackTrace(new java.io.PrintWriter(trace));
+                try (java.io.FileWriter err = new java.io.FileWriter("batch/" + i + ".err")) {
+                    err.write(trace.toString());
+                }
+            }
+            statusOut.println(i + " " + status + " " + (cpuNanos[0] / 1_000_000) + " " + wallMs);
+            statusOut.flush();
+        }
+    }
+}
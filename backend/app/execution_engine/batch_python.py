@@ -0,0 +1,120 @@
+"""
+Batch harness for Python — runs every test case of a submission in one
+interpreter, as `python3 batch_python.py <count> <time_limit> <input_fd> <status_fd>`
+in a workdir holding solution.py.
+
+Inputs arrive one at a time on input_fd, each framed as "<size>\n<bytes>";
+the server sends case i only after reading case i-1's status line, so no
+later case's input exists anywhere the submission could read it early.
+Each case gets a fresh namespace with fd 0 on an unlinked file holding its
+input and fd 1 on batch/<i>.out, so input(), sys.stdin, open(0) and
+os.write(1, ...) all behave as in a cold run. After each case one status
+line goes to status_fd:
+
+    <i> <ok|error|timeout> <cpu_ms> <wall_ms>
+
+with the error text, if any, in batch/<i>.err. A case that runs past the time
+limit ends the whole batch — the server runs the remaining cases alone.
+"""
+import io
+import os
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+def move_fd(fd: int, target_fd: int):
+    # The previous case may have closed target_fd (open(0) does on cleanup),
+    # in which case the new fd is that very number already
+    if fd != target_fd:
+        os.dup2(fd, target_fd)
+        os.close(fd)
+
+
+def receive_input(source) -> int:
+    """Read the next framed input into an unlinked file. Returns its fd, at offset 0."""
+    size = int(source.readline())
+    fd, path = tempfile.mkstemp(dir="batch")
+    os.unlink(path)
+    with open(fd, "wb", closefd=False) as f:
+        while size:
+            chunk = source.read(min(size, 1024 * 1024))
+            if not chunk:
+                raise EOFError("input frame cut short")
+            f.write(chunk)
+            size -= len(chunk)
+    os.lseek(fd, 0, os.SEEK_SET)
+    return fd
+
+
+def main():
+    count, time_limit = int(sys.argv[1]), float(sys.argv[2])
+    inputs = os.fdopen(int(sys.argv[3]), "rb")
+    status_out = os.fdopen(int(sys.argv[4]), "w")
+    os.makedirs("batch", exist_ok=True)
+
+    with open("solution.py") as f:
+        source = f.read()
+    sys.argv = ["solution.py"]
+    sys.path[0] = os.getcwd()
+
+    try:
+        code = compile(source, "solution.py", "exec")
+        compile_error = None
+    except SyntaxError as e:
+        code = None
+        compile_error = "".join(traceback.format_exception(type(e), e, None))
+
+    current = {}
+
+    def report(index, status, error=""):
+        cpu_ms = int((time.process_time() - current["cpu"]) * 1000)
+        wall_ms = int((time.monotonic() - current["wall"]) * 1000)
+        if error:
+            with open(f"batch/{index}.err", "w") as f:
+                f.write(error)
+        status_out.write(f"{index} {status} {cpu_ms} {wall_ms}\n")
+        status_out.flush()
+
+    def on_timeout(signum, frame):
+        # Cannot be caught by the solution — the batch simply stops here
+        report(current["index"], "timeout")
+        os._exit(0)
+
+    signal.signal(signal.SIGALRM, on_timeout)
+
+    for index in range(count):
+        move_fd(receive_input(inputs), 0)
+        move_fd(os.open(f"batch/{index}.out", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644), 1)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", closefd=False)
+
+        current.update(index=index, cpu=time.process_time(), wall=time.monotonic())
+        status, error = "ok", ""
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+        try:
+            if code is None:
+                status, error = "error", compile_error
+            else:
+                exec(code, {"__name__": "__main__", "__file__": "solution.py", "__builtins__": __builtins__})
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                status = "error"
+                error = "" if isinstance(e.code, int) else f"{e.code}\n"
+        except BaseException as e:
+            status = "error"
+            error = "".join(traceback.format_exception(type(e), e, e.__traceback__.tb_next))
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+        try:
+            sys.stdout.flush()
+        except (OSError, ValueError):
+            pass
+        report(index, status, error)
+
+
+if __name__ == "__main__":
+    main()
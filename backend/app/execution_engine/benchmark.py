@@ -0,0 +1,415 @@
+"""
+Execution engine benchmark:
+
+    python -m app.execution_engine.benchmark [--languages cpp,java] [--scenarios hello,cpu]
+        [--concurrency N] [--iterations N] [--cold] [--output result.json]
+        [--compare baseline.json]
+
+Runs canned programs in every supported language through run_code_in_sandbox
+— the path Run, Submit and rejudges all take — with the same pools and
+limits as a server on this host. Each (language, scenario) cell runs as its
+own phase of --iterations jobs at --concurrency, and reports latency
+percentiles, jobs/sec and CPU utilisation. The JSON result can be passed to
+--compare on a later run to flag regressions.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.execution_engine.languages import (
+    SUPPORTED_LANGUAGES,
+    LANGUAGE_CONFIG,
+    installed_languages,
+    MAX_CONCURRENT_RUNS,
+    WARM_POOL_SIZE,
+    JVM_POOL_SIZE,
+    CONTAINER_POOL_SIZE,
+)
+from app.execution_engine.sandbox import run_code_in_sandbox
+from app.execution_engine.compiler import artifact_cache
+from app.execution_engine.tracing import execution_traces
+
+RESULT_VERSION = 1
+# Latency changes smaller than this are noise, whatever the percentage
+MIN_REGRESSION_MS = 5
+
+IO_NUMBERS = 200_000
+OUTPUT_LINES = 200_000
+# Roughly comparable wall time per language, not identical work
+CPU_ITERATIONS = {
+    "python3": 2_000_000,
+    "javascript": 30_000_000,
+    "java": 50_000_000,
+    "cpp": 50_000_000,
+    "c": 50_000_000,
+}
+
+PROGRAMS = {
+    "python3": {
+        "hello": 'print("Hello, World!")\n',
+        "cpu": "s = 0\nfor i in range({n}):\n    s = (s + i * i) % 1000003\nprint(s)\n",
+        "io": "import sys\nd = sys.stdin.buffer.read().split()\nprint(sum(map(int, d[1:])))\n",
+        "large_output": 'import sys\nsys.stdout.write("\\n".join(map(str, range(1, {n} + 1))) + "\\n")\n',
+        "tle": "while True:\n    pass\n",
+        "compile_error": "def solve(:\n    return\n",
+    },
+    "javascript": {
+        "hello": 'console.log("Hello, World!");\n',
+        "cpu": "let s = 0;\nfor (let i = 0; i < {n}; i++) s = (s + i * i) % 1000003;\nconsole.log(s);\n",
+        "io": 'const d = require("fs").readFileSync(0, "utf8").trim().split(/\\s+/);\n'
+              "let s = 0;\nfor (let i = 1; i < d.length; i++) s += +d[i];\nconsole.log(s);\n",
+        "large_output": "const out = [];\nfor (let i = 1; i <= {n}; i++) out.push(i);\n"
+                        'process.stdout.write(out.join("\\n") + "\\n");\n',
+        "tle": "for (;;) {}\n",
+        "compile_error": "function solve( {\n",
+    },
+    "java": {
+        "hello": "public class Solution {\n    public static void main(String[] args) {\n"
+                 '        System.out.println("Hello, World!");\n    }\n}\n',
+        "cpu": "public class Solution {\n    public static void main(String[] args) {\n"
+               "        long s = 0;\n        for (long i = 0; i < {n}L; i++) s = (s + i * i) % 1000003;\n"
+               "        System.out.println(s);\n    }\n}\n",
+        "io": "import java.io.*;\npublic class Solution {\n"
+              "    public static void main(String[] args) throws IOException {\n"
+              "        StreamTokenizer in = new StreamTokenizer(new BufferedInputStream(System.in));\n"
+              "        in.nextToken();\n        int n = (int) in.nval;\n        long s = 0;\n"
+              "        for (int i = 0; i < n; i++) { in.nextToken(); s += (long) in.nval; }\n"
+              "        System.out.println(s);\n    }\n}\n",
+        "large_output": "import java.io.*;\npublic class Solution {\n"
+                        "    public static void main(String[] args) {\n"
+                        "        PrintWriter out = new PrintWriter(new BufferedOutputStream(System.out));\n"
+                        "        for (int i = 1; i <= {n}; i++) out.println(i);\n        out.flush();\n    }\n}\n",
+        "tle": "public class Solution {\n    public static void main(String[] args) {\n"
+               "        while (true) {}\n    }\n}\n",
+        "compile_error": "public class Solution {\n    public static void main(String[] args) {\n"
+                         "        int x = 1\n    }\n}\n",
+    },
+    "cpp": {
+        "hello": '#include <cstdio>\nint main() { puts("Hello, World!"); }\n',
+        "cpu": "#include <cstdio>\nint main() {\n    long long s = 0;\n"
+               "    for (long long i = 0; i < {n}LL; i++) s = (s + i * i) % 1000003;\n"
+               '    printf("%lld\\n", s);\n}\n',
+        "io": "#include <cstdio>\nint main() {\n    int n; long long s = 0, x;\n"
+              '    if (scanf("%d", &n) != 1) return 0;\n'
+              '    for (int i = 0; i < n; i++) { scanf("%lld", &x); s += x; }\n'
+              '    printf("%lld\\n", s);\n}\n',
+        "large_output": '#include <cstdio>\nint main() { for (int i = 1; i <= {n}; i++) printf("%d\\n", i); }\n',
+        "tle": "int main() { volatile unsigned long x = 0; for (;;) x++; }\n",
+        "compile_error": "int main() { int x = 1 }\n",
+    },
+    "c": {
+        "hello": '#include <stdio.h>\nint main(void) { puts("Hello, World!"); return 0; }\n',
+        "cpu": "#include <stdio.h>\nint main(void) {\n    long long s = 0;\n"
+               "    for (long long i = 0; i < {n}LL; i++) s = (s + i * i) % 1000003;\n"
+               '    printf("%lld\\n", s);\n    return 0;\n}\n',
+        "io": "#include <stdio.h>\nint main(void) {\n    int n; long long s = 0, x;\n"
+              '    if (scanf("%d", &n) != 1) return 0;\n'
+              '    for (int i = 0; i < n; i++) { if (scanf("%lld", &x) != 1) break; s += x; }\n'
+              '    printf("%lld\\n", s);\n    return 0;\n}\n',
+        "large_output": '#include <stdio.h>\nint main(void) { for (int i = 1; i <= {n}; i++) printf("%d\\n", i); return 0; }\n',
+        "tle": "int main(void) { volatile unsigned long x = 0; for (;;) x++; }\n",
+        "compile_error": "int main(void) { int x = 1 }\n",
+    },
+}
+SCENARIOS = ("hello", "cpu", "io", "large_output", "tle", "compile_error")
+
+IO_INPUT = (f"{IO_NUMBERS}\n" + "\n".join(str(i) for i in range(1, IO_NUMBERS + 1)) + "\n").encode()
+
+
+def _program(language: str, scenario: str) -> str:
+    n = CPU_ITERATIONS[language] if scenario == "cpu" else OUTPUT_LINES
+    # Not str.format — the C-family sources are full of braces
+    return PROGRAMS[language][scenario].replace("{n}", str(n))
+
+
+def _input(scenario: str) -> bytes:
+    return IO_INPUT if scenario == "io" else b""
+
+
+def _as_expected(scenario: str, result: dict) -> bool:
+    """Whether a run ended the way the scenario is meant to."""
+    if scenario == "hello":
+        return result["success"] and result["output"] == "Hello, World!"
+    if scenario == "io":
+        return result["success"] and result["output"] == str(IO_NUMBERS * (IO_NUMBERS + 1) // 2)
+    if scenario == "large_output":
+        return result["success"] and result["output"].endswith(str(OUTPUT_LINES))
+    if scenario == "tle":
+        return not result["success"] and "Time Limit" in result["error"]
+    if scenario == "compile_error":
+        return not result["success"]
+    return result["success"]
+
+
+def _uncached(language: str, code: str, nonce: str) -> str:
+    """A distinct artifact-cache key for the same program."""
+    comment = "#" if language == "python3" else "//"
+    return f"{code}\n{comment} benchmark {nonce}\n"
+
+
+def percentile(sorted_ms: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_ms:
+        return 0
+    rank = max(1, math.ceil(q * len(sorted_ms)))
+    return round(sorted_ms[rank - 1], 1)
+
+
+def _cpu_snapshot() -> dict:
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    snapshot = {
+        "process_s": self_usage.ru_utime + self_usage.ru_stime + children.ru_utime + children.ru_stime,
+        "host_busy": None,
+        "host_total": None,
+    }
+    try:
+        with open("/proc/stat") as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        snapshot["host_total"] = sum(fields)
+        snapshot["host_busy"] = snapshot["host_total"] - idle
+    except (OSError, ValueError, IndexError):
+        pass
+    return snapshot
+
+
+def _cpu_utilization(before: dict, after: dict, wall_s: float) -> dict:
+    """Share of this host's cores used — by this process and the runs it reaped, and overall."""
+    cores = os.cpu_count() or 1
+    host = None
+    if before["host_total"] is not None and after["host_total"] is not None:
+        total = after["host_total"] - before["host_total"]
+        if total > 0:
+            host = round((after["host_busy"] - before["host_busy"]) / total, 3)
+    return {
+        "process": round((after["process_s"] - before["process_s"]) / (wall_s * cores), 3) if wall_s else 0,
+        "host": host,
+    }
+
+
+async def run_cell(
+    language: str,
+    scenario: str,
+    iterations: int,
+    concurrency: int,
+    tle_seconds: int,
+    cold: bool
+) -> dict:
+    """Run one (language, scenario) phase and summarise it."""
+    code = _program(language, scenario)
+    input_data = _input(scenario)
+    time_limit = tle_seconds if scenario == "tle" else None
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    unexpected = []
+
+    async def one(i: int):
+        program = _uncached(language, code, f"{time.time_ns()}-{i}") if cold else code
+        async with gate:
+            start = time.perf_counter()
+            with execution_traces.job(f"benchmark:{scenario}", language) as trace:
+                kwargs = {"time_limit": time_limit} if time_limit else {}
+                result = await run_code_in_sandbox(program, language, input_data, **kwargs)
+                trace.outcome = "ok" if result["success"] else result["error"][:80]
+            latencies.append((time.perf_counter() - start) * 1000)
+        if not _as_expected(scenario, result):
+            unexpected.append(result.get("error") or result.get("output", "")[:200])
+
+    cpu_before = _cpu_snapshot()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    wall_s = time.perf_counter() - start
+    cpu_after = _cpu_snapshot()
+
+    latencies.sort()
+    return {
+        "jobs": iterations,
+        "unexpected": len(unexpected),
+        "unexpected_sample": unexpected[:3],
+        "wall_s": round(wall_s, 3),
+        "jobs_per_sec": round(iterations / wall_s, 2) if wall_s else 0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": round(latencies[-1], 1) if latencies else 0,
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0,
+        },
+        "cpu_utilization": _cpu_utilization(cpu_before, cpu_after, wall_s),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def run_benchmark(
+    languages: List[str],
+    scenarios: List[str],
+    iterations: int,
+    concurrency: int,
+    warmup: int,
+    tle_seconds: int,
+    cold: bool,
+    seed: int
+) -> dict:
+    from app.execution_engine.worker import start_execution_engine, stop_execution_engine
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    start_execution_engine()
+    try:
+        cells = [(language, scenario) for language in languages for scenario in scenarios]
+        # Shuffled so a slow-to-warm language does not always go first
+        random.Random(seed).shuffle(cells)
+
+        results: Dict[str, Dict[str, dict]] = {language: {} for language in languages}
+        cpu_before = _cpu_snapshot()
+        start = time.perf_counter()
+        for language, scenario in cells:
+            if warmup:
+                await run_cell(language, scenario, warmup, concurrency, tle_seconds, cold)
+            cell = await run_cell(language, scenario, iterations, concurrency, tle_seconds, cold)
+            results[language][scenario] = cell
+            print(
+                f"[Benchmark] {language:<10} {scenario:<13} "
+                f"p50 {cell['latency_ms']['p50']:>8}ms  p95 {cell['latency_ms']['p95']:>8}ms  "
+                f"p99 {cell['latency_ms']['p99']:>8}ms  {cell['jobs_per_sec']:>7} jobs/s"
+                + (f"  {cell['unexpected']} unexpected" if cell["unexpected"] else "")
+            )
+        wall_s = time.perf_counter() - start
+        cpu_after = _cpu_snapshot()
+    finally:
+        await stop_execution_engine()
+
+    jobs = iterations * len(cells)
+    return {
+        "version": RESULT_VERSION,
+        "started_at": started_at,
+        "git_commit": _git_commit(),
+        "host": {
+            "hostname": socket.gethostname(),
+            "platform": platform.platform(),
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "languages": languages,
+            "scenarios": scenarios,
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "tle_seconds": tle_seconds,
+            "cold": cold,
+            "seed": seed,
+            "max_concurrent_runs": MAX_CONCURRENT_RUNS,
+            "warm_pool_size": WARM_POOL_SIZE,
+            "jvm_pool_size": JVM_POOL_SIZE,
+            "container_pool_size": CONTAINER_POOL_SIZE,
+        },
+        "summary": {
+            "jobs": jobs,
+            "unexpected": sum(c["unexpected"] for r in results.values() for c in r.values()),
+            # Measured phases only — warmup runs happen in between
+            "jobs_per_sec": round(
+                jobs / sum(c["wall_s"] for r in results.values() for c in r.values()), 2
+            ) if jobs else 0,
+            "wall_s": round(wall_s, 3),
+            "cpu_utilization": _cpu_utilization(cpu_before, cpu_after, wall_s),
+        },
+        "results": results,
+        "compile": artifact_cache.stats(),
+        "stages": execution_traces.stats()["histograms"],
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Cells whose p50/p95 latency rose, or jobs/sec fell, by more than threshold."""
+    regressions = []
+    for language, scenarios in current["results"].items():
+        for scenario, cell in scenarios.items():
+            old = baseline.get("results", {}).get(language, {}).get(scenario)
+            if not old:
+                continue
+            checks = [
+                (f"p{q}", old["latency_ms"][f"p{q}"], cell["latency_ms"][f"p{q}"], True)
+                for q in (50, 95)
+            ] + [("jobs/s", old["jobs_per_sec"], cell["jobs_per_sec"], False)]
+            for name, before, after, higher_is_worse in checks:
+                if not before:
+                    continue
+                change = (after - before) / before
+                if higher_is_worse:
+                    worse = change > threshold and after - before >= MIN_REGRESSION_MS
+                else:
+                    worse = -change > threshold
+                line = f"{language:<10} {scenario:<13} {name:<6} {before:>9} -> {after:<9} ({change:+.1%})"
+                print(("REGRESSION " if worse else "           ") + line)
+                if worse:
+                    regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CodeShield execution engine benchmark")
+    parser.add_argument(
+        "--languages", default=",".join(installed_languages()),
+        help=f"comma-separated subset of {','.join(SUPPORTED_LANGUAGES)} (default: installed toolchains)"
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=20, help="measured jobs per language and scenario")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_RUNS)
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured jobs before each phase")
+    parser.add_argument("--tle-seconds", type=int, default=1, help="time limit for the tle scenario")
+    parser.add_argument("--cold", action="store_true", help="defeat the artifact cache so every job compiles")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result file (default: benchmark-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold for --compare")
+    args = parser.parse_args()
+
+    languages = [lang for lang in args.languages.split(",") if lang in LANGUAGE_CONFIG]
+    scenarios = [s for s in args.scenarios.split(",") if s in SCENARIOS]
+    if not languages or not scenarios:
+        parser.error(f"choose from languages {SUPPORTED_LANGUAGES} and scenarios {list(SCENARIOS)}")
+
+    result = asyncio.run(run_benchmark(
+        languages, scenarios, args.iterations, max(1, args.concurrency),
+        args.warmup, args.tle_seconds, args.cold, args.seed
+    ))
+
+    output = args.output or f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    summary = result["summary"]
+    print(
+        f"[Benchmark] {summary['jobs']} jobs, {summary['jobs_per_sec']} jobs/s, "
+        f"{summary['unexpected']} unexpected — written to {output}"
+    )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, result, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
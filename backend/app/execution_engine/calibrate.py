@@ -0,0 +1,171 @@
+"""
+Time-limit calibration for one question, on the judge host itself:
+
+    python -m app.execution_engine.calibrate <question_id> solution.cpp [solution.py ...]
+        [--repeat 3] [--apply]
+
+Runs each reference solution (language from the extension, or "lang:path")
+against every test case of the question, one run at a time, and takes the
+slowest case's CPU time over --repeat rounds. The base limit is that time
+times CALIBRATION_SAFETY_FACTOR, divided by the language's multiplier and
+rounded up to 100 ms — the largest across references, so every reference
+passes with the same margin. With --apply it is stored as the question's
+time_limit_ms; otherwise it is only reported.
+
+Several references also show how their languages compare on this host,
+for tuning TIME_LIMIT_MULTIPLIERS.
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+from types import SimpleNamespace
+from typing import List, Tuple
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    TIME_LIMIT_MULTIPLIERS,
+    MAX_TIME_LIMIT_SECONDS,
+    MIN_TIME_LIMIT_MS,
+    CALIBRATION_SAFETY_FACTOR,
+)
+from app.execution_engine.sandbox import run_code_in_sandbox
+from app.execution_engine.checker import CheckerError, check_output
+from app.execution_engine.runner import resolve_driver_code, time_limit_of
+
+EXTENSIONS = {
+    ".py": "python3",
+    ".js": "javascript",
+    ".java": "java",
+    ".cpp": "cpp",
+    ".cc": "cpp",
+    ".c": "c",
+}
+
+
+class CalibrationError(Exception):
+    """A reference solution could not be measured — it failed or exceeded the maximum limit."""
+
+
+def parse_reference(arg: str) -> Tuple[str, str]:
+    """'lang:path' or a path whose extension names the language. Returns (language, path)."""
+    language, _, path = arg.partition(":")
+    if path and language in LANGUAGE_CONFIG:
+        return language, path
+    language = EXTENSIONS.get(os.path.splitext(arg)[1])
+    if language is None:
+        raise CalibrationError(f"Cannot tell the language of {arg} — write it as <language>:<path>")
+    return language, arg
+
+
+async def measure(test_set, language: str, code: str, repeat: int) -> Tuple[int, str]:
+    """Slowest CPU time (ms) of any test case over repeat rounds, and that case's id."""
+    full_code = resolve_driver_code(test_set, language, code)
+    slowest_ms, slowest_case = 0, None
+    for _ in range(repeat):
+        for tc in test_set.submit_cases:
+            execution = await run_code_in_sandbox(
+                full_code,
+                language,
+                tc.input,
+                time_limit=MAX_TIME_LIMIT_SECONDS,
+                decode_output=False
+            )
+            if not execution["success"]:
+                raise CalibrationError(f"{language} reference failed test case {tc.id}: {execution['error'][:200]}")
+            try:
+                correct = await check_output(
+                    test_set.checker, test_set.checker_config, tc.input, execution["stdout"], tc.expected_output
+                )
+            except CheckerError as e:
+                raise CalibrationError(f"Checker failed on test case {tc.id}: {e}")
+            if not correct:
+                raise CalibrationError(f"{language} reference gave a wrong answer on test case {tc.id}")
+            if execution["runtime_ms"] >= slowest_ms:
+                slowest_ms, slowest_case = execution["runtime_ms"], tc.id
+    return slowest_ms, slowest_case
+
+
+def base_limit_ms(measurements: List[Tuple[str, int]]) -> int:
+    """Base (C/C++) limit that gives every (language, slowest_ms) the safety margin."""
+    implied = max(
+        slowest_ms * CALIBRATION_SAFETY_FACTOR / TIME_LIMIT_MULTIPLIERS.get(language, 1.0)
+        for language, slowest_ms in measurements
+    )
+    rounded = math.ceil(implied / 100) * 100
+    return max(MIN_TIME_LIMIT_MS, min(rounded, MAX_TIME_LIMIT_SECONDS * 1000))
+
+
+async def calibrate(question_id: str, references: List[Tuple[str, str]], repeat: int, apply: bool) -> int:
+    from app.core.database import AsyncSessionLocal, engine
+    from app.execution_engine.test_set_cache import test_set_cache
+    from app.execution_engine.worker import start_execution_engine, stop_execution_engine
+    from app.services.test_service import set_time_limit
+
+    start_execution_engine()
+    try:
+        async with AsyncSessionLocal() as db:
+            test_set = await test_set_cache.get(question_id, db)
+        if test_set is None or not test_set.submit_cases:
+            raise CalibrationError(f"Question {question_id} not found, or it has no test cases")
+        print(f"[Calibrate] question {question_id}: {len(test_set.submit_cases)} test case(s), {repeat} round(s)")
+
+        measurements = []
+        for language, path in references:
+            with open(path) as f:
+                code = f.read()
+            slowest_ms, case_id = await measure(test_set, language, code, repeat)
+            measurements.append((language, slowest_ms))
+            print(f"[Calibrate] {language:<10} slowest {slowest_ms:>6} ms (test case {case_id})")
+
+        base_ms = base_limit_ms(measurements)
+        if base_ms == MAX_TIME_LIMIT_SECONDS * 1000:
+            print("[Calibrate] warning: capped at MAX_TIME_LIMIT_SECONDS — a reference is very slow")
+
+        fastest = min(measurements, key=lambda m: m[1] / TIME_LIMIT_MULTIPLIERS.get(m[0], 1.0))
+        if len(measurements) > 1 and fastest[1]:
+            for language, slowest_ms in measurements:
+                print(
+                    f"[Calibrate] {language:<10} observed x{slowest_ms / fastest[1]:.2f} of {fastest[0]}, "
+                    f"configured x{TIME_LIMIT_MULTIPLIERS.get(language, 1.0) / TIME_LIMIT_MULTIPLIERS.get(fastest[0], 1.0):.2f}"
+                )
+
+        print(f"[Calibrate] base time limit: {base_ms} ms (was {test_set.time_limit_ms or 'default'})")
+        calibrated = SimpleNamespace(time_limit_ms=base_ms)
+        for language in LANGUAGE_CONFIG:
+            print(f"[Calibrate]   {language:<10} {time_limit_of(calibrated, language):.2f} s")
+
+        if apply:
+            async with AsyncSessionLocal() as db:
+                await set_time_limit(question_id, base_ms, db)
+                await db.commit()
+            print("[Calibrate] saved")
+        else:
+            print("[Calibrate] not saved — rerun with --apply to store it")
+        return 0
+
+    except CalibrationError as e:
+        print(f"[Calibrate] {e}")
+        return 1
+    finally:
+        await stop_execution_engine()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive a question's time limit from reference solutions")
+    parser.add_argument("question_id")
+    parser.add_argument("references", nargs="+", help="reference solution files ([language:]path)")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds over the test cases")
+    parser.add_argument("--apply", action="store_true", help="store the derived limit on the question")
+    args = parser.parse_args()
+
+    try:
+        references = [parse_reference(arg) for arg in args.references]
+    except CalibrationError as e:
+        parser.error(str(e))
+    sys.exit(asyncio.run(calibrate(args.question_id, references, max(1, args.repeat), args.apply)))
+
+
+if __name__ == "__main__":
+    main()
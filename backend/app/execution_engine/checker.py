@@ -0,0 +1,210 @@
+import asyncio
+import math
+import os
+import re
+from collections import Counter
+from itertools import zip_longest
+from typing import Optional
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    CHECKER_TIME_LIMIT_SECONDS,
+    CHECKER_MEMORY_LIMIT_MB,
+)
+from app.execution_engine.output import BytesLike, InputData, as_bytes, outputs_match, trim_bounds
+from app.execution_engine.process import run_process
+from app.execution_engine.sandbox import run_executor, prepare_program
+from app.execution_engine.compiler import artifact_cache
+from app.execution_engine.scheduler import execution_scheduler
+from app.execution_engine.workdir_pool import workdir_pool
+from app.execution_engine.limits import build_limits, create_run_cgroup, remove_run_cgroup
+
+DEFAULT_CHECKER = "exact"
+DEFAULT_FLOAT_EPSILON = 1e-6
+
+# Built-in comparisons on outputs larger than this run off the event loop
+CHECKER_INLINE_BYTES = 1024 * 1024
+
+TOKEN_PATTERN = re.compile(rb"\S+")
+
+# testlib convention: 0 = accepted, 1 = wrong answer, 2 = presentation error
+CHECKER_REJECT_CODES = (1, 2)
+
+
+class CheckerError(Exception):
+    """A question's custom checker failed to compile, crashed or timed out — no verdict."""
+
+
+def _tokens(buf: BytesLike):
+    """Whitespace-separated tokens of buf, produced lazily one at a time."""
+    return (m.group() for m in TOKEN_PATTERN.finditer(buf))
+
+
+def check_tokens(actual: BytesLike, expected: bytes, config: dict) -> bool:
+    """Same tokens in the same order — any amount and kind of whitespace between them."""
+    for a, e in zip_longest(_tokens(actual), _tokens(expected)):
+        if a != e:
+            return False
+    return True
+
+
+def _floats_close(a: bytes, e: bytes, epsilon: float) -> bool:
+    try:
+        a_val, e_val = float(a), float(e)
+    except ValueError:
+        # Non-numeric tokens (e.g. "YES") still have to match exactly
+        return a == e
+    if math.isnan(a_val) or math.isnan(e_val):
+        return math.isnan(a_val) and math.isnan(e_val)
+    # Absolute or relative error, whichever is more lenient
+    return abs(a_val - e_val) <= epsilon * max(1.0, abs(e_val))
+
+
+def check_float(actual: BytesLike, expected: bytes, config: dict) -> bool:
+    """Token comparison where numbers may differ by up to config["epsilon"]."""
+    epsilon = float(config.get("epsilon", DEFAULT_FLOAT_EPSILON))
+    for a, e in zip_longest(_tokens(actual), _tokens(expected)):
+        if a is None or e is None or not _floats_close(a, e, epsilon):
+            return False
+    return True
+
+
+def _line_counts(buf: BytesLike) -> Counter:
+    start, end = trim_bounds(buf)
+    return Counter(line.rstrip() for line in bytes(memoryview(buf)[start:end]).splitlines())
+
+
+def check_unordered_lines(actual: BytesLike, expected: bytes, config: dict) -> bool:
+    """Same lines in any order, ignoring trailing whitespace on each line."""
+    return _line_counts(actual) == _line_counts(expected)
+
+
+def check_exact(actual: BytesLike, expected: bytes, config: dict) -> bool:
+    return outputs_match(actual, expected)
+
+
+# Built-in checkers selectable through Question.checker
+CHECKERS = {
+    "exact": check_exact,
+    "tokens": check_tokens,
+    "float": check_float,
+    "unordered_lines": check_unordered_lines,
+}
+CHECKER_NAMES = list(CHECKERS) + ["custom"]
+
+
+def validate_checker(checker: str, config: Optional[dict]):
+    """Raise ValueError if a question's checker settings cannot be used."""
+    if checker not in CHECKER_NAMES:
+        raise ValueError(f"Unknown checker: {checker}")
+    config = config or {}
+
+    if checker == "float":
+        try:
+            epsilon = float(config.get("epsilon", DEFAULT_FLOAT_EPSILON))
+        except (TypeError, ValueError):
+            raise ValueError("Float checker epsilon must be a number")
+        if not epsilon >= 0:
+            raise ValueError("Float checker epsilon must be non-negative")
+
+    if checker == "custom":
+        if config.get("language") not in LANGUAGE_CONFIG:
+            raise ValueError(f"Unsupported checker language: {config.get('language')}")
+        if not config.get("code"):
+            raise ValueError("Custom checker needs its source code")
+
+
+async def compile_custom_checker(config: dict):
+    """
+    Build a custom checker ahead of judging, so a broken one is rejected when
+    the question is saved. Raises CheckerError with the compiler output.
+    Interpreted checkers have nothing to build.
+    """
+    language = config["language"]
+    if not LANGUAGE_CONFIG[language]["compile_cmd"]:
+        return
+    async with execution_scheduler.slot():
+        compiled = await artifact_cache.get_or_compile(config["code"], language)
+    if not compiled["success"]:
+        raise CheckerError(compiled["error"])
+
+
+async def run_custom_checker(
+    config: dict,
+    input_data: InputData,
+    actual: BytesLike,
+    expected: bytes
+) -> bool:
+    """
+    Run a question's own checker program as `checker input.txt output.txt answer.txt`
+    and judge by its exit code. The build is shared through the artifact cache,
+    so a question's checker compiles once no matter how many cases use it.
+    Raises CheckerError if it does not build or exits with anything but a
+    testlib accept/reject code.
+    """
+    language = config["language"]
+    lang_config = LANGUAGE_CONFIG[language]
+
+    async with execution_scheduler.slot():
+        with workdir_pool.lease() as tmpdir:
+            compiled = await prepare_program(config["code"], language, tmpdir)
+            if not compiled["success"]:
+                raise CheckerError(f"Custom checker failed to compile: {compiled['error'][:200]}")
+
+            for name, data in (
+                ("input.txt", as_bytes(input_data)),
+                ("output.txt", actual),
+                ("answer.txt", expected),
+            ):
+                with open(os.path.join(tmpdir, name), "wb") as f:
+                    f.write(data)
+
+            cgroup_path = create_run_cgroup(CHECKER_MEMORY_LIMIT_MB)
+            try:
+                loop = asyncio.get_running_loop()
+                run = await loop.run_in_executor(
+                    run_executor,
+                    run_process,
+                    lang_config["run_cmd"] + ["input.txt", "output.txt", "answer.txt"],
+                    tmpdir,
+                    b"",
+                    CHECKER_TIME_LIMIT_SECONDS,
+                    build_limits(
+                        CHECKER_TIME_LIMIT_SECONDS,
+                        CHECKER_MEMORY_LIMIT_MB,
+                        lang_config["limit_address_space"],
+                        cgroup_path
+                    )
+                )
+            finally:
+                remove_run_cgroup(cgroup_path)
+
+    if run["timed_out"] or run["returncode"] not in (0,) + CHECKER_REJECT_CODES:
+        raise CheckerError(
+            f"Custom checker crashed (exit {run['returncode']}, "
+            f"timed_out={run['timed_out']}): {run['stderr'][:200]!r}"
+        )
+    return run["returncode"] == 0
+
+
+async def check_output(
+    checker: Optional[str],
+    config: Optional[dict],
+    input_data: InputData,
+    actual: BytesLike,
+    expected: InputData
+) -> bool:
+    """Judge one test case's captured stdout with the question's checker. Raises CheckerError."""
+    checker = checker or DEFAULT_CHECKER
+    config = config or {}
+    if isinstance(expected, str):
+        expected = expected.encode("utf-8")
+
+    if checker == "custom":
+        return await run_custom_checker(config, input_data, actual, expected)
+
+    compare = CHECKERS.get(checker, check_exact)
+    if len(actual) + len(expected) <= CHECKER_INLINE_BYTES:
+        return compare(actual, expected, config)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, compare, actual, expected, config)
@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import signal
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    COMPILE_TIME_LIMIT_SECONDS,
+    COMPILE_CACHE_DIR,
+    COMPILE_CACHE_MAX_MB,
+)
+from app.execution_engine.pch import precompiled_headers
+from app.execution_engine.tracing import stage
+
+META_FILE = ".meta.json"
+
+# Half-written staging dirs older than this are left over from a crashed worker
+STALE_STAGING_SECONDS = 600
+# Other processes sharing the cache root add entries this process does not
+# count — rescan the directory at least this often
+EVICT_RESCAN_SECONDS = 300
+
+
+def artifact_key(code: str, language: str, toolchain: str = "") -> str:
+    """
+    Content hash identifying a compiled artifact.
+    Includes the compile command so changing compiler flags invalidates old builds,
+    and the toolchain (e.g. a container image) when it is not the host's.
+    """
+    config = LANGUAGE_CONFIG[language]
+    digest = hashlib.sha256()
+    for part in (language, " ".join(config["compile_cmd"] or []), toolchain, code):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Compiles the source in a staging dir in place: (returncode, stderr), or None on timeout
+Compiler = Callable[[str], Awaitable[Optional[Tuple[int, bytes]]]]
+
+
+async def run_compile_cmd(compile_cmd: list, staging_dir: str) -> Optional[Tuple[int, bytes]]:
+    compile_proc = await asyncio.create_subprocess_exec(
+        *compile_cmd,
+        cwd=staging_dir,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        # Own process group — killing only the g++ driver would leave cc1plus running
+        start_new_session=True
+    )
+
+    try:
+        _, stderr = await asyncio.wait_for(
+            compile_proc.communicate(),
+            timeout=COMPILE_TIME_LIMIT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        try:
+            os.killpg(compile_proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await compile_proc.wait()
+        return None
+    return compile_proc.returncode, stderr
+
+
+def _dir_size(path: str) -> int:
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return size
+
+
+class ArtifactCache:
+    """
+    On-disk cache of compiled submissions, keyed by artifact_key().
+
+    Each entry is a directory holding the build output plus a META_FILE
+    describing the compile result. Entries are published with an atomic
+    rename, so several worker processes can share one cache root. The
+    META_FILE mtime is bumped on every hit and used for LRU eviction
+    once the cache grows past its disk budget. The cache size is tracked
+    as entries are published; the full directory scan that evicts runs in
+    a thread, only once that estimate passes the budget (or goes stale).
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Per-language compile metrics, see stats()
+        self.compiles: Dict[str, dict] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Bytes on disk as of the last scan plus entries published since;
+        # None until the first scan
+        self._approx_bytes: Optional[int] = None
+        self._last_scan = 0.0
+        self._eviction: Optional[asyncio.Future] = None
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def lookup(self, key: str) -> Optional[dict]:
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+
+        meta["artifact_dir"] = entry_dir
+        return meta
+
+    async def get_or_compile(
+        self,
+        code: str,
+        language: str,
+        compiler: Optional[Compiler] = None,
+        toolchain: str = ""
+    ) -> dict:
+        """
+        Return the compile result for this code, compiling at most once per key.
+        compiler replaces running compile_cmd (e.g. a warm in-process javac); one
+        producing different output must name its toolchain so builds are kept apart.
+        Result: {"success", "error", "compile_ms", "artifact_dir"}
+        Traced as the job's "compile" stage, cache hits included.
+        """
+        with stage("compile"):
+            return await self._get_or_compile(code, language, compiler, toolchain)
+
+    async def _get_or_compile(
+        self,
+        code: str,
+        language: str,
+        compiler: Optional[Compiler],
+        toolchain: str
+    ) -> dict:
+        key = artifact_key(code, language, toolchain)
+
+        cached = self.lookup(key)
+        if cached:
+            self.hits += 1
+            return cached
+
+        # Concurrent requests for the same code wait for a single compile
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self.lookup(key)
+            if cached:
+                self.hits += 1
+                return cached
+
+            self.misses += 1
+            result = await self._compile_into_cache(key, code, language, compiler)
+
+        self._locks.pop(key, None)
+        return result
+
+    async def _compile_into_cache(
+        self,
+        key: str,
+        code: str,
+        language: str,
+        compiler: Optional[Compiler]
+    ) -> dict:
+        config = LANGUAGE_CONFIG[language]
+        os.makedirs(self.root, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=f".{key[:16]}-", dir=self.root)
+
+        with open(os.path.join(staging_dir, config["filename"]), "w") as f:
+            f.write(code)
+
+        compile_cmd = precompiled_headers.compile_cmd(language)
+        used_pch = compile_cmd != config["compile_cmd"]
+
+        start_time = time.time()
+        try:
+            if compiler:
+                outcome = await compiler(staging_dir)
+            else:
+                outcome = await run_compile_cmd(compile_cmd, staging_dir)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if outcome is None:
+            self._record(language, COMPILE_TIME_LIMIT_SECONDS * 1000, "timeouts", used_pch)
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            # Not cached — a timeout may just mean the host was overloaded
+            return {
+                "success": False,
+                "error": "Compilation timed out",
+                "compile_ms": COMPILE_TIME_LIMIT_SECONDS * 1000,
+                "artifact_dir": None
+            }
+
+        returncode, stderr = outcome
+        meta = {
+            "success": returncode == 0,
+            "error": "" if returncode == 0 else stderr.decode("utf-8", errors="replace"),
+            "compile_ms": int((time.time() - start_time) * 1000),
+        }
+        self._record(
+            language,
+            meta["compile_ms"],
+            "succeeded" if meta["success"] else "failed",
+            used_pch
+        )
+        with open(os.path.join(staging_dir, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        entry_dir = self._entry_dir(key)
+        try:
+            os.rename(staging_dir, entry_dir)
+        except OSError:
+            # Another worker published the same key first — use theirs
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        else:
+            if self._approx_bytes is not None:
+                self._approx_bytes += _dir_size(entry_dir)
+        self._schedule_eviction()
+
+        meta["artifact_dir"] = entry_dir
+        return meta
+
+    def _record(self, language: str, compile_ms: int, outcome: str, used_pch: bool):
+        entry = self.compiles.setdefault(language, {
+            "succeeded": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "with_pch": 0,
+            "total_ms": 0,
+            "max_ms": 0,
+        })
+        entry[outcome] += 1
+        entry["with_pch"] += int(used_pch)
+        entry["total_ms"] += compile_ms
+        entry["max_ms"] = max(entry["max_ms"], compile_ms)
+
+    def stats(self) -> dict:
+        """Cache hit/miss counts and compile latency per language for this process."""
+        languages = {}
+        for language, entry in self.compiles.items():
+            count = entry["succeeded"] + entry["failed"] + entry["timeouts"]
+            languages[language] = dict(entry, avg_ms=entry["total_ms"] // count if count else 0)
+        return {"hits": self.hits, "misses": self.misses, "languages": languages}
+
+    def _schedule_eviction(self):
+        """Start a background evict() if the cache may be over budget. Never blocks the loop."""
+        if self._eviction is not None:
+            return
+        if (
+            self._approx_bytes is not None
+            and self._approx_bytes <= self.max_bytes
+            and time.time() - self._last_scan < EVICT_RESCAN_SECONDS
+        ):
+            return
+
+        self._last_scan = time.time()
+        loop = asyncio.get_running_loop()
+        self._eviction = loop.run_in_executor(None, self.evict)
+        self._eviction.add_done_callback(self._eviction_done)
+
+    def _eviction_done(self, future: asyncio.Future):
+        self._eviction = None
+        if future.cancelled():
+            return
+        if future.exception():
+            print(f"[ArtifactCache] eviction failed: {future.exception()}")
+            return
+        self._approx_bytes = future.result()
+
+    def evict(self) -> int:
+        """
+        Drop least recently used entries until the cache fits its disk budget.
+        Blocking — walks the whole cache root. Returns the bytes left on disk.
+        """
+        entries = []
+        total_bytes = 0
+        now = time.time()
+
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return 0
+
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                if name.startswith("."):
+                    if now - os.path.getmtime(path) > STALE_STAGING_SECONDS:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+
+                size = _dir_size(path)
+                last_used = os.path.getmtime(os.path.join(path, META_FILE))
+            except OSError:
+                continue
+
+            entries.append((last_used, size, path))
+            total_bytes += size
+
+        if total_bytes <= self.max_bytes:
+            return total_bytes
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_bytes -= size
+        return total_bytes
+
+    def copy_artifacts(self, artifact_dir: str, dest_dir: str):
+        """
+        Copy a cached build into a run directory.
+        Copied rather than linked so a submission cannot modify the shared entry.
+        """
+        shutil.copytree(
+            artifact_dir,
+            dest_dir,
+            ignore=shutil.ignore_patterns(META_FILE),
+            dirs_exist_ok=True
+        )
+
+
+# Global instance
+artifact_cache = ArtifactCache(COMPILE_CACHE_DIR, COMPILE_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,435 @@
+import asyncio
+import io
+import os
+import re
+import signal
+import tarfile
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    MEMORY_LIMIT_MB,
+    PROCESS_LIMIT,
+    OUTPUT_LIMIT_MB,
+    STDERR_LIMIT_KB,
+    COMPILE_TIME_LIMIT_SECONDS,
+    CONTAINER_POOL_SIZE,
+    CONTAINER_WORKDIR_MB,
+    CONTAINER_COMPILE_MEMORY_MB,
+    CONTAINER_MAX_JOBS,
+    CONTAINER_USER,
+)
+from app.execution_engine.compiler import META_FILE
+from app.execution_engine.limits import build_limits
+
+try:
+    import docker
+except ImportError:
+    docker = None
+
+WORKDIR = "/work"
+POOL_LABEL = "codeshield.pool"
+
+# Runs the program on input.txt, then reports the shell's children CPU times
+# on stderr after a marker — so a run killed by the wall timeout has no marker
+TIMES_MARKER = b"\n__codeshield_times__\n"
+RUN_SCRIPT = (
+    'ulimit -t "$1"; shift; '
+    '"$@" < input.txt; status=$?; '
+    "printf '\\n__codeshield_times__\\n' >&2; times >&2; exit $status"
+)
+TIMES_PATTERN = re.compile(rb"(\d+)m([\d.]+)s")
+
+# Run as the run user: kills every process the job started, wherever it is
+KILL_SCRIPT = "kill -9 -1 2>/dev/null; true"
+# Kills whatever the last job left running and empties the scratch dirs
+WIPE_SCRIPT = f"{KILL_SCRIPT}; find {WORKDIR} /tmp -mindepth 1 -delete 2>/dev/null; true"
+
+
+class ContainerLost(Exception):
+    """The container or the daemon failed mid-job — the job should run on the host."""
+
+
+def _docker_errors() -> tuple:
+    return (docker.errors.DockerException, OSError) if docker else (OSError,)
+
+
+def artifact_files(artifact_dir: str) -> Dict[str, Tuple[bytes, int]]:
+    """Read a compiled artifact dir into {relative path: (content, mode)} for upload."""
+    files = {}
+    for dirpath, _, filenames in os.walk(artifact_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, artifact_dir)
+            if name == META_FILE:
+                continue
+            with open(path, "rb") as f:
+                files[name] = (f.read(), os.stat(path).st_mode & 0o777)
+    return files
+
+
+def _tar(files: Dict[str, Tuple[bytes, int]]) -> bytes:
+    uid, gid = (int(part) for part in CONTAINER_USER.split(":"))
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, (content, mode) in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = mode
+            # Owned by the run user so the wipe can delete them
+            info.uid, info.gid = uid, gid
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def _parse_cpu_ms(times_output: bytes) -> Optional[int]:
+    """Children's user + system time from the second line of `times`."""
+    lines = times_output.strip().splitlines()
+    if len(lines) < 2:
+        return None
+    values = TIMES_PATTERN.findall(lines[1])
+    if len(values) != 2:
+        return None
+    return int(sum(int(minutes) * 60 + float(seconds) for minutes, seconds in values) * 1000)
+
+
+class PooledContainer:
+    """
+    A long-lived container from a language's image: no network, read-only
+    root, a tmpfs workdir and submissions running as an unprivileged user.
+    Jobs are uploaded into the workdir, run with `docker exec`, and wiped
+    afterwards. Blocking; use from executor threads.
+    """
+
+    def __init__(self, client, language: str):
+        self.client = client
+        self.language = language
+        self.image = LANGUAGE_CONFIG[language]["image"]
+        self.jobs = 0
+        self.alive = True
+        self.container = client.containers.run(
+            self.image,
+            ["sleep", "infinity"],
+            detach=True,
+            auto_remove=True,
+            network_disabled=True,
+            mem_limit=f"{MEMORY_LIMIT_MB}m",
+            memswap_limit=f"{MEMORY_LIMIT_MB}m",
+            pids_limit=PROCESS_LIMIT,
+            nano_cpus=1_000_000_000,
+            read_only=True,
+            tmpfs={
+                WORKDIR: f"rw,exec,size={CONTAINER_WORKDIR_MB}m,mode=1777",
+                "/tmp": f"rw,size={CONTAINER_WORKDIR_MB}m,mode=1777",
+            },
+            working_dir=WORKDIR,
+            cap_drop=["ALL"],
+            security_opt=["no-new-privileges"],
+            labels={POOL_LABEL: language},
+        )
+
+    def reusable(self) -> bool:
+        return self.alive and self.jobs < CONTAINER_MAX_JOBS
+
+    def _exec(self, cmd: list):
+        """Start cmd in the workdir as the run user; returns (exec id, demuxed output stream)."""
+        exec_id = self.client.api.exec_create(
+            self.container.id,
+            cmd,
+            workdir=WORKDIR,
+            user=CONTAINER_USER,
+            stdout=True,
+            stderr=True
+        )["Id"]
+        return exec_id, self.client.api.exec_start(exec_id, stream=True, demux=True)
+
+    def _exit_code(self, exec_id: str) -> int:
+        return self.client.api.exec_inspect(exec_id)["ExitCode"]
+
+    def _sh(self, script: str):
+        _, stream = self._exec(["sh", "-c", script])
+        for _ in stream:
+            pass
+
+    def _wipe(self):
+        self._sh(WIPE_SCRIPT)
+
+    def _set_memory(self, memory_mb: int):
+        self.container.update(mem_limit=f"{memory_mb}m", memswap_limit=f"{memory_mb}m")
+
+    def compile(self, staging_dir: str) -> Optional[Tuple[int, bytes]]:
+        """
+        compile_cmd inside the container for ArtifactCache.get_or_compile():
+        the build output is copied back into staging_dir.
+        Returns (returncode, stderr) or None on timeout.
+        """
+        compile_cmd = LANGUAGE_CONFIG[self.language]["compile_cmd"]
+        try:
+            self.container.put_archive(WORKDIR, _tar(artifact_files(staging_dir)))
+            # Compilers need more headroom than submissions get
+            self._set_memory(CONTAINER_COMPILE_MEMORY_MB)
+            try:
+                exec_id, stream = self._exec(
+                    ["timeout", "-s", "KILL", str(COMPILE_TIME_LIMIT_SECONDS), *compile_cmd]
+                )
+                stderr = bytearray()
+                for _, err in stream:
+                    if err and len(stderr) < STDERR_LIMIT_KB * 1024:
+                        stderr += err
+                returncode = self._exit_code(exec_id)
+            finally:
+                self._set_memory(MEMORY_LIMIT_MB)
+
+            if returncode == 128 + signal.SIGKILL:
+                return None
+            if returncode == 0:
+                self._download(staging_dir)
+            return returncode, bytes(stderr)
+        except _docker_errors() as e:
+            self.alive = False
+            raise ContainerLost(f"container compile failed: {e}")
+        finally:
+            self._cleanup()
+
+    def _download(self, staging_dir: str):
+        stream, _ = self.container.get_archive(f"{WORKDIR}/.")
+        archive = io.BytesIO(b"".join(stream))
+        with tarfile.open(fileobj=archive) as tar:
+            for member in tar.getmembers():
+                # Entries are "./<path>" — keep regular files inside the workdir only
+                name = os.path.normpath(member.name)
+                if not member.isfile() or name.startswith("..") or os.path.isabs(name):
+                    continue
+                path = os.path.join(staging_dir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(tar.extractfile(member).read())
+                os.chmod(path, member.mode & 0o777)
+
+    def run(self, files: Dict[str, Tuple[bytes, int]], input_data: bytes, time_limit: float) -> dict:
+        """
+        Run run_cmd on input_data with files in the workdir. Same result shape
+        as process.run_process(), plus memory_exceeded. memory_kb is 0: the
+        container's cgroup outlives the job, so its peak is not this run's.
+
+        Held to the host path's limits: killed at time_limit wall-clock, as
+        launcher.py does, under the same RLIMIT_CPU.
+        """
+        self.jobs += 1
+        config = LANGUAGE_CONFIG[self.language]
+        stdout_limit = OUTPUT_LIMIT_MB * 1024 * 1024
+        stderr_limit = STDERR_LIMIT_KB * 1024
+        cpu_seconds = build_limits(time_limit)["cpu_seconds"]
+
+        try:
+            self.container.put_archive(WORKDIR, _tar(dict(files, **{"input.txt": (input_data, 0o644)})))
+
+            start = time.monotonic()
+            exec_id, stream = self._exec([
+                "timeout", "-s", "KILL", str(time_limit),
+                "sh", "-c", RUN_SCRIPT, "sh", str(cpu_seconds), *config["run_cmd"]
+            ])
+            stdout = bytearray()
+            stderr = bytearray()
+            # The times report follows whatever the program wrote to stderr
+            tail = b""
+            output_limit_exceeded = False
+            for out, err in stream:
+                if out:
+                    if len(stdout) + len(out) > stdout_limit:
+                        output_limit_exceeded = True
+                        # Stop the job now rather than leave it writing into a
+                        # container the next job reuses
+                        self._sh(KILL_SCRIPT)
+                        stream.close()
+                        break
+                    stdout += out
+                if err:
+                    if len(stderr) < stderr_limit:
+                        stderr += err[:stderr_limit - len(stderr)]
+                    tail = (tail + err)[-512:]
+            wall_ms = int((time.monotonic() - start) * 1000)
+            returncode = None if output_limit_exceeded else self._exit_code(exec_id)
+        except _docker_errors() as e:
+            self.alive = False
+            raise ContainerLost(f"container run failed: {e}")
+        finally:
+            self._cleanup()
+
+        marker = tail.rfind(TIMES_MARKER)
+        cpu_ms = _parse_cpu_ms(tail[marker + len(TIMES_MARKER):]) if marker >= 0 else None
+        if marker >= 0:
+            end = stderr.rfind(TIMES_MARKER)
+            if end >= 0:
+                del stderr[end:]
+
+        # No times report: the wall timeout killed the whole job
+        timed_out = not output_limit_exceeded and (
+            cpu_ms is None or cpu_ms > time_limit * 1000
+            or returncode == 128 + signal.SIGXCPU
+        )
+        # Killed by something other than our limits — the cgroup OOM killer
+        memory_exceeded = (
+            not timed_out and not output_limit_exceeded
+            and returncode == 128 + signal.SIGKILL
+        )
+        return {
+            "returncode": -signal.SIGKILL if returncode is None else returncode,
+            "timed_out": timed_out,
+            "output_limit_exceeded": output_limit_exceeded,
+            "memory_exceeded": memory_exceeded,
+            "stdout": stdout,
+            "stderr": bytes(stderr),
+            "cpu_ms": cpu_ms if cpu_ms is not None else int(time_limit * 1000),
+            "wall_ms": wall_ms,
+            "memory_kb": 0,
+        }
+
+    def _cleanup(self):
+        if not self.alive:
+            return
+        try:
+            self._wipe()
+        except _docker_errors() as e:
+            print(f"[ContainerPool] wipe failed, dropping container: {e}")
+            self.alive = False
+
+    def discard(self):
+        self.alive = False
+        try:
+            self.container.remove(force=True)
+        except _docker_errors():
+            pass
+
+
+class ContainerPool:
+    """
+    Pre-started containers per language, built from each LANGUAGE_CONFIG
+    "image", so submissions get container isolation without paying for a
+    container start per run. Compiled artifacts are cached per image. With
+    no docker daemon, or no idle container, runs stay on the host.
+
+    Only run_code_in_sandbox() uses containers: while a language is served
+    here, submissions skip the batch harness and run case by case (see
+    runner.uses_batch()). Custom checkers are the question author's code
+    and always run on the host.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.client = None
+        self._idle: Dict[str, Deque[PooledContainer]] = {
+            language: deque() for language in LANGUAGE_CONFIG
+        }
+        self._pending: Dict[str, int] = {language: 0 for language in LANGUAGE_CONFIG}
+        self._broken = set()
+        self._tasks = set()
+        self._stopped = False
+
+    def _track(self, task):
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def start(self):
+        if self.size:
+            self._track(asyncio.create_task(self._connect()))
+
+    async def _connect(self):
+        if docker is None:
+            print("[ContainerPool] docker package not installed, runs stay on the host")
+            return
+
+        def connect():
+            client = docker.from_env()
+            client.ping()
+            # Containers orphaned by a crashed worker on this daemon
+            for stale in client.containers.list(all=True, filters={"label": POOL_LABEL}):
+                stale.remove(force=True)
+            return client
+
+        loop = asyncio.get_running_loop()
+        try:
+            self.client = await loop.run_in_executor(None, connect)
+        except _docker_errors() as e:
+            print(f"[ContainerPool] no docker daemon, runs stay on the host: {e}")
+            return
+        print(f"[ContainerPool] keeping {self.size} container(s) per language")
+        for language in LANGUAGE_CONFIG:
+            self._top_up(language)
+
+    def serves(self, language: str) -> bool:
+        """Whether runs of this language are meant to go to containers."""
+        return self.client is not None and language in self._idle and language not in self._broken
+
+    def acquire(self, language: str) -> Optional[PooledContainer]:
+        """Take an idle container for this job, or None to run it on the host."""
+        if not self.serves(language):
+            return None
+
+        container = None
+        idle = self._idle[language]
+        while idle:
+            candidate = idle.popleft()
+            if candidate.reusable():
+                container = candidate
+                break
+            self._discard(candidate)
+
+        self._top_up(language)
+        if container:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return container
+
+    def release(self, container: PooledContainer):
+        idle = self._idle[container.language]
+        if container.reusable() and not self._stopped and len(idle) < self.size:
+            idle.append(container)
+        else:
+            self._discard(container)
+        self._top_up(container.language)
+
+    def _top_up(self, language: str):
+        if self._stopped or language in self._broken:
+            return
+        for _ in range(self.size - len(self._idle[language]) - self._pending[language]):
+            self._pending[language] += 1
+            self._track(asyncio.create_task(self._spawn(language)))
+
+    async def _spawn(self, language: str):
+        loop = asyncio.get_running_loop()
+        try:
+            container = await loop.run_in_executor(None, PooledContainer, self.client, language)
+        except _docker_errors() as e:
+            # Usually a missing image with no registry access — stop retrying
+            print(f"[ContainerPool] could not start a {language} container, runs stay on the host: {e}")
+            self._broken.add(language)
+            return
+        finally:
+            self._pending[language] -= 1
+
+        if self._stopped:
+            self._discard(container)
+            return
+        self._idle[language].append(container)
+
+    def _discard(self, container: PooledContainer):
+        loop = asyncio.get_running_loop()
+        self._track(loop.run_in_executor(None, container.discard))
+
+    async def stop(self):
+        self._stopped = True
+        for idle in self._idle.values():
+            while idle:
+                self._discard(idle.popleft())
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+# Global instance
+container_pool = ContainerPool(CONTAINER_POOL_SIZE)
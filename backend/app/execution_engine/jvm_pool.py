@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import os
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+from app.execution_engine.languages import (
+    ENGINE_DIR,
+    MEMORY_LIMIT_MB,
+    OUTPUT_LIMIT_MB,
+    STDERR_LIMIT_KB,
+    COMPILE_TIME_LIMIT_SECONDS,
+    COMPILE_CACHE_DIR,
+    JVM_POOL_SIZE,
+    JVM_WORKER_HEAP_MB,
+    JVM_WORKER_MEMORY_MB,
+    JVM_WORKER_MAX_JOBS,
+    JVM_WORKER_MAX_AGE_SECONDS,
+    JVM_CDS_ENABLED,
+)
+from app.execution_engine.process import (
+    READ_CHUNK_BYTES,
+    LAUNCHER_GRACE_SECONDS,
+    start_launcher,
+    stop_launcher,
+)
+from app.execution_engine.limits import build_limits, create_run_cgroup, remove_run_cgroup
+
+WORKER_CLASS = "CodeshieldJavaWorker"
+WORKER_SOURCE = os.path.join(ENGINE_DIR, f"{WORKER_CLASS}.java")
+JVM_LANGUAGE = "java"
+RUN_STATUSES = ("ok", "error", "timeout", "memory", "output_limit")
+
+
+# Submissions using these bypass System.in/out and so cannot share a JVM with
+# the worker's control pipes — they run cold
+RAW_DESCRIPTOR_MARKERS = ("FileDescriptor", "inheritedChannel")
+# Submitted code in the worker runs under the default policy (see
+# CodeshieldJavaWorker.ExitTrap), so ones touching files, the environment,
+# processes or class loaders run cold, where they behave as usual
+RESTRICTED_API_MARKERS = ("File", "Path", "getenv", "ProcessBuilder", "exec(", "ClassLoader", "setAccessible")
+
+
+class WorkerLost(Exception):
+    """The JVM went away or broke protocol mid-request — the job should be run cold instead."""
+
+
+def runs_in_worker(code: str) -> bool:
+    """Whether a Java submission can run on a persistent JVM."""
+    return not any(marker in code for marker in RAW_DESCRIPTOR_MARKERS + RESTRICTED_API_MARKERS)
+
+
+def build_worker_classes() -> Tuple[str, Optional[str]]:
+    """
+    Compile the worker once per source version into the compile cache dir and,
+    if enabled, record a CDS archive from a warm-up run.
+    Returns (classpath, archive path or None). Blocking.
+    """
+    with open(WORKER_SOURCE, "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+    classpath = os.path.join(COMPILE_CACHE_DIR, f"jvm-worker-{version}")
+
+    if not os.path.exists(os.path.join(classpath, f"{WORKER_CLASS}.class")):
+        os.makedirs(COMPILE_CACHE_DIR, exist_ok=True)
+        # Dot prefix: a crashed build is swept with other stale staging dirs
+        staging_dir = tempfile.mkdtemp(prefix=".jvm-worker-", dir=COMPILE_CACHE_DIR)
+        subprocess.run(
+            ["javac", "-d", staging_dir, WORKER_SOURCE],
+            check=True,
+            capture_output=True,
+            timeout=120
+        )
+        try:
+            os.rename(staging_dir, classpath)
+        except OSError:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    archive = os.path.join(classpath, "worker.jsa")
+    if JVM_CDS_ENABLED and not os.path.exists(archive):
+        partial = f"{archive}.{os.getpid()}"
+        result = subprocess.run(
+            ["java", f"-XX:ArchiveClassesAtExit={partial}", "-cp", classpath, WORKER_CLASS, "--warmup"],
+            capture_output=True,
+            timeout=120
+        )
+        if result.returncode == 0 and os.path.exists(partial):
+            os.replace(partial, archive)
+        else:
+            print(f"[JvmPool] CDS archive not created: {result.stderr[-200:]!r}")
+
+    return classpath, archive if os.path.exists(archive) else None
+
+
+class JvmWorker:
+    """
+    One persistent JVM running CodeshieldJavaWorker under launcher.py, inside
+    its own cgroup. Serves compile and run requests one at a time — see the
+    protocol in CodeshieldJavaWorker.java. Requests and replies travel over a
+    dedicated pair of pipes; the JVM's own stdin/stdout/stderr are /dev/null,
+    so nothing a submission does with fds 0-2 can reach the control channel.
+    Blocking; use from executor threads.
+    """
+
+    def __init__(self, classpath: str, cds_archive: Optional[str]):
+        self.workdir = tempfile.mkdtemp(prefix="codeshield-jvm-")
+        self.cgroup_path = create_run_cgroup(JVM_WORKER_MEMORY_MB)
+        self.jobs = 0
+        self.alive = True
+        self.started_at = time.monotonic()
+        self._buf = bytearray()
+
+        argv = [
+            "java",
+            f"-Xmx{JVM_WORKER_HEAP_MB}m",
+            "-XX:+UseSerialGC",
+            # Lets the worker trap System.exit() on JDKs that still allow it
+            "-Djava.security.manager=allow",
+        ]
+        if cds_archive:
+            argv.append(f"-XX:SharedArchiveFile={cds_archive}")
+
+        request_r, request_w = os.pipe()
+        reply_r, reply_w = os.pipe()
+        argv += ["-cp", classpath, WORKER_CLASS, str(request_r), str(reply_w)]
+        try:
+            self.proc, self.report_file = start_launcher(
+                argv,
+                self.workdir,
+                build_limits(
+                    JVM_WORKER_MAX_AGE_SECONDS,
+                    JVM_WORKER_MEMORY_MB,
+                    False,
+                    self.cgroup_path
+                ),
+                JVM_WORKER_MAX_AGE_SECONDS,
+                pass_fds=(request_r, reply_w),
+                # Submissions' System.in/out/err are per-job streams inside the JVM
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except BaseException:
+            os.close(request_w)
+            os.close(reply_r)
+            raise
+        finally:
+            os.close(request_r)
+            os.close(reply_w)
+        self.requests = os.fdopen(request_w, "wb")
+        self.replies = reply_r
+
+    def reusable(self) -> bool:
+        return (
+            self.alive
+            and self.jobs < JVM_WORKER_MAX_JOBS
+            and time.monotonic() - self.started_at < JVM_WORKER_MAX_AGE_SECONDS
+        )
+
+    def _send(self, header: str, payload: bytes = b""):
+        try:
+            self.requests.write(header.encode("utf-8") + b"\n")
+            self.requests.write(payload)
+            self.requests.flush()
+        except (BrokenPipeError, ValueError):
+            self.alive = False
+            raise WorkerLost("JVM worker is gone")
+
+    def _fill(self, deadline: float):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([self.replies], [], [], remaining)[0]:
+            raise TimeoutError
+        chunk = os.read(self.replies, READ_CHUNK_BYTES)
+        if not chunk:
+            self.alive = False
+            raise WorkerLost("JVM worker exited")
+        self._buf += chunk
+
+    def _read_line(self, deadline: float) -> str:
+        while b"\n" not in self._buf:
+            self._fill(deadline)
+        line, _, rest = self._buf.partition(b"\n")
+        self._buf = bytearray(rest)
+        return line.decode("utf-8")
+
+    def _read_exact(self, size: int, deadline: float) -> bytearray:
+        while len(self._buf) < size:
+            self._fill(deadline)
+        data = self._buf[:size]
+        del self._buf[:size]
+        return data
+
+    def _lost(self, reason: str) -> WorkerLost:
+        self.alive = False
+        return WorkerLost(f"JVM worker {reason}")
+
+    def compile(self, staging_dir: str) -> Optional[Tuple[int, bytes]]:
+        """In-process javac for ArtifactCache.get_or_compile(): (returncode, diagnostics) or None on timeout."""
+        deadline = time.monotonic() + COMPILE_TIME_LIMIT_SECONDS
+        try:
+            self._send(f"COMPILE {staging_dir}")
+            status, _, length = self._read_line(deadline).split()
+            diagnostics = self._read_exact(int(length), deadline)
+        except TimeoutError:
+            self.alive = False
+            return None
+        except (ValueError, UnicodeDecodeError):
+            raise self._lost("sent a malformed compile reply")
+        return (0 if status == "ok" else 1), bytes(diagnostics)
+
+    def run(self, class_dir: str, input_data: bytes, time_limit: float) -> dict:
+        """Run Solution from class_dir. Same result shape as process.run_process(), plus memory_exceeded."""
+        self.jobs += 1
+        deadline = time.monotonic() + time_limit + LAUNCHER_GRACE_SECONDS
+        try:
+            self._send(
+                f"RUN {class_dir} {int(time_limit * 1000)} {MEMORY_LIMIT_MB * 1024 * 1024} "
+                f"{OUTPUT_LIMIT_MB * 1024 * 1024} {STDERR_LIMIT_KB * 1024} {len(input_data)}",
+                input_data
+            )
+            fields = self._read_line(deadline).split()
+            if len(fields) != 8 or fields[0] not in RUN_STATUSES:
+                raise ValueError(fields[:1])
+            status = fields[0]
+            exit_code, cpu_ms, wall_ms, memory_kb, out_len, err_len, recycle = map(int, fields[1:])
+            stdout = self._read_exact(out_len, deadline)
+            stderr = bytes(self._read_exact(err_len, deadline))
+        except TimeoutError:
+            # The in-JVM watchdog never answered — stuck in native code or GC
+            self.alive = False
+            return {
+                "returncode": -signal.SIGKILL,
+                "timed_out": True,
+                "output_limit_exceeded": False,
+                "memory_exceeded": False,
+                "stdout": bytearray(),
+                "stderr": b"",
+                "cpu_ms": int(time_limit * 1000),
+                "wall_ms": int((time_limit + LAUNCHER_GRACE_SECONDS) * 1000),
+                "memory_kb": 0,
+            }
+        except (ValueError, UnicodeDecodeError):
+            # Out of step with the worker — nothing more it says can be trusted
+            raise self._lost("sent a malformed run reply")
+
+        if recycle:
+            # The worker halts itself after replying
+            self.alive = False
+
+        finished = status in ("ok", "error")
+        return {
+            "returncode": exit_code if finished else -signal.SIGKILL,
+            "timed_out": status == "timeout",
+            "output_limit_exceeded": status == "output_limit",
+            "memory_exceeded": status == "memory",
+            "stdout": stdout,
+            "stderr": stderr,
+            "cpu_ms": cpu_ms,
+            "wall_ms": wall_ms,
+            "memory_kb": memory_kb,
+        }
+
+    def discard(self):
+        self.alive = False
+        stop_launcher(self.proc, self.report_file)
+        self.requests.close()
+        os.close(self.replies)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        remove_run_cgroup(self.cgroup_path)
+
+
+class JvmPool:
+    """
+    Persistent JVM workers for Java submissions, so neither javac nor the JVM
+    boots per test case. Each run still gets a fresh class loader and the
+    worker's watchdogs; a worker that timed out, ran out of memory or left
+    threads behind is replaced. With no idle worker (or none built yet), Java
+    runs cold.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.classpath = None
+        self.cds_archive = None
+        self._idle: Deque[JvmWorker] = deque()
+        self._pending = 0
+        self._tasks = set()
+        self._stopped = False
+
+    def _track(self, task):
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def start(self):
+        if self.size:
+            self._track(asyncio.create_task(self._prepare()))
+
+    async def _prepare(self):
+        loop = asyncio.get_running_loop()
+        try:
+            self.classpath, self.cds_archive = await loop.run_in_executor(None, build_worker_classes)
+        except Exception as e:
+            print(f"[JvmPool] JVM workers unavailable, Java runs cold: {e}")
+            return
+        print(f"[JvmPool] keeping {self.size} JVM worker(s), CDS {'on' if self.cds_archive else 'off'}")
+        self._top_up()
+
+    def acquire(self, language: str, code: str) -> Optional[JvmWorker]:
+        """Take an idle JVM for this job, or None to run it cold."""
+        if language != JVM_LANGUAGE or self.classpath is None or not runs_in_worker(code):
+            return None
+
+        worker = None
+        while self._idle:
+            candidate = self._idle.popleft()
+            if candidate.reusable():
+                worker = candidate
+                break
+            self._discard(candidate)
+
+        self._top_up()
+        if worker:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return worker
+
+    def release(self, worker: JvmWorker):
+        if worker.reusable() and not self._stopped and len(self._idle) < self.size:
+            self._idle.append(worker)
+        else:
+            self._discard(worker)
+        self._top_up()
+
+    def _top_up(self):
+        if self._stopped:
+            return
+        # Busy workers are not counted; release() drops any beyond size
+        for _ in range(self.size - len(self._idle) - self._pending):
+            self._pending += 1
+            self._track(asyncio.create_task(self._spawn()))
+
+    async def _spawn(self):
+        loop = asyncio.get_running_loop()
+        try:
+            worker = await loop.run_in_executor(None, JvmWorker, self.classpath, self.cds_archive)
+        except Exception as e:
+            print(f"[JvmPool] could not start JVM worker: {e}")
+            return
+        finally:
+            self._pending -= 1
+
+        if self._stopped:
+            self._discard(worker)
+            return
+        self._idle.append(worker)
+
+    def _discard(self, worker: JvmWorker):
+        loop = asyncio.get_running_loop()
+        self._track(loop.run_in_executor(None, worker.discard))
+
+    async def stop(self):
+        self._stopped = True
+        while self._idle:
+            self._discard(self._idle.popleft())
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+# Global instance
+jvm_pool = JvmPool(JVM_POOL_SIZE)
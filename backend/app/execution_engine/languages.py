@@ -1,37 +1,242 @@
+import os
+import shutil
+import tempfile
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Engine settings come from the environment rather than core.config's Settings,
+# so the engine's CLIs (benchmark, calibrate) run without the API's database
+# and JWT configuration. Each is checked here, at import, so a bad value stops
+# the process at startup instead of failing jobs at judge time.
+def _env_choice(name: str, default: str, choices) -> str:
+    value = os.getenv(name, default)
+    if value not in choices:
+        raise ValueError(f"{name}={value!r} is not one of: {', '.join(choices)}")
+    return value
+
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    raw = os.getenv(name)
+    try:
+        value = default if raw is None else int(raw)
+    except ValueError:
+        raise ValueError(f"{name}={raw!r} is not an integer")
+    if value < minimum:
+        raise ValueError(f"{name}={value} must be at least {minimum}")
+    return value
+
+
+# Named compiler-flag sets for C/C++ — COMPILE_PROFILE picks the one in use.
+# Changing flags changes the artifact cache key, so old builds are not reused.
+COMPILE_PROFILES = {
+    "release": {
+        "cpp": ["-O2", "-std=c++17", "-pipe"],
+        "c": ["-O2", "-std=c11", "-pipe"],
+    },
+    "debug": {
+        "cpp": ["-O0", "-g", "-std=c++17", "-pipe"],
+        "c": ["-O0", "-g", "-std=c11", "-pipe"],
+    },
+}
+COMPILE_PROFILE = _env_choice("COMPILE_PROFILE", "release", COMPILE_PROFILES)
+COMPILE_FLAGS = COMPILE_PROFILES[COMPILE_PROFILE]
+
+# Headers worth precompiling per language (see pch.py) — built with COMPILE_FLAGS
+PRECOMPILED_HEADERS = {
+    "cpp": ["bits/stdc++.h"],
+}
+
+# run_cmd / compile_cmd are argv lists, exec'd directly without a shell.
+# limit_address_space: apply RLIMIT_AS — off for runtimes (V8, the JVM) that
+# reserve far more virtual memory than they use; cgroups still cap them
+# warm_cmd: pre-started interpreter that runs the workdir's source on demand (see warm_pool.py)
+# batch_cmd: runs every test case in one process (see batch_python.py); batch_source
+# is appended to the code first for languages where the harness is compiled in
 LANGUAGE_CONFIG = {
     "python3": {
         "image": "python:3.11-slim",
         "filename": "solution.py",
-        "run_cmd": "python3 solution.py",
+        "run_cmd": ["python3", "solution.py"],
         "compile_cmd": None,
+        "limit_address_space": True,
+        "warm_cmd": ["python3", os.path.join(ENGINE_DIR, "warm_python.py")],
+        "batch_cmd": ["python3", os.path.join(ENGINE_DIR, "batch_python.py")],
+        "batch_source": None,
     },
     "javascript": {
         "image": "node:18-slim",
         "filename": "solution.js",
-        "run_cmd": "node solution.js",
+        "run_cmd": ["node", "solution.js"],
         "compile_cmd": None,
+        "limit_address_space": False,
+        "warm_cmd": ["node", os.path.join(ENGINE_DIR, "warm_node.js")],
+        "batch_cmd": None,
+        "batch_source": None,
     },
     "java": {
         "image": "openjdk:17-slim",
         "filename": "Solution.java",
-        "run_cmd": "java Solution",
-        "compile_cmd": "javac Solution.java",
+        "run_cmd": ["java", "Solution"],
+        "compile_cmd": ["javac", "Solution.java"],
+        "limit_address_space": False,
+        "warm_cmd": None,
+        "batch_cmd": ["java", "CodeshieldBatch"],
+        "batch_source": os.path.join(ENGINE_DIR, "batch_java.java"),
     },
     "cpp": {
         "image": "gcc:12",
         "filename": "solution.cpp",
-        "run_cmd": "./solution",
-        "compile_cmd": "g++ -o solution solution.cpp",
+        "run_cmd": ["./solution"],
+        "compile_cmd": ["g++", *COMPILE_FLAGS["cpp"], "-o", "solution", "solution.cpp"],
+        "limit_address_space": True,
+        "warm_cmd": None,
+        "batch_cmd": None,
+        "batch_source": None,
     },
     "c": {
         "image": "gcc:12",
         "filename": "solution.c",
-        "run_cmd": "./solution",
-        "compile_cmd": "gcc -o solution solution.c",
+        "run_cmd": ["./solution"],
+        "compile_cmd": ["gcc", *COMPILE_FLAGS["c"], "-o", "solution", "solution.c"],
+        "limit_address_space": True,
+        "warm_cmd": None,
+        "batch_cmd": None,
+        "batch_source": None,
     },
 }
 
 SUPPORTED_LANGUAGES = list(LANGUAGE_CONFIG.keys())
 
+
+def installed_languages() -> list:
+    """Supported languages whose toolchain is on this host's PATH."""
+    # Compiled languages run their own binary — the compiler is what must exist
+    return [
+        language for language, config in LANGUAGE_CONFIG.items()
+        if shutil.which((config["compile_cmd"] or config["run_cmd"])[0])
+    ]
+
+
+# Limit for custom runs and for questions without a time_limit_ms of their own
 TIME_LIMIT_SECONDS = 5
-MEMORY_LIMIT_MB = 128
\ No newline at end of file
+# A question's time_limit_ms is its base limit, stated for C/C++; each language
+# gets base x multiplier, capped at MAX_TIME_LIMIT_SECONDS (see runner.time_limit_of)
+TIME_LIMIT_MULTIPLIERS = {
+    "python3": 3.0,
+    "javascript": 2.0,
+    "java": 2.0,
+    "cpp": 1.0,
+    "c": 1.0,
+}
+MAX_TIME_LIMIT_SECONDS = 10
+MIN_TIME_LIMIT_MS = 100
+# calibrate.py sets a base limit this many times the slowest reference run
+CALIBRATION_SAFETY_FACTOR = 2.0
+MEMORY_LIMIT_MB = 128
+PROCESS_LIMIT = 64
+NPROC_FALLBACK_LIMIT = 1024
+OUTPUT_FILE_LIMIT_MB = 16
+# Captured stdout beyond this aborts the run; stderr is truncated instead
+OUTPUT_LIMIT_MB = 16
+STDERR_LIMIT_KB = 64
+COMPILE_TIME_LIMIT_SECONDS = 10
+
+# Custom checker programs are trusted more than submissions, but still sandboxed
+CHECKER_TIME_LIMIT_SECONDS = 10
+CHECKER_MEMORY_LIMIT_MB = 256
+
+# Sandbox runs allowed at once in this process — defaults to one per core
+MAX_CONCURRENT_RUNS = _env_int("MAX_CONCURRENT_RUNS", os.cpu_count() or 1, minimum=1)
+# Cap on how many of those slots a single submission's test cases may hold
+MAX_PARALLEL_CASES_PER_SUBMISSION = max(1, MAX_CONCURRENT_RUNS // 2)
+
+# Priority lanes for those slots, highest first (see scheduler.py)
+EXECUTION_LANES = ("submit", "samples", "run", "rejudge", "speculative")
+# Requests a lane admits at once before answering 429 — None is unbounded.
+# Submissions and rejudges are already queued in the database, so never refused
+LANE_QUEUE_LIMITS = {
+    "submit": None,
+    "samples": _env_int("SAMPLES_QUEUE_LIMIT", 200, minimum=1),
+    "run": _env_int("RUN_QUEUE_LIMIT", 200, minimum=1),
+    "rejudge": None,
+    "speculative": 100,
+}
+# Requests one user may have in a lane at once
+LANE_USER_LIMITS = {
+    "submit": None,
+    "samples": 2,
+    "run": 2,
+    "rejudge": None,
+    "speculative": 1,
+}
+
+# Compile editor snapshots sent on idle ahead of Run/Submit (see runner.precompile)
+SPECULATIVE_COMPILE_ENABLED = _env_choice("SPECULATIVE_COMPILE", "1", ("0", "1")) == "1"
+SPECULATIVE_MAX_CODE_KB = 64
+
+# Pre-started interpreters kept per warm-capable language — 0 disables the pool
+WARM_POOL_SIZE = _env_int("WARM_POOL_SIZE", 0)
+# Idle warm workers older than this are replaced rather than used
+WARM_WORKER_MAX_IDLE_SECONDS = 300
+
+# Persistent JVMs for Java runs (see jvm_pool.py) — 0 disables them
+JVM_POOL_SIZE = _env_int("JVM_POOL_SIZE", 0)
+# Heap must fit a submission at MEMORY_LIMIT_MB plus the in-process compiler
+JVM_WORKER_HEAP_MB = 384
+JVM_WORKER_MEMORY_MB = 768
+JVM_WORKER_MAX_JOBS = 500
+JVM_WORKER_MAX_AGE_SECONDS = 3600
+# Build a class-data-sharing archive so replacement workers boot faster
+JVM_CDS_ENABLED = _env_choice("JVM_CDS", "1", ("0", "1")) == "1"
+
+# Pre-started, network-less containers per language from each "image" (see
+# container_pool.py) — 0 keeps every run on the host
+CONTAINER_POOL_SIZE = _env_int("CONTAINER_POOL_SIZE", 0)
+CONTAINER_WORKDIR_MB = 64
+# Memory the container is raised to while it compiles a submission
+CONTAINER_COMPILE_MEMORY_MB = 1024
+CONTAINER_MAX_JOBS = 200
+# Submissions run as nobody inside the container
+CONTAINER_USER = "65534:65534"
+
+# Leased per run and wiped between jobs (see workdir_pool.py) — RAM-backed where possible
+SCRATCH_ROOT = os.getenv(
+    "SCRATCH_ROOT",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "codeshield-scratch")
+)
+SCRATCH_POOL_SIZE = _env_int("SCRATCH_POOL_SIZE", MAX_CONCURRENT_RUNS * 2)
+
+# Questions whose test cases and parsed driver are kept in memory (see test_set_cache.py)
+TEST_SET_CACHE_MAX_QUESTIONS = _env_int("TEST_SET_CACHE_MAX_QUESTIONS", 256)
+
+# Judged submissions remembered per process (see verdict_cache.py) — 0 disables
+VERDICT_CACHE_MAX_ENTRIES = _env_int("VERDICT_CACHE_MAX_ENTRIES", 2048)
+
+# Test inputs/answers larger than this are kept as files (see test_data.py), not in the DB
+TEST_DATA_INLINE_MAX_KB = 64
+TEST_DATA_DIR = os.getenv(
+    "TEST_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(ENGINE_DIR)), "test_data")
+)
+
+# How submissions are judged: "full" runs every test case, "fail_fast" stops at
+# the first failure (see runner.run_submission)
+JUDGE_MODES = ("full", "fail_fast")
+JUDGE_MODE = _env_choice("JUDGE_MODE", "full", JUDGE_MODES)
+
+# Compiled artifacts are shared by every worker process on the host
+COMPILE_CACHE_DIR = os.getenv(
+    "COMPILE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "codeshield-compile-cache")
+)
+COMPILE_CACHE_MAX_MB = _env_int("COMPILE_CACHE_MAX_MB", 512)
+
+# Delegated cgroup v2 parent for per-run memory/pids limits — rlimits only if unusable
+SANDBOX_CGROUP_ROOT = os.getenv("SANDBOX_CGROUP_ROOT", "/sys/fs/cgroup/codeshield")
+
+# Per-stage job timings (see tracing.py): histogram bucket bounds, and jobs
+# slower than TRACE_SLOW_JOB_MS are logged and kept in a top-N list
+TRACE_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+TRACE_SLOW_JOB_MS = _env_int("TRACE_SLOW_JOB_MS", 10000)
+TRACE_SLOW_JOBS = 20
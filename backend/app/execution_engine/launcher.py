@@ -0,0 +1,173 @@
+"""
+Sandbox launcher — exec'd by process.run_process as `python -I -S launcher.py <spec>`.
+
+Runs as a small, single-threaded process so it can safely confine and fork the
+submission (the server itself is multi-threaded and far too large to fork from:
+a child inherits its parent's RSS high-water mark, which would swamp
+ru_maxrss). The submission is exec'd directly from spec["argv"], in its own
+process group, with the launcher's stdin/stdout/stderr.
+
+The launcher enforces the wall-clock limit itself (SIGTERM ends the run
+early) and, as a child subreaper, kills and reaps every descendant before
+exiting — including ones that left the process group with setsid(). The submission's wait4() rusage is written
+as JSON to the spec's report_fd.
+
+Standard library only — it runs isolated from the app package.
+"""
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+
+PR_SET_CHILD_SUBREAPER = 36
+
+
+def become_subreaper():
+    """Orphaned descendants reparent to us instead of init, so none can outlive the run."""
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0)
+    except Exception:
+        pass
+
+
+def confine(spec: dict):
+    if spec.get("cgroup"):
+        # Writing 0 moves the calling process into the cgroup
+        with open(os.path.join(spec["cgroup"], "cgroup.procs"), "w") as f:
+            f.write("0")
+
+    cpu = spec["cpu_seconds"]
+    # SIGXCPU at the soft limit, SIGKILL one second later
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    if spec.get("memory_bytes"):
+        resource.setrlimit(resource.RLIMIT_AS, (spec["memory_bytes"], spec["memory_bytes"]))
+    if spec.get("nproc"):
+        resource.setrlimit(resource.RLIMIT_NPROC, (spec["nproc"], spec["nproc"]))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (spec["fsize"], spec["fsize"]))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def wait_with_deadline(pid: int, seconds: float):
+    """wait4() the child, or return None once the deadline passes."""
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        pidfd = None
+
+    if pidfd is not None:
+        try:
+            if not select.select([pidfd], [], [], seconds)[0]:
+                return None
+        finally:
+            os.close(pidfd)
+        return os.wait4(pid, 0)
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        reaped_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+        if reaped_pid:
+            return reaped_pid, status, rusage
+        time.sleep(0.005)
+    return None
+
+
+def child_pids(parent: int) -> list:
+    pids = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # comm may contain spaces — ppid is the second field after it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            pids.append(int(name))
+    return pids
+
+
+def kill_descendants():
+    """SIGKILL and reap every remaining descendant, until we have no children left."""
+    me = os.getpid()
+    while True:
+        try:
+            reaped_pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if reaped_pid:
+            continue
+
+        for pid in child_pids(me):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        try:
+            os.waitpid(-1, 0)
+        except ChildProcessError:
+            return
+
+
+def main():
+    spec = json.loads(sys.argv[1])
+    become_subreaper()
+
+    # Hold SIGTERM until the abort handler below knows the child's pid
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+    pid = os.fork()
+    if pid == 0:
+        try:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+            os.close(spec["report_fd"])
+            os.setpgid(0, 0)
+            confine(spec)
+            os.execvp(spec["argv"][0], spec["argv"])
+        except BaseException as e:
+            os.write(2, f"Sandbox setup failed: {e}\n".encode("utf-8"))
+        os._exit(127)
+
+    # Extra fds are for the submission only — the launcher holding them open
+    # would hide the submission closing its end
+    for fd in spec.get("pass_fds", []):
+        os.close(fd)
+
+    # SIGTERM from the server (e.g. output limit hit) aborts the run early
+    def abort(signum, frame):
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    signal.signal(signal.SIGTERM, abort)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+
+    waited = wait_with_deadline(pid, spec["wall_seconds"])
+    timed_out = waited is None
+    if timed_out:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        waited = os.wait4(pid, 0)
+
+    _, status, rusage = waited
+    kill_descendants()
+
+    report = {
+        "status": status,
+        "timed_out": timed_out,
+        "cpu_ms": int((rusage.ru_utime + rusage.ru_stime) * 1000),
+        # ru_maxrss is already in kilobytes on Linux
+        "memory_kb": rusage.ru_maxrss,
+    }
+    os.write(spec["report_fd"], json.dumps(report).encode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
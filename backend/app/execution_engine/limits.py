@@ -0,0 +1,117 @@
+import os
+import uuid
+from typing import Optional
+from app.execution_engine.languages import (
+    MEMORY_LIMIT_MB,
+    PROCESS_LIMIT,
+    NPROC_FALLBACK_LIMIT,
+    OUTPUT_FILE_LIMIT_MB,
+    SANDBOX_CGROUP_ROOT,
+)
+
+CGROUP_CONTROLLERS = ("memory", "pids")
+
+
+def _write(path: str, value: str):
+    with open(path, "w") as f:
+        f.write(value)
+
+
+def _init_cgroup_root() -> Optional[str]:
+    """
+    Prepare a cgroup v2 parent for sandbox runs, or return None to fall back to rlimits.
+    Needs a unified hierarchy and either root or a delegated SANDBOX_CGROUP_ROOT.
+    """
+    if not SANDBOX_CGROUP_ROOT:
+        return None
+
+    parent = os.path.dirname(SANDBOX_CGROUP_ROOT)
+    if not os.path.exists(os.path.join(parent, "cgroup.controllers")):
+        return None
+
+    try:
+        os.makedirs(SANDBOX_CGROUP_ROOT, exist_ok=True)
+        with open(os.path.join(SANDBOX_CGROUP_ROOT, "cgroup.subtree_control")) as f:
+            enabled = f.read().split()
+        missing = [c for c in CGROUP_CONTROLLERS if c not in enabled]
+        if missing:
+            _write(
+                os.path.join(parent, "cgroup.subtree_control"),
+                " ".join(f"+{c}" for c in missing)
+            )
+            _write(
+                os.path.join(SANDBOX_CGROUP_ROOT, "cgroup.subtree_control"),
+                " ".join(f"+{c}" for c in missing)
+            )
+    except OSError as e:
+        print(f"[Sandbox] cgroup v2 unavailable, using rlimits only: {e}")
+        return None
+
+    return SANDBOX_CGROUP_ROOT
+
+
+cgroup_root = _init_cgroup_root()
+
+
+def create_run_cgroup(memory_limit_mb: int = MEMORY_LIMIT_MB) -> Optional[str]:
+    """Create a throwaway cgroup for one run. Returns its path, or None without cgroups."""
+    if not cgroup_root:
+        return None
+
+    path = os.path.join(cgroup_root, f"run-{uuid.uuid4().hex}")
+    try:
+        os.mkdir(path)
+        _write(os.path.join(path, "memory.max"), str(memory_limit_mb * 1024 * 1024))
+        _write(os.path.join(path, "memory.swap.max"), "0")
+        _write(os.path.join(path, "pids.max"), str(PROCESS_LIMIT))
+    except OSError as e:
+        print(f"[Sandbox] could not create run cgroup: {e}")
+        remove_run_cgroup(path)
+        return None
+    return path
+
+
+def cgroup_oom_killed(path: Optional[str]) -> bool:
+    if not path:
+        return False
+    try:
+        with open(os.path.join(path, "memory.events")) as f:
+            for line in f:
+                key, value = line.split()
+                if key == "oom_kill":
+                    return int(value) > 0
+    except (OSError, ValueError):
+        pass
+    return False
+
+
+def remove_run_cgroup(path: Optional[str]):
+    if not path:
+        return
+    try:
+        # Anything still inside (a stray grandchild) must go before rmdir succeeds
+        _write(os.path.join(path, "cgroup.kill"), "1")
+    except OSError:
+        pass
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def build_limits(
+    time_limit: float,
+    memory_limit_mb: int = MEMORY_LIMIT_MB,
+    limit_address_space: bool = True,
+    cgroup_path: Optional[str] = None
+) -> dict:
+    """Limits the launcher applies to the submission before exec — see launcher.py."""
+    return {
+        "cpu_seconds": int(time_limit) + 1,
+        "memory_bytes": memory_limit_mb * 1024 * 1024 if limit_address_space else None,
+        # RLIMIT_NPROC counts every process of the uid, server included,
+        # so without pids.max it can only be a coarse fork-bomb guard
+        "nproc": None if cgroup_path else NPROC_FALLBACK_LIMIT,
+        "fsize": OUTPUT_FILE_LIMIT_MB * 1024 * 1024,
+        "cgroup": cgroup_path,
+    }
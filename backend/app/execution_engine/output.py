@@ -0,0 +1,46 @@
+import mmap
+from typing import Tuple, Union
+
+BytesLike = Union[bytes, bytearray, mmap.mmap]
+# Test case data: text from the database, or a mapped test data file
+InputData = Union[str, BytesLike]
+
+# Same set bytes.strip() removes
+WHITESPACE = frozenset(b" \t\n\r\x0b\x0c")
+
+
+def as_bytes(data: InputData) -> BytesLike:
+    """Test data ready to feed to a process — text is encoded, buffers pass through."""
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def trim_bounds(buf: BytesLike) -> Tuple[int, int]:
+    """Start/end of buf without leading and trailing whitespace — no copy made."""
+    start, end = 0, len(buf)
+    while end > start and buf[end - 1] in WHITESPACE:
+        end -= 1
+    while start < end and buf[start] in WHITESPACE:
+        start += 1
+    return start, end
+
+
+def decode_trimmed(buf: BytesLike) -> str:
+    """Equivalent of buf.decode().strip(), decoding straight from the buffer."""
+    start, end = trim_bounds(buf)
+    return str(memoryview(buf)[start:end], "utf-8", "replace")
+
+
+def outputs_match(actual: BytesLike, expected: Union[str, BytesLike]) -> bool:
+    """
+    Compare program output to the expected answer, ignoring surrounding whitespace.
+    Works on the captured buffer in place instead of decoding and stripping copies.
+    """
+    if isinstance(expected, str):
+        expected = expected.encode("utf-8")
+
+    a_start, a_end = trim_bounds(actual)
+    e_start, e_end = trim_bounds(expected)
+    if a_end - a_start != e_end - e_start:
+        return False
+    # startswith() on a memoryview slice is a single memcmp
+    return actual.startswith(memoryview(expected)[e_start:e_end], a_start, a_end)
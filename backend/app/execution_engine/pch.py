@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    COMPILE_FLAGS,
+    COMPILE_CACHE_DIR,
+    PRECOMPILED_HEADERS,
+)
+
+# Building bits/stdc++.h takes several seconds — far past a normal compile
+PCH_BUILD_TIMEOUT_SECONDS = 120
+
+HEADER_LANGUAGE = {"cpp": "c++-header", "c": "c-header"}
+
+
+def _compiler_identity(compiler: str) -> str:
+    """Version and target of the installed compiler — a PCH only loads in the compiler that built it."""
+    result = subprocess.run(
+        [compiler, "-dumpfullversion", "-dumpmachine"],
+        capture_output=True,
+        check=True,
+        timeout=10
+    )
+    return result.stdout.decode("utf-8").strip()
+
+
+class PrecompiledHeaders:
+    """
+    Precompiled headers per language, compiler version and COMPILE_FLAGS,
+    kept under the compile cache root and shared by every worker process.
+
+    Each header is compiled from a stub that includes it, into
+    <dir>/<header>.gch; compiling with -I <dir> makes GCC pick the .gch up
+    for `#include <header>`, and silently use the real header whenever it
+    cannot (different flags, corrupt file). Builds run in the background —
+    compiles before one finishes simply go without.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._dirs: Dict[str, Optional[str]] = {}
+        self._builds: Dict[str, asyncio.Future] = {}
+
+    def start(self):
+        """Begin building every language's headers now rather than on its first compile."""
+        for language in PRECOMPILED_HEADERS:
+            self.include_dir(language)
+
+    def compile_cmd(self, language: str) -> List[str]:
+        """compile_cmd for this language, pointed at its PCH dir once that is built."""
+        cmd = LANGUAGE_CONFIG[language]["compile_cmd"]
+        pch_dir = self.include_dir(language)
+        if not pch_dir:
+            return cmd
+        return [cmd[0], "-I", pch_dir] + cmd[1:]
+
+    def include_dir(self, language: str) -> Optional[str]:
+        if language in self._dirs:
+            return self._dirs[language]
+        if language in PRECOMPILED_HEADERS and language not in self._builds:
+            loop = asyncio.get_running_loop()
+            build = loop.run_in_executor(None, self._build, language)
+            build.add_done_callback(lambda future: self._finish(language, future))
+            self._builds[language] = build
+        return None
+
+    def _finish(self, language: str, future: asyncio.Future):
+        try:
+            self._dirs[language] = future.result()
+        except Exception as e:
+            print(f"[PCH] {language} precompiled headers unavailable: {e}")
+            self._dirs[language] = None
+
+    def _build(self, language: str) -> str:
+        """Blocking — returns the PCH dir, building it unless another process already has."""
+        compiler = LANGUAGE_CONFIG[language]["compile_cmd"][0]
+        flags = COMPILE_FLAGS[language]
+        headers = PRECOMPILED_HEADERS[language]
+
+        digest = hashlib.sha256()
+        for part in [_compiler_identity(compiler), language] + flags + headers:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        pch_dir = os.path.join(self.root, f"pch-{digest.hexdigest()[:16]}")
+        if os.path.isdir(pch_dir):
+            return pch_dir
+
+        os.makedirs(self.root, exist_ok=True)
+        # Dot prefix: a crashed build is swept with other stale staging dirs
+        staging_dir = tempfile.mkdtemp(prefix=".pch-", dir=self.root)
+        try:
+            for header in headers:
+                stub = os.path.join(staging_dir, "stub.h")
+                with open(stub, "w") as f:
+                    f.write(f"#include <{header}>\n")
+                target = os.path.join(staging_dir, f"{header}.gch")
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                subprocess.run(
+                    [compiler, *flags, "-x", HEADER_LANGUAGE[language], stub, "-o", target],
+                    capture_output=True,
+                    check=True,
+                    timeout=PCH_BUILD_TIMEOUT_SECONDS
+                )
+                os.remove(stub)
+            os.rename(staging_dir, pch_dir)
+        except OSError:
+            # Another process published the same dir first
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            if not os.path.isdir(pch_dir):
+                raise
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        print(f"[PCH] built {', '.join(headers)} for {language} in {pch_dir}")
+        return pch_dir
+
+
+# Global instance
+precompiled_headers = PrecompiledHeaders(COMPILE_CACHE_DIR)
@@ -0,0 +1,273 @@
+import json
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from typing import BinaryIO, List, Optional, Tuple
+from app.execution_engine.languages import OUTPUT_LIMIT_MB, STDERR_LIMIT_KB
+
+READ_CHUNK_BYTES = 64 * 1024
+WRITE_CHUNK_BYTES = 64 * 1024
+# The launcher enforces the wall limit itself; this is only a backstop if it hangs
+LAUNCHER_GRACE_SECONDS = 2
+LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "launcher.py")
+
+
+def _open_pidfd(pid: int) -> Optional[int]:
+    """pidfd becomes readable when the process exits (Linux 5.3+)."""
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return None
+
+
+def _wait_for_exit(pid: int, pidfd: Optional[int], deadline: float) -> Optional[int]:
+    """Reap the process if it exits before the deadline. Returns its wait status or None."""
+    if pidfd is not None:
+        with selectors.DefaultSelector() as sel:
+            sel.register(pidfd, selectors.EVENT_READ)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not sel.select(timeout=remaining):
+                return None
+        _, status = os.waitpid(pid, 0)
+        return status
+
+    while time.monotonic() < deadline:
+        reaped_pid, status = os.waitpid(pid, os.WNOHANG)
+        if reaped_pid:
+            return status
+        time.sleep(0.005)
+    return None
+
+
+def start_launcher(
+    argv: List[str],
+    cwd: str,
+    limits: dict,
+    wall_seconds: float,
+    pass_fds: Tuple[int, ...] = (),
+    stderr: int = subprocess.PIPE,
+    stdin: int = subprocess.PIPE,
+    stdout: int = subprocess.PIPE
+) -> Tuple[subprocess.Popen, BinaryIO]:
+    """
+    Start launcher.py for argv. Returns the launcher process and the read
+    end of its report pipe, ready for collect_run() (which needs the default
+    pipes). Extra pass_fds are inherited by the submission as well.
+    """
+    spec = dict(limits, argv=argv, wall_seconds=wall_seconds, pass_fds=list(pass_fds))
+
+    report_r, report_w = os.pipe()
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, "-I", "-S", LAUNCHER, json.dumps(dict(spec, report_fd=report_w))],
+            cwd=cwd,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=stderr,
+            pass_fds=(report_w,) + tuple(pass_fds),
+            # Own session, so the backstop can kill the launcher and everything under it
+            start_new_session=True
+        )
+    finally:
+        os.close(report_w)
+    return proc, os.fdopen(report_r, "rb")
+
+
+def run_process(
+    argv: List[str],
+    cwd: str,
+    input_data: bytes,
+    time_limit: float,
+    limits: dict,
+    stdout_limit: int = OUTPUT_LIMIT_MB * 1024 * 1024,
+    stderr_limit: int = STDERR_LIMIT_KB * 1024
+) -> dict:
+    """
+    Blocking run of a single sandboxed program — call from an executor thread.
+
+    The program is exec'd (no shell) through launcher.py, which applies
+    `limits` (see limits.build_limits), enforces the time limit, kills the
+    whole process tree and reports the submission's own wait4() rusage:
+    cpu_ms is user+sys CPU time and memory_kb is peak RSS, neither of which
+    is inflated by load from other candidates the way wall-clock is.
+    input_data is fed to stdin straight from memory.
+
+    stdout is streamed into a single buffer capped at stdout_limit; going
+    over aborts the run right away with output_limit_exceeded rather than
+    letting a print loop grow the buffer until the time limit. stderr keeps
+    only its first stderr_limit bytes.
+    """
+    proc, report_file = start_launcher(argv, cwd, limits, time_limit)
+    return collect_run(
+        proc,
+        report_file,
+        input_data,
+        time_limit,
+        stdout_limit=stdout_limit,
+        stderr_limit=stderr_limit
+    )
+
+
+def _abort(proc: subprocess.Popen):
+    """Ask the launcher to kill the submission's process group right away."""
+    try:
+        os.kill(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def stop_launcher(proc: subprocess.Popen, report_file: BinaryIO):
+    """
+    Kill a launcher that is not being collected, with everything under it, and reap it.
+    The submission has its own process group, so the launcher is asked to kill it first.
+    """
+    _abort(proc)
+    try:
+        proc.wait(timeout=LAUNCHER_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
+    for stream in (proc.stdin, proc.stdout, proc.stderr, report_file):
+        if stream is not None:
+            stream.close()
+
+
+def collect_run(
+    proc: subprocess.Popen,
+    report_file: BinaryIO,
+    input_data: bytes,
+    time_limit: float,
+    enforce_wall_limit: bool = False,
+    cpu_offset_ms: int = 0,
+    stdout_limit: int = OUTPUT_LIMIT_MB * 1024 * 1024,
+    stderr_limit: int = STDERR_LIMIT_KB * 1024
+) -> dict:
+    """
+    Feed stdin to a started launcher and gather its output and report (see run_process).
+
+    enforce_wall_limit: time the run from now and abort it here — for launchers
+    started ahead of the job, whose own deadline began long before it.
+    cpu_offset_ms: CPU the program spent before the job began, left out of cpu_ms.
+    """
+    start = time.monotonic()
+    deadline = start + time_limit + LAUNCHER_GRACE_SECONDS
+    abort_at = start + time_limit if enforce_wall_limit else None
+    wall_exceeded = False
+
+    pidfd = _open_pidfd(proc.pid)
+    stdout_buf = bytearray()
+    stderr_buf = bytearray()
+    report_buf = bytearray()
+    output_limit_exceeded = False
+    input_view = memoryview(input_data)
+    input_offset = 0
+
+    try:
+        with selectors.DefaultSelector() as sel:
+            sel.register(proc.stdout, selectors.EVENT_READ, (stdout_buf, stdout_limit))
+            sel.register(proc.stderr, selectors.EVENT_READ, (stderr_buf, stderr_limit))
+            sel.register(report_file, selectors.EVENT_READ, (report_buf, None))
+            if input_view:
+                os.set_blocking(proc.stdin.fileno(), False)
+                sel.register(proc.stdin, selectors.EVENT_WRITE)
+            else:
+                proc.stdin.close()
+
+            while sel.get_map():
+                now = time.monotonic()
+                if abort_at is not None and now >= abort_at:
+                    wall_exceeded = True
+                    abort_at = None
+                    _abort(proc)
+                remaining = deadline - now
+                if remaining <= 0:
+                    break
+                if abort_at is not None:
+                    remaining = min(remaining, abort_at - now)
+                for key, _ in sel.select(timeout=remaining):
+                    if key.fileobj is proc.stdin:
+                        try:
+                            input_offset += os.write(
+                                key.fd,
+                                input_view[input_offset:input_offset + WRITE_CHUNK_BYTES]
+                            )
+                        except BlockingIOError:
+                            continue
+                        except BrokenPipeError:
+                            # Program exited without reading all of its input
+                            input_offset = len(input_view)
+                        if input_offset >= len(input_view):
+                            sel.unregister(proc.stdin)
+                            proc.stdin.close()
+                        continue
+
+                    chunk = os.read(key.fd, READ_CHUNK_BYTES)
+                    if not chunk:
+                        sel.unregister(key.fileobj)
+                        continue
+
+                    buf, cap = key.data
+                    if cap is not None and len(buf) + len(chunk) > cap:
+                        if key.fileobj is proc.stdout:
+                            # Stop reading and have the launcher kill the tree
+                            output_limit_exceeded = True
+                            sel.unregister(proc.stdout)
+                            proc.stdout.close()
+                            _abort(proc)
+                            continue
+                        # stderr: keep the head, keep draining so the writer never blocks
+                        chunk = chunk[:max(cap - len(buf), 0)]
+                    buf += chunk
+
+        status = _wait_for_exit(proc.pid, pidfd, deadline)
+        timed_out = status is None
+
+        if timed_out:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, status = os.waitpid(proc.pid, 0)
+
+        # Already reaped above — stop Popen from waiting on the pid again
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+        proc.stdin.close()
+        proc.stdout.close()
+        proc.stderr.close()
+        report_file.close()
+
+    try:
+        report = json.loads(report_buf)
+        returncode = os.waitstatus_to_exitcode(report["status"])
+    except ValueError:
+        # Launcher was killed or failed before the submission finished
+        report = {"cpu_ms": 0, "memory_kb": 0, "timed_out": timed_out}
+        returncode = proc.returncode if proc.returncode != 0 else -signal.SIGKILL
+
+    timed_out = timed_out or wall_exceeded or report["timed_out"]
+    cpu_ms = max(0, report["cpu_ms"] - cpu_offset_ms)
+
+    # Killed by RLIMIT_CPU — a CPU-bound TLE that beat the wall-clock deadline
+    if returncode in (-signal.SIGXCPU, -signal.SIGKILL) and \
+            cpu_ms >= time_limit * 1000:
+        timed_out = True
+
+    return {
+        "returncode": returncode,
+        "timed_out": timed_out,
+        "output_limit_exceeded": output_limit_exceeded,
+        "stdout": stdout_buf,
+        "stderr": bytes(stderr_buf),
+        "cpu_ms": cpu_ms,
+        "wall_ms": int((time.monotonic() - start) * 1000),
+        "memory_kb": report["memory_kb"],
+    }
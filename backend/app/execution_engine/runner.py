@@ -1,12 +1,52 @@
-import json
+import asyncio
+from typing import List, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import update
 from app.models.question import Question, TestCase
 from app.models.submission import Submission
-from app.execution_engine.sandbox import run_code_in_sandbox
+from app.execution_engine.sandbox import (
+    run_code_in_sandbox,
+    run_batch_in_sandbox,
+    with_batch_harness,
+)
+from app.execution_engine.compiler import artifact_cache
+from app.execution_engine.container_pool import container_pool
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    MAX_PARALLEL_CASES_PER_SUBMISSION,
+    JUDGE_MODE,
+    JUDGE_MODES,
+    TIME_LIMIT_SECONDS,
+    TIME_LIMIT_MULTIPLIERS,
+    MAX_TIME_LIMIT_SECONDS,
+)
+from app.execution_engine.checker import CheckerError, check_output
+from app.execution_engine.test_data import preview
+from app.execution_engine.scheduler import execution_scheduler
+from app.execution_engine.tracing import stage
+from app.execution_engine.verdict_cache import verdict_cache, verdict_key
+from app.execution_engine.test_set_cache import (
+    test_set_cache,
+    parse_driver_code,
+    CachedTestCase,
+    TestSet,
+)
 
 
-def resolve_driver_code(question: Question, language: str, user_code: str) -> str:
+def _driver_of(question: Union[Question, TestSet, None]) -> Union[dict, str, None]:
+    if question is None:
+        return None
+    if isinstance(question, TestSet):
+        # Parsed once per test set version
+        return question.driver
+    return parse_driver_code(getattr(question, "driver_code", None))
+
+
+def resolve_driver_code(
+    question: Union[Question, TestSet, None],
+    language: str,
+    user_code: str
+) -> str:
     """
     Resolve the full executable code to run, given the question config and user code.
 
@@ -17,57 +57,203 @@ def resolve_driver_code(question: Question, language: str, user_code: str) -> st
 
     Never raises — always returns runnable code.
     """
-    if not question or not getattr(question, "driver_code", None):
+    driver = _driver_of(question)
+    if driver is None:
         # Pure CP-style: user writes the full program
         return user_code
 
-    raw_driver = question.driver_code.strip()
-    if not raw_driver:
-        return user_code
-
-    # Try JSON dict format first: {"python3": "...", "cpp": "..."}
-    try:
-        driver_map = json.loads(raw_driver)
-        if isinstance(driver_map, dict):
-            lang_driver = driver_map.get(language, "")
-            if not lang_driver:
-                # No driver for this language — run as CP-style
-                return user_code
-            if "{USER_CODE}" in lang_driver:
-                return lang_driver.replace("{USER_CODE}", user_code)
-            else:
-                return f"{user_code}\n\n{lang_driver}"
-    except (json.JSONDecodeError, ValueError):
-        pass
+    if isinstance(driver, dict):
+        lang_driver = driver.get(language, "")
+        if not lang_driver:
+            # No driver for this language — run as CP-style
+            return user_code
+        if "{USER_CODE}" in lang_driver:
+            return lang_driver.replace("{USER_CODE}", user_code)
+        else:
+            return f"{user_code}\n\n{lang_driver}"
 
     # Legacy plain-text driver (not JSON): append after user code
-    if "{USER_CODE}" in raw_driver:
-        return raw_driver.replace("{USER_CODE}", user_code)
-    return f"{user_code}\n\n{raw_driver}"
+    if "{USER_CODE}" in driver:
+        return driver.replace("{USER_CODE}", user_code)
+    return f"{user_code}\n\n{driver}"
+
+
+def uses_driver(question: Union[Question, TestSet, None], language: str) -> bool:
+    """True when resolve_driver_code() wraps this language's code in a driver."""
+    driver = _driver_of(question)
+    if isinstance(driver, dict):
+        return bool(driver.get(language))
+    # Legacy plain-text driver applies to every language
+    return driver is not None
+
+
+def time_limit_of(question: Union[Question, TestSet, None], language: str) -> float:
+    """
+    Seconds each test case of question may run in language: its base
+    time_limit_ms times the language's multiplier, capped — or the flat
+    TIME_LIMIT_SECONDS for questions without a base limit.
+    """
+    base_ms = getattr(question, "time_limit_ms", None)
+    if not base_ms:
+        return TIME_LIMIT_SECONDS
+    return min(base_ms / 1000 * TIME_LIMIT_MULTIPLIERS.get(language, 1.0), MAX_TIME_LIMIT_SECONDS)
+
+
+def uses_batch(question: Union[Question, TestSet, None], language: str, case_count: int) -> bool:
+    """
+    True when run_test_cases() runs these cases through the language's batch harness.
+    Never while the language runs in pooled containers — batches run on the host.
+    """
+    config = LANGUAGE_CONFIG.get(language)
+    return (
+        case_count > 1
+        and bool(config and config["batch_cmd"])
+        and uses_driver(question, language)
+        and not container_pool.serves(language)
+    )
+
+
+def batch_safe_count(test_cases: List[Union[TestCase, CachedTestCase]]) -> int:
+    """
+    How many leading test_cases may share a batch process. A batched case can
+    read the inputs of the cases before it, so the batch stops at the first
+    visible case that follows a hidden one — its output is shown to the candidate.
+    """
+    seen_hidden = False
+    for index, tc in enumerate(test_cases):
+        if tc.is_hidden:
+            seen_hidden = True
+        elif seen_hidden:
+            return index
+    return len(test_cases)
+
+
+async def precompile(code: str, language: str, test_set: Optional[TestSet]):
+    """
+    Compile, into the artifact cache, every program that running or
+    submitting this code would compile, so those find the build ready.
+    Takes sandbox slots in the surrounding request()'s lane.
+    """
+    config = LANGUAGE_CONFIG.get(language)
+    if not config or not config["compile_cmd"]:
+        return
+
+    full_code = resolve_driver_code(test_set, language, code)
+    programs = [full_code]
+    if test_set and any(
+        uses_batch(test_set, language, batch_safe_count(cases))
+        for cases in (test_set.sample_cases, test_set.submit_cases)
+    ):
+        programs.append(with_batch_harness(full_code, language))
+
+    for program in programs:
+        async with execution_scheduler.slot():
+            await artifact_cache.get_or_compile(program, language)
+
+
+async def run_test_cases(
+    code: str,
+    language: str,
+    test_cases: List[Union[TestCase, CachedTestCase]],
+    question: Union[Question, TestSet, None] = None,
+    fail_fast: bool = False
+) -> List[Optional[dict]]:
+    """
+    Run code against every test case concurrently and judge each output
+    with the question's checker (exact match without a question).
+    Executions are returned in the same order as test_cases; successful
+    ones carry "passed". A case the custom checker could not judge comes
+    back unsuccessful with "checker_error" set.
+
+    Driver-based questions run their cases in one batch process where the
+    language has a harness — all of them, or up to batch_safe_count(); cases
+    the batch did not cover or could not judge run alone.
+
+    With fail_fast, cases start in the order given and none start after
+    one has failed; those come back as None. Cases already running finish,
+    and cases the batch already ran are still checked.
+    """
+    fan_out = asyncio.Semaphore(MAX_PARALLEL_CASES_PER_SUBMISSION)
+    executions = [None] * len(test_cases)
+    failed = asyncio.Event()
+    time_limit = time_limit_of(question, language)
+
+    batched = test_cases[:batch_safe_count(test_cases)]
+    if uses_batch(question, language, len(batched)):
+        executions[:len(batched)] = await run_batch_in_sandbox(
+            code,
+            language,
+            [tc.input for tc in batched],
+            time_limit=time_limit,
+            decode_output=[not tc.is_hidden for tc in batched]
+        )
+
+    async def run_one(tc: Union[TestCase, CachedTestCase], execution: Optional[dict]) -> Optional[dict]:
+        async with fan_out:
+            if execution is None:
+                # Only new runs are skipped — an existing result costs just the check
+                if fail_fast and failed.is_set():
+                    return None
+                execution = await run_code_in_sandbox(
+                    code=code,
+                    language=language,
+                    input_data=tc.input,
+                    time_limit=time_limit,
+                    decode_output=not tc.is_hidden
+                )
+            if execution["success"]:
+                try:
+                    with stage("checker"):
+                        execution["passed"] = await check_output(
+                            getattr(question, "checker", None),
+                            getattr(question, "checker_config", None),
+                            tc.input,
+                            execution["stdout"],
+                            tc.expected_output
+                        )
+                except CheckerError as e:
+                    print(f"[Checker error] question {getattr(question, 'id', None)}: {e}")
+                    execution = {
+                        **execution,
+                        "success": False,
+                        "checker_error": True,
+                        "error": "Internal error — the checker could not judge this output"
+                    }
+            if not (execution["success"] and execution["passed"]):
+                failed.set()
+            return execution
+
+    return await asyncio.gather(
+        *(run_one(tc, execution) for tc, execution in zip(test_cases, executions))
+    )
 
 
 async def run_submission(
     submission: Submission,
-    db: AsyncSession
+    db: AsyncSession,
+    mode: str = JUDGE_MODE,
+    lane: str = "submit",
+    rejudge: bool = False
 ) -> dict:
     """
     CP-style runner: user code is executed as a full program.
     Test case input is piped via stdin — matches Codeforces / competitive programming model.
     Supports optional per-language driver code for LeetCode-style function wrapping.
-    """
 
-    # Get test cases and question
-    tc_result = await db.execute(
-        select(TestCase)
-        .where(TestCase.question_id == submission.question_id)
-        .order_by(TestCase.is_hidden)
-    )
-    test_cases = tc_result.scalars().all()
+    mode "full" runs every case; "fail_fast" runs the historically most
+    failed cases first and stops at the first failure, reporting the rest
+    as not run. Sandbox runs are scheduled in the given execution lane.
 
-    q_result = await db.execute(
-        select(Question).where(Question.id == submission.question_id)
-    )
-    question = q_result.scalar_one_or_none()
+    rejudge always runs the code, never answering from the verdict cache,
+    and leaves failure counts alone so rejudges do not skew fail-fast order.
+    """
+    if mode not in JUDGE_MODES:
+        raise ValueError(f"Unknown judge mode: {mode}")
+    fail_fast = mode == "fail_fast"
+
+    # Test cases and question — from memory unless the test set changed
+    test_set = await test_set_cache.get(submission.question_id, db)
+    test_cases = test_set.submit_cases if test_set else []
 
     if not test_cases:
         return {
@@ -75,38 +261,88 @@ async def run_submission(
             "test_cases_passed": 0,
             "test_cases_total": 0,
             "runtime_ms": 0,
+            "memory_kb": 0,
             "results": []
         }
 
+    # Resolve the full code once (driver is per-question, not per-test-case)
+    full_code = resolve_driver_code(test_set, submission.language, submission.code)
+
+    # Identical code against an unchanged test set, under the same limit, gets the stored verdict
+    time_limit = time_limit_of(test_set, submission.language)
+    cache_key = verdict_key(
+        full_code,
+        submission.language,
+        f"{test_set.cache_key}:{mode}:{time_limit}"
+    )
+    cached = None if rejudge else verdict_cache.get(cache_key)
+    if cached:
+        return cached
+
     passed = 0
     total = len(test_cases)
     results = []
     max_runtime = 0
+    max_memory_kb = 0
     failure_status = "wrong_answer"
+    # The question's checker broke — the verdict says nothing about the code
+    checker_failed = False
+    # Verdicts that may come out differently on a less loaded host are not cached
+    cacheable = True
 
-    # Resolve the full code once (driver is per-question, not per-test-case)
-    full_code = resolve_driver_code(question, submission.language, submission.code)
-
-    for tc in test_cases:
-        execution = await run_code_in_sandbox(
-            code=full_code,
-            language=submission.language,
-            input_data=tc.input
+    # Cases are scheduled most-failed first but reported in the usual order
+    run_order = test_set.by_failures() if fail_fast else test_cases
+    async with execution_scheduler.request(lane, str(submission.user_id), test_set.test_id):
+        run_executions = await run_test_cases(
+            full_code,
+            submission.language,
+            run_order,
+            test_set,
+            fail_fast
         )
+    executions_by_id = dict(zip((tc.id for tc in run_order), run_executions))
+    executions = [executions_by_id[tc.id] for tc in test_cases]
+    if not rejudge:
+        await record_failures(test_set, test_cases, executions, db)
+
+    for tc, execution in zip(test_cases, executions):
+        if execution is None:
+            results.append({
+                "input": preview(tc.input) if not tc.is_hidden else "hidden",
+                "expected": preview(tc.expected_output) if not tc.is_hidden else "hidden",
+                "got": "",
+                "passed": False,
+                "error": "Not run — judging stopped at the first failed test",
+                "is_hidden": tc.is_hidden
+            })
+            continue
 
         if not execution["success"]:
             err = execution["error"]
-            if "Time Limit" in err:
+            if err == "Compilation timed out":
+                cacheable = False
+            if execution.get("checker_error"):
+                checker_failed = True
+                cacheable = False
+            elif "Time Limit" in err:
                 tc_status = "time_limit_exceeded"
                 failure_status = "time_limit_exceeded"
+            elif "Memory Limit" in err:
+                tc_status = "memory_limit_exceeded"
+                if failure_status != "time_limit_exceeded":
+                    failure_status = "memory_limit_exceeded"
+            elif "Output Limit" in err:
+                tc_status = "output_limit_exceeded"
+                if failure_status not in ("time_limit_exceeded", "memory_limit_exceeded"):
+                    failure_status = "output_limit_exceeded"
             else:
                 tc_status = "runtime_error"
-                if failure_status != "time_limit_exceeded":
+                if failure_status == "wrong_answer":
                     failure_status = "runtime_error"
 
             results.append({
-                "input": tc.input if not tc.is_hidden else "hidden",
-                "expected": tc.expected_output if not tc.is_hidden else "hidden",
+                "input": preview(tc.input) if not tc.is_hidden else "hidden",
+                "expected": preview(tc.expected_output) if not tc.is_hidden else "hidden",
                 "got": "",
                 "passed": False,
                 "error": err if not tc.is_hidden else "Error (hidden test)",
@@ -114,33 +350,63 @@ async def run_submission(
             })
             continue
 
-        actual_output = execution["output"].strip()
-        expected_output = tc.expected_output.strip()
-        test_passed = actual_output == expected_output
+        test_passed = execution["passed"]
 
         if test_passed:
             passed += 1
 
         max_runtime = max(max_runtime, execution["runtime_ms"])
+        max_memory_kb = max(max_memory_kb, execution.get("memory_kb", 0))
 
         results.append({
-            "input": tc.input if not tc.is_hidden else "hidden",
-            "expected": expected_output if not tc.is_hidden else "hidden",
-            "got": actual_output if not tc.is_hidden else "hidden",
+            "input": preview(tc.input) if not tc.is_hidden else "hidden",
+            "expected": preview(tc.expected_output).strip() if not tc.is_hidden else "hidden",
+            "got": execution["output"] if not tc.is_hidden else "hidden",
             "passed": test_passed,
             "error": "",
             "is_hidden": tc.is_hidden
         })
 
-    final_status = "accepted" if passed == total else failure_status
+    if checker_failed:
+        final_status = "internal_error"
+    else:
+        final_status = "accepted" if passed == total else failure_status
 
-    return {
+    result = {
         "status": final_status,
         "test_cases_passed": passed,
         "test_cases_total": total,
         "runtime_ms": max_runtime,
+        "memory_kb": max_memory_kb,
         "results": results
     }
+    if cacheable and final_status != "time_limit_exceeded":
+        verdict_cache.put(cache_key, result)
+    return result
+
+
+async def record_failures(
+    test_set: TestSet,
+    test_cases: List[CachedTestCase],
+    executions: List[Optional[dict]],
+    db: AsyncSession
+):
+    """Count failed cases on their TestCase rows — fail-fast mode runs the most failed first."""
+    failed_ids = [
+        tc.id
+        for tc, execution in zip(test_cases, executions)
+        if execution is not None
+        and not execution.get("checker_error")
+        and not (execution["success"] and execution["passed"])
+    ]
+    if not failed_ids:
+        return
+    test_set.record_failures(failed_ids)
+    await db.execute(
+        update(TestCase)
+        .where(TestCase.id.in_(failed_ids))
+        .values(failure_count=TestCase.failure_count + 1)
+    )
 
 
 async def run_custom_input(
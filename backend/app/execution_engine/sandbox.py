@@ -1,15 +1,89 @@
 import asyncio
-import tempfile
 import os
-import time
-from app.execution_engine.languages import LANGUAGE_CONFIG, TIME_LIMIT_SECONDS
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    TIME_LIMIT_SECONDS,
+    MEMORY_LIMIT_MB,
+    MAX_CONCURRENT_RUNS,
+)
+from app.execution_engine.compiler import artifact_cache
+from app.execution_engine.process import run_process, start_launcher, collect_run, LAUNCHER_GRACE_SECONDS
+from app.execution_engine.warm_pool import warm_pool, WarmWorker
+from app.execution_engine.jvm_pool import jvm_pool, JvmWorker, WorkerLost
+from app.execution_engine.container_pool import (
+    container_pool,
+    PooledContainer,
+    ContainerLost,
+    artifact_files,
+)
+from app.execution_engine.workdir_pool import workdir_pool
+from app.execution_engine.scheduler import execution_scheduler
+from app.execution_engine.tracing import stage
+from app.execution_engine.output import InputData, as_bytes, decode_trimmed
+from app.execution_engine.limits import (
+    build_limits,
+    create_run_cgroup,
+    cgroup_oom_killed,
+    remove_run_cgroup,
+)
+
+# Allocation-failure messages from each runtime when it hits RLIMIT_AS
+OUT_OF_MEMORY_MARKERS = ("MemoryError", "std::bad_alloc", "OutOfMemoryError", "heap out of memory")
+
+# Per-case files of a batch run live here, inside the workdir
+BATCH_DIR = "batch"
+# A batch status line is "<i> <status> <cpu_ms> <wall_ms>" — anything longer is bogus
+BATCH_STATUS_LINE_MAX = 128
+
+run_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_RUNS,
+    thread_name_prefix="sandbox"
+)
+
+
+async def prepare_program(code: str, language: str, workdir: str) -> dict:
+    """
+    Put a runnable copy of code into workdir.
+    Compiles once per unique code — later runs reuse the cached build.
+    Returns {"success", "error", "compile_ms"}.
+    """
+    config = LANGUAGE_CONFIG[language]
+    if not config["compile_cmd"]:
+        with open(os.path.join(workdir, config["filename"]), "w") as f:
+            f.write(code)
+        return {"success": True, "error": "", "compile_ms": 0}
+
+    compiled = await artifact_cache.get_or_compile(code, language)
+    if compiled["success"]:
+        artifact_cache.copy_artifacts(compiled["artifact_dir"], workdir)
+    return compiled
 
 
 async def run_code_in_sandbox(
     code: str,
     language: str,
-    input_data: str,
-    time_limit: int = TIME_LIMIT_SECONDS
+    input_data: InputData,
+    time_limit: float = TIME_LIMIT_SECONDS,
+    decode_output: bool = True
+) -> dict:
+    """
+    Run code against one input. On success the result carries the raw
+    captured "stdout" buffer for checking, plus the stripped, decoded
+    "output" unless decode_output is False (e.g. hidden test cases).
+    """
+    async with execution_scheduler.slot():
+        return await _execute(code, language, input_data, time_limit, decode_output)
+
+
+async def _execute(
+    code: str,
+    language: str,
+    input_data: InputData,
+    time_limit: float,
+    decode_output: bool
 ) -> dict:
     config = LANGUAGE_CONFIG.get(language)
 
@@ -21,90 +95,61 @@ async def run_code_in_sandbox(
             "runtime_ms": 0
         }
 
-    # Create temp directory for this execution
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Write code to file
-        code_file = os.path.join(tmpdir, config["filename"])
-        with open(code_file, "w") as f:
-            f.write(code)
+    container = container_pool.acquire(language)
+    if container:
+        result = await _execute_container(container, code, input_data, time_limit, decode_output)
+        if result is not None:
+            return result
 
-        # Write input to file
-        input_file = os.path.join(tmpdir, "input.txt")
-        with open(input_file, "w") as f:
-            f.write(input_data)
+    worker = warm_pool.acquire(language, time_limit)
+    if worker:
+        return await _execute_warm(worker, code, input_data, time_limit, decode_output)
 
-        try:
-            start_time = time.time()
-
-            # Compile if needed — properly wrap communicate() not creation
-            if config["compile_cmd"]:
-                compile_proc = await asyncio.create_subprocess_shell(
-                    config["compile_cmd"],
-                    cwd=tmpdir,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
+    jvm_worker = jvm_pool.acquire(language, code)
+    if jvm_worker:
+        result = await _execute_jvm(jvm_worker, code, input_data, time_limit, decode_output)
+        if result is not None:
+            return result
 
-                try:
-                    stdout, stderr = await asyncio.wait_for(
-                        compile_proc.communicate(),
-                        timeout=10
-                    )
-                except asyncio.TimeoutError:
-                    compile_proc.kill()
-                    return {
-                        "success": False,
-                        "output": "",
-                        "error": "Compilation timed out",
-                        "runtime_ms": 0
-                    }
-
-                if compile_proc.returncode != 0:
-                    return {
-                        "success": False,
-                        "output": "",
-                        "error": stderr.decode("utf-8"),
-                        "runtime_ms": 0
-                    }
-
-            # Run the code
-            process = await asyncio.create_subprocess_shell(
-                f"{config['run_cmd']} < input.txt",
-                cwd=tmpdir,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=time_limit
-                )
-            except asyncio.TimeoutError:
-                process.kill()
+    # Lease a scratch directory for this execution — stdin is piped, not written to it
+    with workdir_pool.lease() as tmpdir:
+        try:
+            compiled = await prepare_program(code, language, tmpdir)
+            if not compiled["success"]:
                 return {
                     "success": False,
                     "output": "",
-                    "error": "Time Limit Exceeded",
-                    "runtime_ms": time_limit * 1000
+                    "error": compiled["error"],
+                    "runtime_ms": 0,
+                    "compile_ms": compiled["compile_ms"]
                 }
 
-            runtime_ms = int((time.time() - start_time) * 1000)
+            compile_ms = compiled["compile_ms"]
 
-            if process.returncode != 0:
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": stderr.decode("utf-8"),
-                    "runtime_ms": runtime_ms
-                }
+            # Run the code — off the event loop so wait4() can collect rusage
+            cgroup_path = create_run_cgroup(MEMORY_LIMIT_MB)
+            try:
+                loop = asyncio.get_running_loop()
+                with stage("run"):
+                    run = await loop.run_in_executor(
+                        run_executor,
+                        run_process,
+                        config["run_cmd"],
+                        tmpdir,
+                        as_bytes(input_data),
+                        time_limit,
+                        build_limits(
+                            time_limit,
+                            MEMORY_LIMIT_MB,
+                            config["limit_address_space"],
+                            cgroup_path
+                        )
+                    )
+                oom_killed = cgroup_oom_killed(cgroup_path)
+            finally:
+                remove_run_cgroup(cgroup_path)
 
-            return {
-                "success": True,
-                "output": stdout.decode("utf-8").strip(),
-                "error": "",
-                "runtime_ms": runtime_ms
-            }
+            return _run_result(run, oom_killed, time_limit, compile_ms, decode_output)
 
         except Exception as e:
             return {
@@ -112,4 +157,440 @@ async def run_code_in_sandbox(
                 "output": "",
                 "error": str(e),
                 "runtime_ms": 0
-            }
\ No newline at end of file
+            }
+
+
+def with_batch_harness(code: str, language: str) -> str:
+    """The program a batch run compiles — code plus the language's harness source, if any."""
+    config = LANGUAGE_CONFIG[language]
+    if not config["batch_source"]:
+        return code
+    with open(config["batch_source"]) as f:
+        return code + "\n" + f.read()
+
+
+async def run_batch_in_sandbox(
+    code: str,
+    language: str,
+    inputs: List[InputData],
+    time_limit: float = TIME_LIMIT_SECONDS,
+    decode_output: Optional[List[bool]] = None
+) -> List[Optional[dict]]:
+    """
+    Run every input in a single harness process (LANGUAGE_CONFIG batch_cmd).
+    Returns one result per input, shaped like run_code_in_sandbox()'s, or None
+    for cases the batch could not judge on their own — it crashed, hit the
+    memory or output limit, or stopped at an earlier timeout. Run those alone.
+
+    Inputs are handed over one at a time (see _drive_batch), so a case can
+    read only its own and earlier cases' inputs — callers must not batch a
+    visible case after a hidden one.
+    """
+    config = LANGUAGE_CONFIG[language]
+    decode_output = decode_output or [True] * len(inputs)
+    results: List[Optional[dict]] = [None] * len(inputs)
+
+    code = with_batch_harness(code, language)
+
+    async with execution_scheduler.slot():
+        with workdir_pool.lease() as tmpdir:
+            try:
+                compiled = await prepare_program(code, language, tmpdir)
+                if not compiled["success"]:
+                    return results
+
+                batch_dir = os.path.join(tmpdir, BATCH_DIR)
+                os.mkdir(batch_dir)
+
+                # Each case is held to time_limit by the harness itself
+                batch_limit = time_limit * len(inputs)
+                cgroup_path = create_run_cgroup(MEMORY_LIMIT_MB)
+                try:
+                    loop = asyncio.get_running_loop()
+                    with stage("run"):
+                        run, cases = await loop.run_in_executor(
+                            run_executor,
+                            _drive_batch,
+                            config["batch_cmd"] + [str(len(inputs)), str(time_limit)],
+                            tmpdir,
+                            [as_bytes(input_data) for input_data in inputs],
+                            batch_limit,
+                            build_limits(
+                                batch_limit,
+                                MEMORY_LIMIT_MB,
+                                config["limit_address_space"],
+                                cgroup_path
+                            )
+                        )
+                    oom_killed = cgroup_oom_killed(cgroup_path)
+                finally:
+                    remove_run_cgroup(cgroup_path)
+
+                # Peak memory covers the whole batch and cannot be pinned on one case
+                if oom_killed or run["memory_kb"] > MEMORY_LIMIT_MB * 1024 \
+                        or run["output_limit_exceeded"]:
+                    return results
+
+                for index, case in enumerate(cases):
+                    results[index] = _batch_case_result(
+                        case,
+                        run["memory_kb"],
+                        time_limit,
+                        compiled["compile_ms"],
+                        decode_output[index]
+                    )
+            except Exception as e:
+                print(f"[Sandbox] batch run failed, falling back to single runs: {e}")
+                return [None] * len(inputs)
+
+    return results
+
+
+def _drive_batch(argv: List[str], cwd: str, inputs: list, batch_limit: float, limits: dict):
+    """
+    Blocking batch run — call from an executor thread. The harness gets its
+    inputs on a pipe, each sent only once it has reported the previous case,
+    and each case's output is read as soon as its status line arrives, so
+    nothing the submission does later can change it.
+    Returns (run_process()-style result, one dict per reported case).
+    """
+    input_r, input_w = os.pipe()
+    status_r, status_w = os.pipe()
+    try:
+        proc, report_file = start_launcher(
+            argv + [str(input_r), str(status_w)],
+            cwd,
+            limits,
+            batch_limit,
+            pass_fds=(input_r, status_w)
+        )
+    except BaseException:
+        for fd in (input_w, status_r):
+            os.close(fd)
+        raise
+    finally:
+        os.close(input_r)
+        os.close(status_w)
+
+    cases = []
+    feeder = threading.Thread(
+        target=_feed_batch,
+        args=(os.fdopen(input_w, "wb"), os.fdopen(status_r, "rb"), inputs, os.path.join(cwd, BATCH_DIR), cases),
+        daemon=True
+    )
+    feeder.start()
+    run = collect_run(proc, report_file, b"", batch_limit)
+    # The harness is gone, so its end of both pipes is closed
+    feeder.join(LAUNCHER_GRACE_SECONDS)
+    return run, list(cases)
+
+
+def _feed_batch(input_file: BinaryIO, status_file: BinaryIO, inputs: list, batch_dir: str, cases: list):
+    """Send inputs one by one, collecting each case's status and output before the next."""
+    try:
+        for index, data in enumerate(inputs):
+            input_file.write(f"{len(data)}\n".encode())
+            input_file.write(data)
+            input_file.flush()
+
+            line = status_file.readline(BATCH_STATUS_LINE_MAX)
+            if not line:
+                return
+            case_index, status, cpu_ms, wall_ms = line.decode("utf-8").split()
+            if int(case_index) != index or status not in ("ok", "error", "timeout"):
+                raise ValueError(f"unexpected batch status line: {line!r}")
+            cases.append(_collect_batch_case(batch_dir, index, status, int(cpu_ms), int(wall_ms)))
+            if status == "timeout":
+                return
+    except (OSError, ValueError) as e:
+        # The harness died or misbehaved — cases not yet reported run alone
+        print(f"[Sandbox] batch stopped after {len(cases)} case(s): {e}")
+    finally:
+        input_file.close()
+        status_file.close()
+
+
+def _collect_batch_case(batch_dir: str, index: int, status: str, cpu_ms: int, wall_ms: int) -> dict:
+    """A reported case's status line with its batch/<i>.out and .err as they are now."""
+    case = {"status": status, "cpu_ms": cpu_ms, "wall_ms": wall_ms, "stdout": bytearray(), "error": ""}
+    if status == "ok":
+        with open(os.path.join(batch_dir, f"{index}.out"), "rb") as f:
+            case["stdout"] = bytearray(f.read())
+    elif status == "error":
+        err_path = os.path.join(batch_dir, f"{index}.err")
+        # No .err file for a bare non-zero exit
+        if os.path.exists(err_path):
+            with open(err_path, errors="replace") as f:
+                case["error"] = f.read()
+    return case
+
+
+def _batch_case_result(
+    case: dict,
+    memory_kb: int,
+    time_limit: float,
+    compile_ms: int,
+    decode_output: bool
+) -> Optional[dict]:
+    """Result of one case from what _collect_batch_case() read for it."""
+    status, cpu_ms, wall_ms = case["status"], case["cpu_ms"], case["wall_ms"]
+    if status == "timeout" or cpu_ms > time_limit * 1000:
+        return {
+            "success": False,
+            "output": "",
+            "error": "Time Limit Exceeded",
+            "runtime_ms": int(time_limit * 1000),
+            "wall_ms": wall_ms,
+            "memory_kb": memory_kb,
+            "compile_ms": compile_ms
+        }
+
+    if status == "error":
+        error = case["error"]
+        if any(m in error for m in OUT_OF_MEMORY_MARKERS):
+            # May be the batch's memory, not this case's — judge it alone
+            return None
+        return {
+            "success": False,
+            "output": "",
+            "error": error,
+            "runtime_ms": cpu_ms,
+            "wall_ms": wall_ms,
+            "memory_kb": memory_kb,
+            "compile_ms": compile_ms
+        }
+
+    stdout = case["stdout"]
+    return {
+        "success": True,
+        "output": decode_trimmed(stdout) if decode_output else "",
+        "stdout": stdout,
+        "error": "",
+        "runtime_ms": cpu_ms,
+        "wall_ms": wall_ms,
+        "memory_kb": memory_kb,
+        "compile_ms": compile_ms
+    }
+
+
+async def _execute_warm(
+    worker: WarmWorker,
+    code: str,
+    input_data: InputData,
+    time_limit: float,
+    decode_output: bool
+) -> dict:
+    """Same as the cold path, on an interpreter that was started ahead of time."""
+    config = LANGUAGE_CONFIG[worker.language]
+    try:
+        with open(os.path.join(worker.workdir, config["filename"]), "w") as f:
+            f.write(code)
+
+        loop = asyncio.get_running_loop()
+        with stage("run"):
+            run = await loop.run_in_executor(
+                run_executor,
+                worker.run,
+                as_bytes(input_data),
+                time_limit
+            )
+        oom_killed = cgroup_oom_killed(worker.cgroup_path)
+        return _run_result(run, oom_killed, time_limit, 0, decode_output)
+
+    except Exception as e:
+        return {
+            "success": False,
+            "output": "",
+            "error": str(e),
+            "runtime_ms": 0
+        }
+    finally:
+        if worker.go_w is None:
+            worker.cleanup()
+        else:
+            # Never started — the idle interpreter has to be stopped too
+            worker.discard()
+
+
+async def _execute_jvm(
+    worker: JvmWorker,
+    code: str,
+    input_data: InputData,
+    time_limit: float,
+    decode_output: bool
+) -> Optional[dict]:
+    """
+    Compile and run Java on a persistent JVM (see jvm_pool.py).
+    Returns None if the JVM died under the job, so it can be re-run cold.
+    """
+    loop = asyncio.get_running_loop()
+
+    def compile_in_jvm(staging_dir: str):
+        return loop.run_in_executor(None, worker.compile, staging_dir)
+
+    try:
+        compiled = await artifact_cache.get_or_compile(code, "java", compiler=compile_in_jvm)
+        if not compiled["success"]:
+            return {
+                "success": False,
+                "output": "",
+                "error": compiled["error"],
+                "runtime_ms": 0,
+                "compile_ms": compiled["compile_ms"]
+            }
+
+        with workdir_pool.lease() as class_dir:
+            artifact_cache.copy_artifacts(compiled["artifact_dir"], class_dir)
+            with stage("run"):
+                run = await loop.run_in_executor(
+                    run_executor,
+                    worker.run,
+                    class_dir,
+                    as_bytes(input_data),
+                    time_limit
+                )
+        return _run_result(
+            run,
+            run.pop("memory_exceeded"),
+            time_limit,
+            compiled["compile_ms"],
+            decode_output
+        )
+
+    except WorkerLost as e:
+        print(f"[Sandbox] {e}, running cold")
+        return None
+    except BaseException:
+        # Wherever it stopped, the worker may be mid-reply — never reuse it
+        worker.alive = False
+        raise
+    finally:
+        jvm_pool.release(worker)
+
+
+async def _execute_container(
+    container: PooledContainer,
+    code: str,
+    input_data: InputData,
+    time_limit: float,
+    decode_output: bool
+) -> Optional[dict]:
+    """
+    Compile and run inside a pooled container (see container_pool.py).
+    Returns None if the container failed under the job, so it can run on the host.
+    """
+    config = LANGUAGE_CONFIG[container.language]
+    loop = asyncio.get_running_loop()
+
+    def compile_in_container(staging_dir: str):
+        return loop.run_in_executor(None, container.compile, staging_dir)
+
+    try:
+        compile_ms = 0
+        if config["compile_cmd"]:
+            compiled = await artifact_cache.get_or_compile(
+                code,
+                container.language,
+                compiler=compile_in_container,
+                # Built with the image's toolchain, not the host's
+                toolchain=container.image
+            )
+            if not compiled["success"]:
+                return {
+                    "success": False,
+                    "output": "",
+                    "error": compiled["error"],
+                    "runtime_ms": 0,
+                    "compile_ms": compiled["compile_ms"]
+                }
+            compile_ms = compiled["compile_ms"]
+            files = artifact_files(compiled["artifact_dir"])
+        else:
+            files = {config["filename"]: (code.encode("utf-8"), 0o644)}
+
+        with stage("run"):
+            run = await loop.run_in_executor(
+                run_executor,
+                container.run,
+                files,
+                as_bytes(input_data),
+                time_limit
+            )
+        return _run_result(run, run.pop("memory_exceeded"), time_limit, compile_ms, decode_output)
+
+    except ContainerLost as e:
+        print(f"[Sandbox] {e}, running on the host")
+        return None
+    finally:
+        container_pool.release(container)
+
+
+def _run_result(
+    run: dict,
+    oom_killed: bool,
+    time_limit: float,
+    compile_ms: int,
+    decode_output: bool
+) -> dict:
+    """Turn a run_process() result into the verdict dict returned to callers."""
+    stderr_text = run["stderr"].decode("utf-8", errors="replace")
+    memory_exceeded = (
+        oom_killed
+        or run["memory_kb"] > MEMORY_LIMIT_MB * 1024
+        or (run["returncode"] != 0 and any(m in stderr_text for m in OUT_OF_MEMORY_MARKERS))
+    )
+
+    if memory_exceeded:
+        return {
+            "success": False,
+            "output": "",
+            "error": "Memory Limit Exceeded",
+            "runtime_ms": run["cpu_ms"],
+            "wall_ms": run["wall_ms"],
+            "memory_kb": run["memory_kb"],
+            "compile_ms": compile_ms
+        }
+
+    if run["output_limit_exceeded"]:
+        return {
+            "success": False,
+            "output": "",
+            "error": "Output Limit Exceeded",
+            "runtime_ms": run["cpu_ms"],
+            "wall_ms": run["wall_ms"],
+            "memory_kb": run["memory_kb"],
+            "compile_ms": compile_ms
+        }
+
+    if run["timed_out"]:
+        return {
+            "success": False,
+            "output": "",
+            "error": "Time Limit Exceeded",
+            "runtime_ms": int(time_limit * 1000),
+            "wall_ms": run["wall_ms"],
+            "memory_kb": run["memory_kb"],
+            "compile_ms": compile_ms
+        }
+
+    if run["returncode"] != 0:
+        return {
+            "success": False,
+            "output": "",
+            "error": stderr_text,
+            "runtime_ms": run["cpu_ms"],
+            "wall_ms": run["wall_ms"],
+            "memory_kb": run["memory_kb"],
+            "compile_ms": compile_ms
+        }
+
+    return {
+        "success": True,
+        "output": decode_trimmed(run["stdout"]) if decode_output else "",
+        "stdout": run["stdout"],
+        "error": "",
+        "runtime_ms": run["cpu_ms"],
+        "wall_ms": run["wall_ms"],
+        "memory_kb": run["memory_kb"],
+        "compile_ms": compile_ms
+    }
@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import itertools
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Dict, List, NamedTuple, Optional
+from app.execution_engine.languages import (
+    MAX_CONCURRENT_RUNS,
+    EXECUTION_LANES,
+    LANE_QUEUE_LIMITS,
+    LANE_USER_LIMITS,
+)
+from app.execution_engine.tracing import record
+
+# Lane used for sandbox work started outside any request() block
+DEFAULT_LANE = "run"
+
+
+class QueueFull(Exception):
+    """The lane, or this user's share of it, is at its limit — retry later (HTTP 429)."""
+
+    def __init__(self, lane: str, reason: str):
+        super().__init__(f"Execution queue '{lane}' is full: {reason}")
+        self.lane = lane
+
+
+class WorkContext(NamedTuple):
+    lane: str
+    owner: Optional[str]
+    group: Optional[str]
+
+
+_current_work: contextvars.ContextVar[Optional[WorkContext]] = contextvars.ContextVar(
+    "current_work", default=None
+)
+
+
+class _Waiter:
+    __slots__ = ("work", "seq", "future", "queued_at")
+
+    def __init__(self, work: WorkContext, seq: int, future: asyncio.Future):
+        self.work = work
+        self.seq = seq
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class ExecutionScheduler:
+    """
+    Hands out the MAX_CONCURRENT_RUNS sandbox slots of this process.
+
+    Work belongs to a lane (EXECUTION_LANES, highest priority first), and a
+    freed slot always goes to the highest lane with anyone waiting, so a
+    submit never queues behind sample runs. Within a lane the slot goes to
+    whoever is running least: the test (group) with the fewest slots, then
+    the user (owner), then the earliest waiter.
+
+    request() admits one HTTP request or judge job into a lane, enforcing the
+    lane's queue depth and per-user limits; slot() is taken by each sandbox
+    run within it. The lane travels in a context variable, so the sandbox
+    code in between does not need to know about it.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.free = slots
+        self._seq = itertools.count()
+        self._waiting: Dict[str, List[_Waiter]] = {lane: [] for lane in EXECUTION_LANES}
+        self._running_groups: Counter = Counter()
+        self._running_owners: Counter = Counter()
+        self._requests: Counter = Counter()
+        self._user_requests: Counter = Counter()
+        self.lane_metrics = {
+            lane: {
+                "requests": 0,
+                "rejected": 0,
+                "runs": 0,
+                "running": 0,
+                "wait_ms_total": 0,
+                "wait_ms_max": 0,
+            }
+            for lane in EXECUTION_LANES
+        }
+
+    @asynccontextmanager
+    async def request(self, lane: str, owner: Optional[str] = None, group: Optional[str] = None):
+        """Admit a unit of work into lane, or raise QueueFull."""
+        if lane not in self.lane_metrics:
+            raise ValueError(f"Unknown execution lane: {lane}")
+        metrics = self.lane_metrics[lane]
+
+        queue_limit = LANE_QUEUE_LIMITS.get(lane)
+        if queue_limit is not None and self._requests[lane] >= queue_limit:
+            metrics["rejected"] += 1
+            raise QueueFull(lane, f"{queue_limit} requests already queued")
+        user_limit = LANE_USER_LIMITS.get(lane)
+        if owner is not None and user_limit is not None \
+                and self._user_requests[(lane, owner)] >= user_limit:
+            metrics["rejected"] += 1
+            raise QueueFull(lane, f"at most {user_limit} at a time per user")
+
+        metrics["requests"] += 1
+        self._requests[lane] += 1
+        if owner is not None:
+            self._user_requests[(lane, owner)] += 1
+        token = _current_work.set(WorkContext(lane, owner, group))
+        try:
+            yield
+        finally:
+            _current_work.reset(token)
+            self._requests[lane] -= 1
+            if owner is not None:
+                self._user_requests[(lane, owner)] -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one sandbox slot, queued by the surrounding request()'s lane."""
+        work = _current_work.get() or WorkContext(DEFAULT_LANE, None, None)
+        await self._acquire(work)
+        try:
+            yield
+        finally:
+            self._release(work)
+
+    async def _acquire(self, work: WorkContext):
+        metrics = self.lane_metrics[work.lane]
+        metrics["runs"] += 1
+        if self.free > 0 and not any(self._waiting.values()):
+            self._grant(work)
+            record("slot_wait", 0)
+            return
+
+        waiter = _Waiter(work, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiting[work.lane].append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we were cancelled — hand the slot on
+                self._release(work)
+            else:
+                self._waiting[work.lane].remove(waiter)
+            raise
+
+        waited_ms = int((time.monotonic() - waiter.queued_at) * 1000)
+        metrics["wait_ms_total"] += waited_ms
+        metrics["wait_ms_max"] = max(metrics["wait_ms_max"], waited_ms)
+        record("slot_wait", waited_ms)
+
+    def _grant(self, work: WorkContext):
+        self.free -= 1
+        self.lane_metrics[work.lane]["running"] += 1
+        self._running_groups[work.group] += 1
+        self._running_owners[work.owner] += 1
+
+    def _release(self, work: WorkContext):
+        self.free += 1
+        self.lane_metrics[work.lane]["running"] -= 1
+        self._running_groups[work.group] -= 1
+        self._running_owners[work.owner] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.free > 0:
+            waiters = next((self._waiting[lane] for lane in EXECUTION_LANES if self._waiting[lane]), None)
+            if waiters is None:
+                return
+            chosen = min(waiters, key=lambda w: (
+                self._running_groups[w.work.group],
+                self._running_owners[w.work.owner],
+                w.seq
+            ))
+            waiters.remove(chosen)
+            self._grant(chosen.work)
+            chosen.future.set_result(None)
+
+    def stats(self) -> dict:
+        """Per-lane counters plus the current queue lengths."""
+        lanes = {}
+        for lane, metrics in self.lane_metrics.items():
+            runs = metrics["runs"]
+            lanes[lane] = dict(
+                metrics,
+                waiting=len(self._waiting[lane]),
+                in_flight_requests=self._requests[lane],
+                wait_ms_avg=metrics["wait_ms_total"] // runs if runs else 0
+            )
+        return {"slots": self.slots, "free": self.free, "lanes": lanes}
+
+
+# Global instance
+execution_scheduler = ExecutionScheduler(MAX_CONCURRENT_RUNS)
@@ -0,0 +1,91 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from typing import BinaryIO, Tuple, Union
+from app.execution_engine.languages import TEST_DATA_DIR
+from app.execution_engine.output import BytesLike
+
+# Uploads are hashed and copied in pieces this size
+CHUNK_BYTES = 1024 * 1024
+
+
+class TestDataStore:
+    """
+    Content-addressed files for test inputs and answers too large to keep in
+    the database: <root>/<first 2 hex>/<sha256>. A TestCase holds just the
+    hash and size. Files are memory-mapped when judged and fed to runs and
+    checkers straight from the page cache, never copied into strings.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put_stream(self, source: BinaryIO) -> Tuple[str, int]:
+        """Store everything read from source. Returns (sha256, size). Blocking."""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, partial = tempfile.mkstemp(prefix=".upload-", dir=self.root)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = source.read(CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            self._publish(partial, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(partial):
+                os.unlink(partial)
+            raise
+        return digest.hexdigest(), size
+
+    def put_bytes(self, data: bytes) -> Tuple[str, int]:
+        digest = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self.path(digest)):
+            os.makedirs(self.root, exist_ok=True)
+            fd, partial = tempfile.mkstemp(prefix=".upload-", dir=self.root)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._publish(partial, digest)
+        return digest, len(data)
+
+    def _publish(self, partial: str, digest: str):
+        final = self.path(digest)
+        if os.path.exists(final):
+            # Same content already stored
+            os.unlink(partial)
+            return
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.chmod(partial, 0o444)
+        os.replace(partial, final)
+
+    def open(self, digest: str) -> Union[mmap.mmap, bytes]:
+        """
+        Read-only mapping of a stored file. It is unmapped once the last
+        reference (normally a cached TestSet) is dropped.
+        """
+        with open(self.path(digest), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap cannot map an empty file
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def preview(data: Union[str, BytesLike]) -> str:
+    """Test data as shown in results — file-backed data is summarised, not inlined."""
+    if isinstance(data, str):
+        return data
+    return f"[{len(data)} bytes of test data]"
+
+
+# Global instance
+test_data_store = TestDataStore(TEST_DATA_DIR)
@@ -0,0 +1,139 @@
+import json
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.models.question import Question, TestCase
+from app.execution_engine.languages import TEST_SET_CACHE_MAX_QUESTIONS
+from app.execution_engine.output import InputData
+from app.execution_engine.test_data import test_data_store
+
+
+def parse_driver_code(driver_code: Optional[str]) -> Union[dict, str, None]:
+    """
+    A question's driver as stored: a per-language dict when driver_code is a
+    JSON object, the raw text for a legacy plain-text driver, or None.
+    """
+    raw_driver = (driver_code or "").strip()
+    if not raw_driver:
+        return None
+    try:
+        driver_map = json.loads(raw_driver)
+        if isinstance(driver_map, dict):
+            return driver_map
+    except (json.JSONDecodeError, ValueError):
+        pass
+    return raw_driver
+
+
+class CachedTestCase(NamedTuple):
+    """
+    Detached copy of a TestCase row, safe to share between sessions.
+    File-backed input and answer are memory-mapped rather than read in.
+    """
+    id: str
+    input: InputData
+    expected_output: InputData
+    is_hidden: bool
+
+    @classmethod
+    def from_row(cls, tc: TestCase) -> "CachedTestCase":
+        return cls(
+            str(tc.id),
+            test_data_store.open(tc.input_hash) if tc.input_hash else tc.input,
+            test_data_store.open(tc.output_hash) if tc.output_hash else tc.expected_output,
+            bool(tc.is_hidden)
+        )
+
+
+class TestSet:
+    """
+    Everything needed to judge one question at one test_set_version: the
+    checker, the parsed driver and the test cases. Stands in for the Question
+    row wherever runner.py takes one.
+    """
+
+    def __init__(self, question: Question, test_cases: List[TestCase]):
+        self.question_id = str(question.id)
+        self.test_id = str(question.test_id)
+        self.version = question.test_set_version
+        self.driver_code = question.driver_code
+        self.driver = parse_driver_code(question.driver_code)
+        self.checker = question.checker
+        self.checker_config = question.checker_config
+        self.time_limit_ms = question.time_limit_ms
+        # Created order; submissions run visible cases before hidden ones
+        self.cases = [CachedTestCase.from_row(tc) for tc in test_cases]
+        self.submit_cases = sorted(self.cases, key=lambda tc: tc.is_hidden)
+        self.sample_cases = [tc for tc in self.cases if not tc.is_hidden]
+        # Counted here as well as in the DB, so ordering adapts between reloads
+        self.failure_counts = {str(tc.id): tc.failure_count or 0 for tc in test_cases}
+
+    def by_failures(self) -> List[CachedTestCase]:
+        """Submit cases, most often failed first — the likeliest to end a fail-fast run early."""
+        return sorted(self.submit_cases, key=lambda tc: -self.failure_counts.get(tc.id, 0))
+
+    def record_failures(self, case_ids: List[str]):
+        for case_id in case_ids:
+            self.failure_counts[case_id] = self.failure_counts.get(case_id, 0) + 1
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies this exact test set for caches keyed on it."""
+        return f"{self.question_id}:{self.version}"
+
+
+class TestSetCache:
+    """
+    Per-process LRU of TestSets. Each lookup still reads the question's
+    test_set_version — one indexed row — and reloads only when it moved,
+    so edits made through any server process are picked up immediately.
+    """
+
+    def __init__(self, max_questions: int):
+        self.max_questions = max_questions
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, TestSet]" = OrderedDict()
+
+    async def get(self, question_id, db: AsyncSession) -> Optional[TestSet]:
+        """The question's current TestSet, or None if it does not exist."""
+        version = (await db.execute(
+            select(Question.test_set_version).where(Question.id == question_id)
+        )).scalar_one_or_none()
+        if version is None:
+            return None
+
+        key = str(question_id)
+        cached = self._entries.get(key)
+        if cached and cached.version == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        question = (await db.execute(
+            select(Question).where(Question.id == question_id)
+        )).scalar_one_or_none()
+        if question is None:
+            return None
+        test_cases = (await db.execute(
+            select(TestCase)
+            .where(TestCase.question_id == question_id)
+            .order_by(TestCase.created_at, TestCase.id)
+        )).scalars().all()
+
+        test_set = TestSet(question, test_cases)
+        if self.max_questions > 0:
+            self._entries[key] = test_set
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_questions:
+                self._entries.popitem(last=False)
+        return test_set
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "questions": len(self._entries)}
+
+
+# Global instance
+test_set_cache = TestSetCache(TEST_SET_CACHE_MAX_QUESTIONS)
@@ -0,0 +1,179 @@
+import bisect
+import contextvars
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.execution_engine.languages import (
+    TRACE_BUCKETS_MS,
+    TRACE_SLOW_JOB_MS,
+    TRACE_SLOW_JOBS,
+)
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+class Trace:
+    """Stage timings of one job. Stages may repeat — one "run" per test case."""
+
+    def __init__(self, kind: str, language: str, job_id: Optional[str] = None):
+        self.kind = kind
+        self.language = language
+        self.job_id = job_id
+        self.outcome: Optional[str] = None
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, name: str, ms: float):
+        self.stages[name].append(ms)
+
+    def summary(self) -> dict:
+        return {
+            name: {"count": len(times), "total_ms": round(sum(times), 1), "max_ms": round(max(times), 1)}
+            for name, times in self.stages.items()
+        }
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as a stage of the current job, if one is traced."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, (time.perf_counter() - start) * 1000)
+
+
+def record(name: str, ms: float):
+    """Add an already measured stage to the current job, if one is traced."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, ms)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (ms); the last bucket is unbounded."""
+
+    def __init__(self, bounds=TRACE_BUCKETS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.buckets[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.buckets):
+            seen += n
+            if seen >= rank:
+                return round(min(bound, self.max_ms), 1)
+        return round(self.max_ms, 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum_ms / self.count, 1) if self.count else 0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {
+                **{f"le_{bound}": n for bound, n in zip(self.bounds, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class TraceRecorder:
+    """
+    Collects finished job traces of this process into per-language, per-stage
+    histograms ("total" is the whole job), and keeps the slowest jobs.
+
+    The current trace travels in a context variable, so stage() calls deep
+    in the sandbox and compiler attach to whichever job awaits them — test
+    cases run as child tasks inherit it.
+    """
+
+    def __init__(self, slow_job_ms: int, slow_jobs: int):
+        self.slow_job_ms = slow_job_ms
+        self.slow_jobs = slow_jobs
+        self.histograms: Dict[str, Dict[str, Histogram]] = defaultdict(lambda: defaultdict(Histogram))
+        self._slowest: list = []
+        self._seq = itertools.count()
+
+    @contextmanager
+    def job(self, kind: str, language: str, job_id: Optional[str] = None, queue_wait_ms: Optional[float] = None):
+        """Trace the enclosed block as one job; queue_wait_ms is time spent queued before it."""
+        trace = Trace(kind, language, job_id)
+        if queue_wait_ms is not None:
+            trace.add("queue_wait", queue_wait_ms)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            self.finish(trace)
+
+    def finish(self, trace: Trace):
+        total_ms = (time.perf_counter() - trace.started) * 1000
+        histograms = self.histograms[trace.language]
+        for name, times in trace.stages.items():
+            for ms in times:
+                histograms[name].observe(ms)
+        histograms["total"].observe(total_ms)
+
+        if total_ms < self.slow_job_ms:
+            return
+        summary = trace.summary()
+        breakdown = ", ".join(
+            f"{name} {s['total_ms']:.0f}ms" + (f" x{s['count']}" if s["count"] > 1 else "")
+            for name, s in sorted(summary.items(), key=lambda item: -item[1]["total_ms"])
+        )
+        print(f"[Trace] slow {trace.kind} job {trace.job_id or '-'} ({trace.language}): {total_ms:.0f}ms — {breakdown}")
+
+        entry = {
+            "job_id": trace.job_id,
+            "kind": trace.kind,
+            "language": trace.language,
+            "outcome": trace.outcome,
+            "total_ms": round(total_ms, 1),
+            "stages": summary,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }
+        item = (total_ms, next(self._seq), entry)
+        if len(self._slowest) < self.slow_jobs:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    def stats(self) -> dict:
+        return {
+            "histograms": {
+                language: {name: h.to_dict() for name, h in stages.items()}
+                for language, stages in self.histograms.items()
+            },
+            "slow_jobs": [entry for _, _, entry in sorted(self._slowest, reverse=True)],
+        }
+
+
+# Global instance
+execution_traces = TraceRecorder(TRACE_SLOW_JOB_MS, TRACE_SLOW_JOBS)
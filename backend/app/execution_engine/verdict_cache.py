@@ -0,0 +1,53 @@
+import copy
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+from app.execution_engine.languages import VERDICT_CACHE_MAX_ENTRIES
+
+
+def verdict_key(code: str, language: str, test_set: str) -> str:
+    """test_set is TestSet.cache_key — bumping the question's version retires old verdicts."""
+    digest = hashlib.sha256()
+    for part in (language, test_set, code):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """
+    In-memory LRU of judged submissions, keyed by verdict_key(), so a
+    resubmission of identical code against an unchanged test set is answered
+    without running anything. Holds at most max_entries results.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers attach results to their own rows — never share the cached dicts
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: dict):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = copy.deepcopy(result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# Global instance
+verdict_cache = VerdictCache(VERDICT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,19 @@
+// Warm Node.js worker — the warm_python.py protocol for JavaScript.
+// Started ahead of time by warm_pool.py as `node warm_node.js <go_fd> <ready_fd>`:
+// reports its boot CPU on ready_fd, waits for go_fd to close, then runs
+// ./solution.js as the main module.
+const fs = require("fs");
+const path = require("path");
+const Module = require("module");
+
+const [goFd, readyFd] = process.argv.slice(2).map(Number);
+
+const usage = process.cpuUsage();
+fs.writeSync(readyFd, String(Math.floor((usage.user + usage.system) / 1000)));
+fs.closeSync(readyFd);
+
+fs.readSync(goFd, Buffer.alloc(1));
+fs.closeSync(goFd);
+
+process.argv = [process.argv[0], path.resolve("solution.js")];
+Module.runMain();
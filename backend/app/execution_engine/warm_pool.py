@@ -0,0 +1,211 @@
+import asyncio
+import os
+import select
+import shutil
+import tempfile
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    TIME_LIMIT_SECONDS,
+    MAX_TIME_LIMIT_SECONDS,
+    MEMORY_LIMIT_MB,
+    WARM_POOL_SIZE,
+    WARM_WORKER_MAX_IDLE_SECONDS,
+)
+from app.execution_engine.process import start_launcher, collect_run, stop_launcher
+from app.execution_engine.limits import build_limits, create_run_cgroup, remove_run_cgroup
+
+# A worker that has not reported ready by then is treated as broken
+WARM_WORKER_BOOT_SECONDS = 10
+# Launcher deadline a worker must have left beyond the job's limit when it
+# is handed out, for writing the source and dispatching to a thread
+WARM_WORKER_DISPATCH_SECONDS = 1
+
+
+class WarmWorker:
+    """
+    One interpreter started ahead of time under launcher.py, confined by the
+    same limits as a cold run, and waiting on a pipe for a single job.
+    Blocking — construct, run() and discard() from an executor thread.
+    """
+
+    def __init__(self, language: str, time_limit: float):
+        config = LANGUAGE_CONFIG[language]
+        self.language = language
+        self.time_limit = time_limit
+        self.workdir = tempfile.mkdtemp(prefix="codeshield-warm-")
+        self.cgroup_path = create_run_cgroup(MEMORY_LIMIT_MB)
+        self.boot_cpu_ms = None
+        self.proc = None
+        self.report_file = None
+        # Taken before launch, so the launcher's own deadline is never earlier
+        self.deadline = time.monotonic() + WARM_WORKER_MAX_IDLE_SECONDS + time_limit
+
+        go_r, self.go_w = os.pipe()
+        ready_r, ready_w = os.pipe()
+        try:
+            self.proc, self.report_file = start_launcher(
+                config["warm_cmd"] + [str(go_r), str(ready_w)],
+                self.workdir,
+                build_limits(
+                    time_limit,
+                    MEMORY_LIMIT_MB,
+                    config["limit_address_space"],
+                    self.cgroup_path
+                ),
+                # Idle time counts against the launcher's deadline too
+                WARM_WORKER_MAX_IDLE_SECONDS + time_limit,
+                pass_fds=(go_r, ready_w)
+            )
+        finally:
+            os.close(go_r)
+            os.close(ready_w)
+
+        try:
+            if select.select([ready_r], [], [], WARM_WORKER_BOOT_SECONDS)[0]:
+                ready = os.read(ready_r, 64)
+                self.boot_cpu_ms = int(ready) if ready else None
+        except ValueError:
+            pass
+        finally:
+            os.close(ready_r)
+
+    @property
+    def ready(self) -> bool:
+        return self.boot_cpu_ms is not None
+
+    def can_run(self, time_limit: float) -> bool:
+        """Whether the launcher's deadline still leaves a job the full time_limit."""
+        return (
+            time_limit <= self.time_limit
+            and time.monotonic() + time_limit + WARM_WORKER_DISPATCH_SECONDS <= self.deadline
+        )
+
+    def run(self, input_data: bytes, time_limit: float) -> dict:
+        """
+        Run the source already written to workdir, held to time_limit — at most
+        the limit the worker was started with. Same result shape as run_process().
+        """
+        # Closing go_w is the signal to start
+        os.close(self.go_w)
+        self.go_w = None
+        return collect_run(
+            self.proc,
+            self.report_file,
+            input_data,
+            time_limit,
+            enforce_wall_limit=True,
+            cpu_offset_ms=self.boot_cpu_ms
+        )
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        remove_run_cgroup(self.cgroup_path)
+
+    def discard(self):
+        """Stop an unused worker and release everything it holds."""
+        if self.go_w is not None:
+            os.close(self.go_w)
+            self.go_w = None
+        if self.proc is not None:
+            stop_launcher(self.proc, self.report_file)
+        self.cleanup()
+
+
+class WarmPool:
+    """
+    Per-language pools of WarmWorkers for interpreted languages with a warm_cmd.
+
+    Each worker serves exactly one job — isolation is the same as a cold run,
+    only interpreter startup has already happened. A used or stale worker is
+    replaced in the background; when none is idle, callers fall back to a
+    cold spawn.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._idle: Dict[str, Deque[WarmWorker]] = {}
+        self._pending: Dict[str, int] = {}
+        self._tasks = set()
+        self._stopped = False
+
+    def start(self, time_limit: float = max(TIME_LIMIT_SECONDS, MAX_TIME_LIMIT_SECONDS)):
+        """Workers are started with the largest limit any job may have, and each run enforces its own."""
+        if not self.size:
+            return
+        self.time_limit = time_limit
+        for language, config in LANGUAGE_CONFIG.items():
+            if config.get("warm_cmd"):
+                self._idle[language] = deque()
+                self._pending[language] = 0
+                self._top_up(language)
+        print(f"[WarmPool] keeping {self.size} warm worker(s) for {', '.join(self._idle)}")
+
+    def acquire(self, language: str, time_limit: float) -> Optional[WarmWorker]:
+        """Take an idle worker for this job, or None to run it cold."""
+        idle = self._idle.get(language)
+        if idle is None:
+            return None
+
+        worker = None
+        while idle:
+            candidate = idle.popleft()
+            if candidate.can_run(time_limit):
+                worker = candidate
+                break
+            self._discard(candidate)
+
+        self._top_up(language)
+        if worker:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return worker
+
+    def _top_up(self, language: str):
+        missing = self.size - len(self._idle[language]) - self._pending[language]
+        for _ in range(missing):
+            self._pending[language] += 1
+            task = asyncio.create_task(self._spawn(language))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _spawn(self, language: str):
+        loop = asyncio.get_running_loop()
+        try:
+            worker = await loop.run_in_executor(None, WarmWorker, language, self.time_limit)
+        except Exception as e:
+            print(f"[WarmPool] could not start {language} worker: {e}")
+            return
+        finally:
+            self._pending[language] -= 1
+
+        if self._stopped or not worker.ready:
+            if not worker.ready:
+                print(f"[WarmPool] {language} worker failed to boot")
+            self._discard(worker)
+            return
+        self._idle[language].append(worker)
+
+    def _discard(self, worker: WarmWorker):
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(None, worker.discard)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self):
+        self._stopped = True
+        for idle in self._idle.values():
+            while idle:
+                self._discard(idle.popleft())
+        # Spawns finishing now discard their worker, which adds another task
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+# Global instance
+warm_pool = WarmPool(WARM_POOL_SIZE)
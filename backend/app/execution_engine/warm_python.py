@@ -0,0 +1,44 @@
+"""
+Warm Python worker — started ahead of time by warm_pool.py, under launcher.py
+and its limits, as `python3 warm_python.py <go_fd> <ready_fd>`.
+
+Reports the CPU spent booting on ready_fd, then blocks on go_fd. Once the
+server has written solution.py into the working directory and closed go_fd,
+the solution runs as __main__ in a fresh namespace, exactly as
+`python3 solution.py` would. Each worker runs one job and exits.
+"""
+import os
+import sys
+import traceback
+
+
+def main():
+    go_fd, ready_fd = int(sys.argv[1]), int(sys.argv[2])
+
+    times = os.times()
+    os.write(ready_fd, str(int((times.user + times.system) * 1000)).encode())
+    os.close(ready_fd)
+
+    os.read(go_fd, 1)
+    os.close(go_fd)
+
+    with open("solution.py") as f:
+        source = f.read()
+
+    sys.argv = ["solution.py"]
+    sys.path[0] = os.getcwd()
+    namespace = {"__name__": "__main__", "__file__": "solution.py", "__builtins__": __builtins__}
+    try:
+        code = compile(source, "solution.py", "exec")
+        exec(code, namespace)
+    except SystemExit:
+        raise
+    except BaseException as e:
+        # Same traceback a cold run prints — without this stub's frame
+        tb = None if isinstance(e, SyntaxError) else e.__traceback__.tb_next
+        traceback.print_exception(type(e), e, tb)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Standalone judge worker:
+
+    python -m app.execution_engine.worker [--jobs N] [--languages cpp,java]
+
+Claims submission, run and sample jobs from the judge_jobs table — the same
+Postgres queue the API's in-process workers use — advertises its languages
+and capacity in judge_workers, and heartbeats while it runs. Start as many
+as needed, on any host that reaches the database; with EXECUTION_MODE=remote
+and JUDGE_WORKERS=0 the API executes nothing itself.
+"""
+import argparse
+import asyncio
+import signal
+from app.execution_engine.languages import MAX_CONCURRENT_RUNS, LANGUAGE_CONFIG
+from app.execution_engine.warm_pool import warm_pool
+from app.execution_engine.jvm_pool import jvm_pool
+from app.execution_engine.container_pool import container_pool
+from app.execution_engine.pch import precompiled_headers
+from app.execution_engine.workdir_pool import workdir_pool
+
+
+def start_execution_engine():
+    """Start the sandbox pools this process executes with."""
+    workdir_pool.start()
+    precompiled_headers.start()
+    warm_pool.start()
+    jvm_pool.start()
+    container_pool.start()
+
+
+async def stop_execution_engine():
+    await warm_pool.stop()
+    await jvm_pool.stop()
+    await container_pool.stop()
+    workdir_pool.stop()
+
+
+async def run_worker(jobs: int, languages=None):
+    # Imported here: the services import the engine modules above
+    from app.core.database import engine
+    from app.services.judge_service import start_judge_workers, stop_judge_workers
+
+    start_execution_engine()
+    tasks = start_judge_workers(jobs, languages)
+    if not tasks:
+        await stop_execution_engine()
+        await engine.dispose()
+        return
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await stopping.wait()
+
+    print("[Worker] shutting down — returning claimed jobs to the queue")
+    await stop_judge_workers(tasks)
+    await stop_execution_engine()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CodeShield judge worker")
+    parser.add_argument(
+        "--jobs", type=int, default=max(1, MAX_CONCURRENT_RUNS // 2),
+        help="jobs judged at once (sandbox slots are shared between them)"
+    )
+    parser.add_argument(
+        "--languages",
+        help=f"comma-separated subset of {','.join(LANGUAGE_CONFIG)} (default: installed toolchains)"
+    )
+    args = parser.parse_args()
+    languages = None
+    if args.languages:
+        languages = [lang.strip() for lang in args.languages.split(",") if lang.strip() in LANGUAGE_CONFIG]
+    asyncio.run(run_worker(args.jobs, languages))
+
+
+if __name__ == "__main__":
+    main()
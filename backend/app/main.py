@@ -3,10 +3,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.core.database import engine, Base
+from app.models.submission import SUBMISSION_UPGRADE_DDL
+from app.models.judge_job import JUDGE_JOB_UPGRADE_DDL
+from app.models.rejudge_job import REJUDGE_JOB_UPGRADE_DDL
+from app.models.question import QUESTION_UPGRADE_DDL, TEST_SET_VERSION_DDL
 from app.models import (
     User, Test, Question, TestCase,
     Session, Submission, DetectionResult,
-    Ranking, KeystrokeEvent
+    Ranking, KeystrokeEvent, JudgeJob, RejudgeJob, JudgeWorker
 )
 # Import all routers
 from app.routers import auth
@@ -16,16 +20,41 @@ from app.routers import submissions
 from app.routers import monitoring
 from app.routers import rankings
 from app.routers import analytics
+from app.routers import rejudge
+from app.services.judge_service import start_judge_workers, stop_judge_workers
+from app.execution_engine.worker import start_execution_engine, stop_execution_engine
+
+# pg_advisory_xact_lock key held while startup creates and upgrades tables and triggers
+SCHEMA_LOCK_ID = 7270001
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: create tables if they don't exist
     async with engine.begin() as conn:
+        # Serialised, so API processes starting together don't race on the triggers
+        await conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({SCHEMA_LOCK_ID})")
         await conn.run_sync(Base.metadata.create_all)
+        # Columns added or changed since the database was created
+        for statement in (
+            SUBMISSION_UPGRADE_DDL + QUESTION_UPGRADE_DDL
+            + JUDGE_JOB_UPGRADE_DDL + REJUDGE_JOB_UPGRADE_DDL
+        ):
+            await conn.exec_driver_sql(statement)
+        for statement in TEST_SET_VERSION_DDL:
+            await conn.exec_driver_sql(statement)
     print("✅ Database tables verified")
+    # EXECUTION_MODE=remote with JUDGE_WORKERS=0: everything runs on
+    # app.execution_engine.worker processes, so no sandbox pools here
+    executes_locally = settings.EXECUTION_MODE != "remote" or settings.JUDGE_WORKERS > 0
+    if executes_locally:
+        start_execution_engine()
+    judge_tasks = start_judge_workers()
     yield
-    # Shutdown: dispose engine
+    # Shutdown: stop judge workers (claimed jobs are requeued by lease expiry), dispose engine
+    await stop_judge_workers(judge_tasks)
+    if executes_locally:
+        await stop_execution_engine()
     await engine.dispose()
     print("✅ Database connection closed")
 
@@ -95,4 +124,9 @@ app.include_router(
     analytics.router,
     prefix="/api/analytics",
     tags=["Analytics"]
+)
+app.include_router(
+    rejudge.router,
+    prefix="/api/rejudge",
+    tags=["Rejudge"]
 )
\ No newline at end of file
@@ -5,4 +5,7 @@ from app.models.session import Session
 from app.models.submission import Submission
 from app.models.detection import DetectionResult
 from app.models.ranking import Ranking
-from app.models.keystroke import KeystrokeEvent
\ No newline at end of file
+from app.models.keystroke import KeystrokeEvent
+from app.models.judge_job import JudgeJob
+from app.models.rejudge_job import RejudgeJob
+from app.models.judge_worker import JudgeWorker
@@ -0,0 +1,60 @@
+import uuid
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class JudgeJob(Base):
+    __tablename__ = "judge_jobs"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+    submission_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("submissions.id", ondelete="CASCADE"),
+        nullable=True,
+        unique=True
+    )
+    # "submission", or an interactive "run" / "samples" dispatched to a
+    # judge worker when the API executes nothing itself (payload holds the request)
+    kind = Column(String(20), nullable=False, default="submission")
+    # Workers only claim jobs in languages they advertise
+    language = Column(String(20), nullable=True, index=True)
+    # Index of the job's execution lane — lower is claimed first
+    priority = Column(Integer, nullable=False, default=0)
+    payload = Column(JSONB, nullable=True)
+    # queued -> running -> done | failed
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(100), nullable=True)
+    results = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed by the claiming worker's heartbeat; a stale one means it died
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationship
+    submission = relationship("Submission", back_populates="judge_job")
+
+
+# create_all() never alters existing tables, so columns added since the
+# queue was first created are added here. Idempotent — run at startup after
+# create_all (see main.py).
+JUDGE_JOB_UPGRADE_DDL = (
+    "ALTER TABLE judge_jobs ALTER COLUMN submission_id DROP NOT NULL",
+    "ALTER TABLE judge_jobs ADD COLUMN IF NOT EXISTS kind VARCHAR(20) NOT NULL DEFAULT 'submission'",
+    "ALTER TABLE judge_jobs ADD COLUMN IF NOT EXISTS language VARCHAR(20)",
+    "CREATE INDEX IF NOT EXISTS ix_judge_jobs_language ON judge_jobs (language)",
+    "ALTER TABLE judge_jobs ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE judge_jobs ADD COLUMN IF NOT EXISTS payload JSONB",
+    "ALTER TABLE judge_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE",
+)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+
+class JudgeWorker(Base):
+    """A process running judge workers — the API itself or app.execution_engine.worker."""
+    __tablename__ = "judge_workers"
+
+    # hostname:pid; its job claims use worker ids "<id>:<n>"
+    id = Column(String(100), primary_key=True)
+    hostname = Column(String(255), nullable=False)
+    pid = Column(Integer, nullable=False)
+    languages = Column(JSONB, nullable=False, default=list)
+    # Jobs it claims at once, and sandbox slots shared between them
+    capacity = Column(Integer, nullable=False, default=0)
+    slots = Column(Integer, nullable=False, default=0)
+    active_jobs = Column(Integer, nullable=False, default=0)
+    started_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
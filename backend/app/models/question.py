@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, Integer, BigInteger, Boolean, DateTime, ForeignKey, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -26,6 +26,15 @@ class Question(Base):
     examples = Column(JSONB, nullable=True)
     function_signature = Column(Text, nullable=True)
     driver_code = Column(Text, nullable=True)
+    # Output checker — see execution_engine/checker.py for the options
+    checker = Column(String(20), nullable=False, default="exact", server_default="exact")
+    checker_config = Column(JSONB, nullable=True)
+    # Base per-test time limit for C/C++ — other languages scale it (see languages.py).
+    # None keeps the flat default; set by hand or by app.execution_engine.calibrate
+    time_limit_ms = Column(Integer, nullable=True)
+    # Bumped by database triggers whenever test cases, driver, checker or time
+    # limit change, however they are edited — caches key on it (see TEST_SET_VERSION_DDL)
+    test_set_version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now()
@@ -59,11 +68,84 @@ class TestCase(Base):
     )
     input = Column(Text, nullable=False)
     expected_output = Column(Text, nullable=False)
+    # Set when the data lives in the test data store (see execution_engine/test_data.py);
+    # the Text column is then left empty
+    input_hash = Column(String(64), nullable=True)
+    input_size = Column(BigInteger, nullable=True)
+    output_hash = Column(String(64), nullable=True)
+    output_size = Column(BigInteger, nullable=True)
     is_hidden = Column(Boolean, default=False)
+    # Submissions that failed this case — fail-fast judging runs the most failed first.
+    # Not part of the test set version: it only changes the order cases run in
+    failure_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now()
     )
 
     # Relationships
-    question = relationship("Question", back_populates="test_cases")
\ No newline at end of file
+    question = relationship("Question", back_populates="test_cases")
+
+# create_all() never alters existing tables, so columns added since a
+# database was created are added here. Idempotent — run at startup after
+# create_all and before TEST_SET_VERSION_DDL, whose triggers use them.
+QUESTION_UPGRADE_DDL = (
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS checker VARCHAR(20) NOT NULL DEFAULT 'exact'",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS checker_config JSONB",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS test_set_version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE test_cases ADD COLUMN IF NOT EXISTS input_hash VARCHAR(64)",
+    "ALTER TABLE test_cases ADD COLUMN IF NOT EXISTS input_size BIGINT",
+    "ALTER TABLE test_cases ADD COLUMN IF NOT EXISTS output_hash VARCHAR(64)",
+    "ALTER TABLE test_cases ADD COLUMN IF NOT EXISTS output_size BIGINT",
+    "ALTER TABLE test_cases ADD COLUMN IF NOT EXISTS failure_count INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS time_limit_ms INTEGER",
+)
+
+# Keeps questions.test_set_version in step with everything a verdict depends
+# on, for edits made through the API and directly in the database alike.
+# failure_count is left out: it only changes the order cases run in.
+# Idempotent — run at startup after create_all (see main.py).
+TEST_SET_VERSION_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION bump_test_set_version_on_question() RETURNS trigger AS $$
+    BEGIN
+        NEW.test_set_version := OLD.test_set_version + 1;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS questions_test_set_version ON questions",
+    """
+    CREATE TRIGGER questions_test_set_version
+    BEFORE UPDATE OF driver_code, checker, checker_config, time_limit_ms ON questions
+    FOR EACH ROW
+    WHEN (
+        OLD.driver_code IS DISTINCT FROM NEW.driver_code
+        OR OLD.checker IS DISTINCT FROM NEW.checker
+        OR OLD.checker_config IS DISTINCT FROM NEW.checker_config
+        OR OLD.time_limit_ms IS DISTINCT FROM NEW.time_limit_ms
+    )
+    EXECUTE FUNCTION bump_test_set_version_on_question()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION bump_test_set_version_on_test_case() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            UPDATE questions SET test_set_version = test_set_version + 1 WHERE id = OLD.question_id;
+        END IF;
+        IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.question_id IS DISTINCT FROM OLD.question_id) THEN
+            UPDATE questions SET test_set_version = test_set_version + 1 WHERE id = NEW.question_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS test_cases_test_set_version ON test_cases",
+    """
+    CREATE TRIGGER test_cases_test_set_version
+    AFTER INSERT OR DELETE
+    OR UPDATE OF question_id, input, expected_output, input_hash, output_hash, is_hidden ON test_cases
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_test_set_version_on_test_case()
+    """,
+)
@@ -0,0 +1,55 @@
+import uuid
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class RejudgeJob(Base):
+    __tablename__ = "rejudge_jobs"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+    # Exactly one of question_id / test_id scopes the rejudge
+    question_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("questions.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    test_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("tests.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    created_by = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id"),
+        nullable=True
+    )
+    # queued -> running -> done | failed
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    total = Column(Integer, nullable=False, default=0)
+    # Submissions handled so far — a resumed job continues from here
+    processed = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)
+    # Submissions whose rejudge raised — they keep their old verdict; error has the last one
+    errored = Column(Integer, nullable=False, default=0, server_default="0")
+    worker_id = Column(String(100), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    # Refreshed after every batch; a stale one means the worker died
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# create_all() never alters existing tables, so columns added since the
+# table was first created are added here. Idempotent — run at startup after
+# create_all (see main.py).
+REJUDGE_JOB_UPGRADE_DDL = (
+    "ALTER TABLE rejudge_jobs ADD COLUMN IF NOT EXISTS errored INTEGER NOT NULL DEFAULT 0",
+)
@@ -30,7 +30,7 @@ class Submission(Base):
     )
     code = Column(Text, nullable=False)
     language = Column(String(30), nullable=False)
-    status = Column(String(20), default="pending")
+    status = Column(String(30), default="pending")
     runtime_ms = Column(Integer, nullable=True)
     memory_kb = Column(Integer, nullable=True)
     test_cases_passed = Column(Integer, default=0)
@@ -49,4 +49,19 @@ class Submission(Base):
         back_populates="submission",
         uselist=False,
         cascade="all, delete-orphan"
-    )
\ No newline at end of file
+    )
+    judge_job = relationship(
+        "JudgeJob",
+        back_populates="submission",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
+
+
+# create_all() never alters existing tables, so columns changed since a
+# database was created are brought up to date here. Idempotent — run at
+# startup after create_all (see main.py).
+SUBMISSION_UPGRADE_DDL = (
+    # Widened from VARCHAR(20) for memory_limit_exceeded / output_limit_exceeded
+    "ALTER TABLE submissions ALTER COLUMN status TYPE VARCHAR(30)",
+)
@@ -1,2 +1,81 @@
-from fastapi import APIRouter
-router = APIRouter()
\ No newline at end of file
+from fastapi import APIRouter, Depends
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.dependencies import get_current_admin
+from app.models.user import User
+from app.models.judge_job import JudgeJob
+from app.models.judge_worker import JudgeWorker
+from app.execution_engine.compiler import artifact_cache
+from app.execution_engine.warm_pool import warm_pool
+from app.execution_engine.jvm_pool import jvm_pool
+from app.execution_engine.container_pool import container_pool
+from app.execution_engine.workdir_pool import workdir_pool
+from app.execution_engine.verdict_cache import verdict_cache
+from app.execution_engine.test_set_cache import test_set_cache
+from app.execution_engine.scheduler import execution_scheduler
+from app.execution_engine.tracing import execution_traces
+
+router = APIRouter()
+
+
+@router.get("/engine")
+async def get_engine_metrics(
+    current_user: User = Depends(get_current_admin)
+):
+    """Execution engine counters for this server process."""
+    return {
+        "scheduler": execution_scheduler.stats(),
+        "compile": artifact_cache.stats(),
+        "verdicts": verdict_cache.stats(),
+        "test_sets": test_set_cache.stats(),
+        "warm_pool": {"hits": warm_pool.hits, "misses": warm_pool.misses},
+        "jvm_pool": {"hits": jvm_pool.hits, "misses": jvm_pool.misses},
+        "container_pool": {"hits": container_pool.hits, "misses": container_pool.misses},
+        "workdir_pool": {"leases": workdir_pool.leases, "overflows": workdir_pool.overflows},
+    }
+
+
+@router.get("/traces")
+async def get_execution_traces(
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Per-language latency histograms for each judging stage (queue_wait,
+    slot_wait, workdir, compile, run, checker, db_writeback, detection,
+    ranking, total) in this server process, plus its slowest jobs.
+    """
+    return execution_traces.stats()
+
+
+@router.get("/workers")
+async def get_judge_workers(
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Live judge worker processes and queued jobs per language."""
+    workers = (await db.execute(
+        select(JudgeWorker).order_by(JudgeWorker.started_at)
+    )).scalars().all()
+    queued = (await db.execute(
+        select(JudgeJob.language, func.count(JudgeJob.id))
+        .where(JudgeJob.status == "queued")
+        .group_by(JudgeJob.language)
+    )).all()
+    return {
+        "workers": [
+            {
+                "id": w.id,
+                "hostname": w.hostname,
+                "pid": w.pid,
+                "languages": w.languages,
+                "capacity": w.capacity,
+                "slots": w.slots,
+                "active_jobs": w.active_jobs,
+                "started_at": w.started_at,
+                "heartbeat_at": w.heartbeat_at,
+            }
+            for w in workers
+        ],
+        "queued": {language: count for language, count in queued},
+    }
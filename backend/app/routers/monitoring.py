@@ -11,6 +11,7 @@ from app.monitoring.event_processor import (
     get_violation_events,
     get_typing_stats
 )
+from app.services.submission_service import schedule_precompile
 from app.models.session import Session
 from app.models.user import User
 from sqlalchemy import select
@@ -69,6 +70,20 @@ async def websocket_endpoint(
             question_id = event.get("question_id")
             payload_data = event.get("payload", {})
 
+            # Opt-in editor snapshot on idle: compile ahead, never stored as an event
+            if event_type == "code_snapshot":
+                real_question_id = None
+                try:
+                    real_question_id = uuid.UUID(question_id)
+                except (ValueError, TypeError, AttributeError):
+                    pass
+                await manager.send_message(session_id, {
+                    "status": "received",
+                    "type": event_type,
+                    "precompiling": schedule_precompile(user_id, real_question_id, payload_data)
+                })
+                continue
+
             # Store event if it has a question_id OR is a known violation type
             VIOLATION_TYPES = {
                 "no_face", "multiple_faces", "tab_switch",
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Form, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, get_current_admin
 from app.schemas.test import QuestionCreate, QuestionResponse
-from app.services.test_service import create_question, get_questions_for_test
+from app.services.test_service import create_question, get_questions_for_test, add_test_case_files
 from app.models.user import User
 
 router = APIRouter()
@@ -28,7 +28,9 @@ async def add_question_to_test(
         "constraints": question.constraints,
         "examples": question.examples,
         "function_signature": question.function_signature,
-        "driver_code": question.driver_code
+        "driver_code": question.driver_code,
+        "checker": question.checker,
+        "time_limit_ms": question.time_limit_ms
     }
 
 
@@ -50,7 +52,37 @@ async def get_test_questions(
             "constraints": q.constraints,
             "examples": q.examples,
             "function_signature": q.function_signature,
-            "driver_code": q.driver_code
+            "driver_code": q.driver_code,
+            "checker": q.checker,
+            "time_limit_ms": q.time_limit_ms
         }
         for q in questions
-    ]
\ No newline at end of file
+    ]
+
+
+@router.post("/{question_id}/test-cases/upload")
+async def upload_test_case(
+    question_id: str,
+    input_file: UploadFile = File(...),
+    output_file: UploadFile = File(...),
+    is_hidden: bool = Form(True),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Add a test case from uploaded input/answer files (multipart, for data too large for JSON)."""
+    test_case = await add_test_case_files(
+        question_id,
+        input_file.file,
+        output_file.file,
+        is_hidden,
+        db
+    )
+    return {
+        "id": str(test_case.id),
+        "question_id": str(test_case.question_id),
+        "input_hash": test_case.input_hash,
+        "input_size": test_case.input_size,
+        "output_hash": test_case.output_hash,
+        "output_size": test_case.output_size,
+        "is_hidden": test_case.is_hidden
+    }
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.dependencies import get_current_admin
+from app.schemas.rejudge import RejudgeCreate, RejudgeResponse
+from app.services.rejudge_service import create_rejudge, get_rejudge, serialize_rejudge
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.post("/", response_model=RejudgeResponse)
+async def start_rejudge(
+    data: RejudgeCreate,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Re-run every submission of a question or test against its current test cases."""
+    job = await create_rejudge(data, current_user, db)
+    return serialize_rejudge(job)
+
+
+@router.get("/{job_id}", response_model=RejudgeResponse)
+async def get_rejudge_progress(
+    job_id: str,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    job = await get_rejudge(job_id, db)
+    return serialize_rejudge(job)
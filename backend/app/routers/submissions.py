@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
 from app.schemas.submission import SubmissionCreate, SubmissionResponse
-from app.services.submission_service import create_submission
+from app.services.submission_service import create_submission, get_submission
 from app.models.user import User
-from app.models.question import Question
+from app.services.execution_service import execute
+from app.execution_engine.scheduler import QueueFull
 from pydantic import BaseModel
 
 router = APIRouter()
 
 
+def queue_full_error(e: QueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": "2"}
+    )
+
+
 class RunRequest(BaseModel):
     code: str
     language: str
@@ -27,23 +36,16 @@ class RunSamplesRequest(BaseModel):
 async def run_code(
     data: RunRequest,
     current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Run code against a custom stdin input (no test cases, not scored).
     Used for the exam 'Run' button.
     """
-    from app.execution_engine.runner import run_custom_input
-    result = await run_custom_input(
-        code=data.code,
-        language=data.language,
-        custom_input=data.input
-    )
-    return {
-        "success": result["success"],
-        "output": result.get("output", ""),
-        "error": result.get("error", ""),
-        "runtime_ms": result.get("runtime_ms", 0),
-    }
+    try:
+        return await execute("run", data.model_dump(), str(current_user.id), db)
+    except QueueFull as e:
+        raise queue_full_error(e)
 
 
 @router.post("/run-samples")
@@ -56,72 +58,10 @@ async def run_sample_testcases(
     Run code against the visible (non-hidden) test cases for a question.
     No DB write, no ranking update — used for the 'Run' button in exam.
     """
-    from app.execution_engine.sandbox import run_code_in_sandbox
-    from app.execution_engine.runner import resolve_driver_code
-    from app.models.question import TestCase
-    from sqlalchemy import select
-
-    # Fetch only visible test cases
-    tc_result = await db.execute(
-        select(TestCase)
-        .where(
-            TestCase.question_id == data.question_id,
-            TestCase.is_hidden == False
-        )
-        .order_by(TestCase.created_at)
-    )
-    test_cases = tc_result.scalars().all()
-
-    q_result = await db.execute(
-        select(Question).where(Question.id == data.question_id)
-    )
-    question = q_result.scalar_one_or_none()
-
-    # Resolve once — same driver logic as the full submit runner
-    full_code = resolve_driver_code(question, data.language, data.code)
-
-    results = []
-    passed = 0
-    total = len(test_cases)
-
-    for tc in test_cases:
-        execution = await run_code_in_sandbox(
-            code=full_code,
-            language=data.language,
-            input_data=tc.input
-        )
-        if not execution["success"]:
-            err = execution["error"]
-            status = "time_limit_exceeded" if "Time Limit" in err else "runtime_error"
-            results.append({
-                "input": tc.input,
-                "expected": tc.expected_output,
-                "got": "",
-                "passed": False,
-                "error": err,
-                "status": status,
-            })
-        else:
-            actual = execution["output"].strip()
-            expected = tc.expected_output.strip()
-            ok = actual == expected
-            if ok:
-                passed += 1
-            results.append({
-                "input": tc.input,
-                "expected": expected,
-                "got": actual,
-                "passed": ok,
-                "error": "",
-                "status": "accepted" if ok else "wrong_answer",
-            })
-
-    return {
-        "passed": passed,
-        "total": total,
-        "results": results,
-    }
-
+    try:
+        return await execute("samples", data.model_dump(), str(current_user.id), db)
+    except QueueFull as e:
+        raise queue_full_error(e)
 
 
 @router.post("/{session_id}/submit", response_model=SubmissionResponse)
@@ -131,4 +71,16 @@ async def submit_code(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    return await create_submission(session_id, data, current_user, db)
\ No newline at end of file
+    return await create_submission(session_id, data, current_user, db)
+
+
+@router.get("/{submission_id}", response_model=SubmissionResponse)
+async def get_submission_status(
+    submission_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Poll a submission's verdict. Status stays 'pending' until a judge worker finishes it.
+    """
+    return await get_submission(submission_id, current_user, db)
\ No newline at end of file
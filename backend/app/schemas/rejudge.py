@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class RejudgeCreate(BaseModel):
+    question_id: Optional[str] = None
+    test_id: Optional[str] = None
+
+
+class RejudgeResponse(BaseModel):
+    id: str
+    question_id: Optional[str] = None
+    test_id: Optional[str] = None
+    status: str
+    total: int
+    processed: int
+    changed: int
+    errored: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
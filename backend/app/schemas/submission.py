@@ -29,6 +29,8 @@ class SubmissionResponse(BaseModel):
     test_cases_passed: int
     test_cases_total: int
     submitted_at: datetime
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
     results: Optional[List[TestCaseResult]] = None
 
     class Config:
@@ -19,6 +19,9 @@ class QuestionCreate(BaseModel):
     examples: Optional[list] = None
     function_signature: Optional[Dict[str, str]] = None
     driver_code: Optional[Dict[str, str]] = None
+    checker: str = "exact"
+    checker_config: Optional[Dict[str, Any]] = None
+    time_limit_ms: Optional[int] = None
     test_cases: List[TestCaseSchema] = []
 
 
@@ -33,6 +36,8 @@ class QuestionResponse(BaseModel):
     examples: Optional[list] = None
     function_signature: Optional[Dict[str, str]] = None
     driver_code: Optional[Dict[str, str]] = None
+    checker: str = "exact"
+    time_limit_ms: Optional[int] = None
 
     @field_validator("function_signature", "driver_code", mode="before")
     @classmethod
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.judge_job import JudgeJob
+from app.execution_engine.languages import EXECUTION_LANES, SUPPORTED_LANGUAGES
+from app.execution_engine.runner import run_custom_input, resolve_driver_code, run_test_cases
+from app.execution_engine.test_set_cache import test_set_cache
+from app.execution_engine.test_data import preview
+from app.execution_engine.scheduler import execution_scheduler
+from app.execution_engine.tracing import execution_traces
+
+def check_language(language: str):
+    """Refuse a language no judge could run, before anything is queued for it."""
+    if language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported language: {language}. Choose one of: {', '.join(SUPPORTED_LANGUAGES)}"
+        )
+
+
+async def _run_custom(payload: dict) -> dict:
+    result = await run_custom_input(
+        code=payload["code"],
+        language=payload["language"],
+        custom_input=payload.get("input", "")
+    )
+    return {
+        "success": result["success"],
+        "output": result.get("output", ""),
+        "error": result.get("error", ""),
+        "runtime_ms": result.get("runtime_ms", 0),
+        "memory_kb": result.get("memory_kb", 0),
+        "compile_ms": result.get("compile_ms", 0),
+    }
+
+
+async def _run_samples(payload: dict, owner: Optional[str], db: AsyncSession) -> dict:
+    # Visible test cases — from memory unless the test set changed
+    test_set = await test_set_cache.get(payload["question_id"], db)
+    test_cases = test_set.sample_cases if test_set else []
+
+    # Resolve once — same driver logic as the full submit runner
+    full_code = resolve_driver_code(test_set, payload["language"], payload["code"])
+
+    results = []
+    passed = 0
+    total = len(test_cases)
+
+    async with execution_scheduler.request(
+        "samples",
+        owner,
+        test_set.test_id if test_set else None
+    ):
+        executions = await run_test_cases(full_code, payload["language"], test_cases, test_set)
+
+    for tc, execution in zip(test_cases, executions):
+        if not execution["success"]:
+            err = execution["error"]
+            if execution.get("checker_error"):
+                tc_status = "internal_error"
+            elif "Time Limit" in err:
+                tc_status = "time_limit_exceeded"
+            elif "Memory Limit" in err:
+                tc_status = "memory_limit_exceeded"
+            elif "Output Limit" in err:
+                tc_status = "output_limit_exceeded"
+            else:
+                tc_status = "runtime_error"
+            results.append({
+                "input": preview(tc.input),
+                "expected": preview(tc.expected_output),
+                "got": "",
+                "passed": False,
+                "error": err,
+                "status": tc_status,
+            })
+        else:
+            ok = execution["passed"]
+            if ok:
+                passed += 1
+            results.append({
+                "input": preview(tc.input),
+                "expected": preview(tc.expected_output).strip(),
+                "got": execution["output"],
+                "passed": ok,
+                "error": "",
+                "status": "accepted" if ok else "wrong_answer",
+            })
+
+    return {
+        "passed": passed,
+        "total": total,
+        "results": results,
+    }
+
+
+async def run_locally(
+    kind: str,
+    payload: dict,
+    owner: Optional[str],
+    db: AsyncSession,
+    job_id: Optional[str] = None,
+    queue_wait_ms: Optional[float] = None
+) -> dict:
+    """Execute a run / samples request in this process. Raises QueueFull."""
+    with execution_traces.job(kind, payload["language"], job_id, queue_wait_ms):
+        if kind == "run":
+            async with execution_scheduler.request("run", owner):
+                return await _run_custom(payload)
+        return await _run_samples(payload, owner, db)
+
+
+async def run_remotely(kind: str, payload: dict, owner: str) -> dict:
+    """
+    Queue a run / samples request for the judge workers and wait for its
+    result. Admission (429s) still happens here, against this process's lanes.
+    """
+    async with execution_scheduler.request(kind, owner):
+        async with AsyncSessionLocal() as db:
+            job = JudgeJob(
+                kind=kind,
+                language=payload["language"],
+                priority=EXECUTION_LANES.index(kind),
+                payload=payload,
+                status="queued"
+            )
+            db.add(job)
+            await db.commit()
+            job_id = job.id
+
+        from app.services.judge_service import notify_workers
+        notify_workers()
+        try:
+            return await _wait_for_result(job_id)
+        finally:
+            # Interactive jobs are not kept once answered or abandoned
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(JudgeJob).where(JudgeJob.id == job_id))
+                await db.commit()
+
+
+async def _wait_for_result(job_id) -> dict:
+    deadline = time.monotonic() + settings.REMOTE_RUN_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        async with AsyncSessionLocal() as db:
+            job = (await db.execute(
+                select(JudgeJob).where(JudgeJob.id == job_id)
+            )).scalar_one_or_none()
+        if job and job.status == "done":
+            return job.results
+        if job is None or job.status == "failed":
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Execution failed: {job.error if job else 'job lost'}"
+            )
+        await asyncio.sleep(settings.REMOTE_RUN_POLL_SECONDS)
+
+    raise HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail="No judge worker picked up the request in time"
+    )
+
+
+async def execute(kind: str, payload: dict, owner: str, db: AsyncSession) -> dict:
+    """Run / samples request from the API — here or on a judge worker, per EXECUTION_MODE."""
+    check_language(payload["language"])
+    if settings.EXECUTION_MODE == "remote":
+        return await run_remotely(kind, payload, owner)
+    return await run_locally(kind, payload, owner, db)
+
+
+async def run_execution_job(job: JudgeJob, db: AsyncSession):
+    """Judge-worker side of run_remotely(). Never retried — the caller is waiting."""
+    values = {}
+    try:
+        # Per-user limits were applied by the API that queued it
+        from app.services.judge_service import queue_wait_ms
+        results = await run_locally(job.kind, job.payload, None, db, str(job.id), queue_wait_ms(job))
+        values.update(results=results, status="done")
+    except Exception as e:
+        await db.rollback()
+        print(f"[Execution error] job {job.id}: {e}")
+        values.update(status="failed", error=str(e))
+    values["finished_at"] = datetime.now(timezone.utc)
+    # A plain UPDATE: the API deletes the row if it stopped waiting
+    await db.execute(update(JudgeJob).where(JudgeJob.id == job.id).values(**values))
+    await db.commit()
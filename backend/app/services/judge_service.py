@@ -0,0 +1,432 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.judge_job import JudgeJob
+from app.models.rejudge_job import RejudgeJob
+from app.models.judge_worker import JudgeWorker
+from app.models.submission import Submission
+from app.models.session import Session
+from app.execution_engine.runner import run_submission
+from app.execution_engine.languages import LANGUAGE_CONFIG, MAX_CONCURRENT_RUNS, installed_languages
+from app.execution_engine.tracing import execution_traces, stage
+from app.services.rejudge_service import rejudge_worker
+from app.monitoring.websocket_manager import manager
+
+# Set when this process enqueues a job so idle workers skip the poll delay
+_job_available = asyncio.Event()
+
+
+def make_node_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def make_worker_id(index) -> str:
+    return f"{make_node_id()}:{index}"
+
+
+def supported_languages() -> List[str]:
+    """JUDGE_LANGUAGES if set, else every language whose toolchain is on PATH."""
+    if settings.JUDGE_LANGUAGES.strip():
+        return [
+            lang.strip() for lang in settings.JUDGE_LANGUAGES.split(",")
+            if lang.strip() in LANGUAGE_CONFIG
+        ]
+    return installed_languages()
+
+
+async def enqueue_submission(submission: Submission, db: AsyncSession) -> JudgeJob:
+    """Persist a judge job for a pending submission. Caller commits."""
+    job = JudgeJob(
+        submission_id=submission.id,
+        kind="submission",
+        language=submission.language,
+        priority=0,
+        status="queued"
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+def notify_workers():
+    _job_available.set()
+
+
+async def claim_next_job(worker_id: str, languages: List[str], db: AsyncSession) -> Optional[JudgeJob]:
+    """
+    Atomically claim the highest-priority, oldest queued job in one of languages.
+    SKIP LOCKED lets any number of workers, in any process, poll the same table.
+    """
+    result = await db.execute(
+        select(JudgeJob)
+        .where(JudgeJob.status == "queued", JudgeJob.language.in_(languages))
+        .order_by(JudgeJob.priority, JudgeJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalar_one_or_none()
+
+    if not job:
+        await db.rollback()
+        return None
+
+    job.status = "running"
+    job.worker_id = worker_id
+    job.claimed_at = datetime.now(timezone.utc)
+    job.heartbeat_at = job.claimed_at
+    job.attempts = (job.attempts or 0) + 1
+    await db.commit()
+    return job
+
+
+async def requeue_stale_jobs(db: AsyncSession) -> int:
+    """
+    Recover jobs whose worker died mid-run (crash, deploy, restart) — its
+    heartbeat stopped. Jobs past JUDGE_MAX_ATTEMPTS are failed instead of
+    retried forever. Also forgets judge worker processes that went silent.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.JUDGE_JOB_LEASE_SECONDS)
+    stale = (
+        JudgeJob.status == "running",
+        func.coalesce(JudgeJob.heartbeat_at, JudgeJob.claimed_at) < cutoff,
+    )
+
+    exhausted = select(JudgeJob.submission_id).where(
+        *stale, JudgeJob.attempts >= settings.JUDGE_MAX_ATTEMPTS
+    )
+    await db.execute(
+        update(Submission)
+        .where(Submission.id.in_(exhausted))
+        .values(status="internal_error")
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(JudgeJob)
+        .where(*stale, JudgeJob.attempts >= settings.JUDGE_MAX_ATTEMPTS)
+        .values(
+            status="failed",
+            error="Judge worker lease expired",
+            finished_at=datetime.now(timezone.utc)
+        )
+    )
+    result = await db.execute(
+        update(JudgeJob)
+        .where(*stale)
+        .values(status="queued", worker_id=None)
+    )
+    await db.execute(delete(JudgeWorker).where(JudgeWorker.heartbeat_at < cutoff))
+    await db.commit()
+    return result.rowcount or 0
+
+
+async def fail_unserved_jobs(db: AsyncSession) -> int:
+    """
+    Fail jobs queued for longer than the lease in a language no live judge
+    worker serves — otherwise they would stay queued, and their submissions
+    pending, forever. Skipped while no worker is registered at all, e.g.
+    during a restart.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=settings.JUDGE_JOB_LEASE_SECONDS)
+    advertised = (await db.execute(
+        select(JudgeWorker.languages).where(JudgeWorker.heartbeat_at >= cutoff)
+    )).scalars().all()
+    if not advertised:
+        return 0
+    served = set().union(*advertised)
+
+    unserved = (
+        JudgeJob.status == "queued",
+        JudgeJob.language.not_in(served),
+        JudgeJob.created_at < cutoff,
+    )
+    await db.execute(
+        update(Submission)
+        .where(Submission.id.in_(select(JudgeJob.submission_id).where(*unserved)))
+        .values(status="internal_error")
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        update(JudgeJob)
+        .where(*unserved)
+        .values(
+            status="failed",
+            error="No running judge worker supports this language",
+            finished_at=now
+        )
+    )
+    await db.commit()
+    return result.rowcount or 0
+
+
+def queue_wait_ms(job: JudgeJob) -> Optional[float]:
+    """Time a claimed job spent queued in the database."""
+    if job.created_at is None or job.claimed_at is None:
+        return None
+    return max((job.claimed_at - job.created_at).total_seconds() * 1000, 0)
+
+
+async def judge_job(job_id) -> Optional[Submission]:
+    """
+    Run a claimed job end to end: test cases, detection, rankings.
+    Uses its own DB session so nothing is held open by an HTTP request.
+    """
+    async with AsyncSessionLocal() as db:
+        job = (await db.execute(
+            select(JudgeJob).where(JudgeJob.id == job_id)
+        )).scalar_one_or_none()
+        if not job:
+            return None
+        if job.kind != "submission":
+            from app.services.execution_service import run_execution_job
+            await run_execution_job(job, db)
+            return None
+
+        submission = (await db.execute(
+            select(Submission).where(Submission.id == job.submission_id)
+        )).scalar_one_or_none()
+        if not submission:
+            job.status = "failed"
+            job.error = "Submission no longer exists"
+            job.finished_at = datetime.now(timezone.utc)
+            await db.commit()
+            return None
+
+        try:
+            with execution_traces.job(
+                "submission", submission.language, str(job.id), queue_wait_ms(job)
+            ) as trace:
+                execution_result = await run_submission(submission, db)
+                trace.outcome = execution_result["status"]
+
+                submission.status = execution_result["status"]
+                submission.test_cases_passed = execution_result["test_cases_passed"]
+                submission.test_cases_total = execution_result["test_cases_total"]
+                submission.runtime_ms = execution_result["runtime_ms"]
+                submission.memory_kb = execution_result["memory_kb"]
+                job.results = execution_result["results"]
+                with stage("db_writeback"):
+                    await db.flush()
+
+                # 1. Run AI/plagiarism detection (best-effort — never blocks ranking)
+                try:
+                    from app.services.analytics_service import run_detection
+                    with stage("detection"):
+                        await run_detection(str(submission.id), db)
+                except Exception as e:
+                    print(f"[Detection error — skipping, ranking will still run]: {e}")
+
+                # 2. Always recompute rankings after every submission
+                try:
+                    from app.services.ranking_service import compute_rankings
+                    with stage("ranking"):
+                        sess_result = await db.execute(
+                            select(Session).where(Session.id == submission.session_id)
+                        )
+                        sess = sess_result.scalar_one_or_none()
+                        if sess:
+                            await compute_rankings(str(sess.test_id), db)
+                            await db.flush()
+                except Exception as e:
+                    print(f"[Ranking error]: {e}")
+
+                job.status = "done"
+                job.error = None
+                job.finished_at = datetime.now(timezone.utc)
+                with stage("db_writeback"):
+                    await db.commit()
+
+        except Exception as e:
+            await db.rollback()
+            print(f"[Judge error] job {job_id}: {e}")
+            await db.refresh(job)
+            await db.refresh(submission)
+
+            # Leave it to the next worker unless it has failed too often
+            if job.attempts >= settings.JUDGE_MAX_ATTEMPTS:
+                job.status = "failed"
+                job.finished_at = datetime.now(timezone.utc)
+                submission.status = "internal_error"
+            else:
+                job.status = "queued"
+                job.worker_id = None
+            job.error = str(e)
+            await db.commit()
+
+    await notify_submission_result(submission)
+    return submission
+
+
+async def notify_submission_result(submission: Submission):
+    """Push the verdict to the candidate's monitoring socket, if it is on this process."""
+    if submission.status == "pending":
+        return
+    try:
+        await manager.send_message(str(submission.session_id), {
+            "status": "judged",
+            "type": "submission_result",
+            "submission_id": str(submission.id),
+            "question_id": str(submission.question_id),
+            "submission_status": submission.status,
+            "test_cases_passed": submission.test_cases_passed,
+            "test_cases_total": submission.test_cases_total,
+        })
+    except Exception as e:
+        print(f"[Judge notify error]: {e}")
+
+
+async def judge_worker(worker_id: str, languages: List[str]):
+    """Claim and judge jobs in languages until cancelled."""
+    while True:
+        try:
+            _job_available.clear()
+            async with AsyncSessionLocal() as db:
+                job = await claim_next_job(worker_id, languages, db)
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(
+                        _job_available.wait(),
+                        timeout=settings.JUDGE_POLL_INTERVAL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await judge_job(job.id)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Judge worker {worker_id} error]: {e}")
+            await asyncio.sleep(settings.JUDGE_POLL_INTERVAL_SECONDS)
+
+
+async def heartbeat(node_id: str, worker_ids: List[str], languages: List[str], capacity: int):
+    """
+    Advertise this process in judge_workers — languages, capacity, load —
+    and keep the jobs its workers hold from being presumed dead.
+    """
+    while True:
+        try:
+            now = datetime.now(timezone.utc)
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(JudgeJob)
+                    .where(JudgeJob.status == "running", JudgeJob.worker_id.in_(worker_ids))
+                    .values(heartbeat_at=now)
+                )
+                await db.execute(
+                    update(RejudgeJob)
+                    .where(RejudgeJob.status == "running", RejudgeJob.worker_id.in_(worker_ids))
+                    .values(heartbeat_at=now)
+                )
+                active = (await db.execute(
+                    select(func.count(JudgeJob.id))
+                    .where(JudgeJob.status == "running", JudgeJob.worker_id.in_(worker_ids))
+                )).scalar() or 0
+                await db.merge(JudgeWorker(
+                    id=node_id,
+                    hostname=socket.gethostname(),
+                    pid=os.getpid(),
+                    languages=languages,
+                    capacity=capacity,
+                    slots=MAX_CONCURRENT_RUNS,
+                    active_jobs=active,
+                    heartbeat_at=now
+                ))
+                await db.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Judge heartbeat error]: {e}")
+        await asyncio.sleep(settings.JUDGE_HEARTBEAT_SECONDS)
+
+
+async def stale_job_sweeper():
+    """Periodically requeue jobs abandoned by dead workers, and fail ones no worker can take."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                requeued = await requeue_stale_jobs(db)
+                unserved = await fail_unserved_jobs(db)
+            if requeued:
+                print(f"[Judge] requeued {requeued} stale job(s)")
+                notify_workers()
+            if unserved:
+                print(f"[Judge] failed {unserved} job(s) in languages no worker serves")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Judge sweeper error]: {e}")
+        await asyncio.sleep(max(settings.JUDGE_JOB_LEASE_SECONDS / 2, 1))
+
+
+def start_judge_workers(count: int = None, languages: List[str] = None) -> List[asyncio.Task]:
+    """
+    Start count judge workers claiming jobs in languages (default: those
+    installed here), plus the heartbeat that advertises them.
+    """
+    count = settings.JUDGE_WORKERS if count is None else count
+    if count <= 0:
+        return []
+    languages = supported_languages() if languages is None else languages
+    if not languages:
+        print("⚠️ No language toolchains found — not starting judge workers")
+        return []
+
+    worker_ids = [make_worker_id(i) for i in range(count)]
+    tasks = [asyncio.create_task(stale_job_sweeper(), name="judge-sweeper")]
+    for worker_id in worker_ids:
+        tasks.append(asyncio.create_task(judge_worker(worker_id, languages), name=worker_id))
+    # One rejudge at a time per process — they run in the lowest execution lane.
+    # A rejudge covers every language, so only processes that judge them all take one
+    if set(LANGUAGE_CONFIG) <= set(languages):
+        rejudge_id = make_worker_id("rejudge")
+        worker_ids.append(rejudge_id)
+        tasks.append(asyncio.create_task(rejudge_worker(rejudge_id), name=rejudge_id))
+    tasks.append(asyncio.create_task(
+        heartbeat(make_node_id(), worker_ids, languages, count),
+        name="judge-heartbeat"
+    ))
+    print(f"✅ Started {count} judge worker(s) for {', '.join(languages)}")
+    return tasks
+
+
+async def stop_judge_workers(tasks: List[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Give back jobs interrupted by shutdown instead of waiting for the lease to expire
+    worker_ids = [task.get_name() for task in tasks]
+    if not worker_ids:
+        return
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(JudgeJob)
+                .where(
+                    JudgeJob.status == "running",
+                    JudgeJob.worker_id.in_(worker_ids)
+                )
+                .values(status="queued", worker_id=None)
+            )
+            await db.execute(
+                update(RejudgeJob)
+                .where(
+                    RejudgeJob.status == "running",
+                    RejudgeJob.worker_id.in_(worker_ids)
+                )
+                .values(status="queued", worker_id=None)
+            )
+            await db.execute(delete(JudgeWorker).where(JudgeWorker.id == make_node_id()))
+            await db.commit()
+    except Exception as e:
+        print(f"[Judge shutdown error]: {e}")
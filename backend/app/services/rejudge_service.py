@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.rejudge_job import RejudgeJob
+from app.models.judge_job import JudgeJob
+from app.models.submission import Submission
+from app.models.session import Session
+from app.models.question import Question
+from app.models.test import Test
+from app.models.user import User
+from app.schemas.rejudge import RejudgeCreate
+from app.execution_engine.runner import run_submission
+from app.execution_engine.tracing import execution_traces
+
+# Set when this process creates a rejudge so the worker skips the poll delay
+_rejudge_available = asyncio.Event()
+
+
+def _scope_query(job: RejudgeJob):
+    """
+    Submissions a rejudge covers, in a fixed order: everything in its scope
+    submitted before it was created, so a resumed job sees the same list.
+    """
+    query = select(Submission).where(Submission.submitted_at <= job.created_at)
+    if job.question_id:
+        query = query.where(Submission.question_id == job.question_id)
+    else:
+        query = query.where(
+            Submission.session_id.in_(
+                select(Session.id).where(Session.test_id == job.test_id)
+            )
+        )
+    return query.order_by(Submission.submitted_at, Submission.id)
+
+
+async def create_rejudge(
+    data: RejudgeCreate,
+    current_user: User,
+    db: AsyncSession
+) -> RejudgeJob:
+    if bool(data.question_id) == bool(data.test_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give exactly one of question_id or test_id"
+        )
+
+    model = Question if data.question_id else Test
+    target = (await db.execute(
+        select(model).where(model.id == (data.question_id or data.test_id))
+    )).scalar_one_or_none()
+    if not target:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{model.__name__} not found"
+        )
+
+    job = RejudgeJob(
+        question_id=data.question_id,
+        test_id=data.test_id,
+        created_by=current_user.id,
+        created_at=datetime.now(timezone.utc),
+        status="queued"
+    )
+    job.total = (await db.execute(
+        select(func.count()).select_from(_scope_query(job).order_by(None).subquery())
+    )).scalar_one()
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    _rejudge_available.set()
+    return job
+
+
+async def get_rejudge(job_id: str, db: AsyncSession) -> RejudgeJob:
+    job = (await db.execute(
+        select(RejudgeJob).where(RejudgeJob.id == job_id)
+    )).scalar_one_or_none()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rejudge job not found"
+        )
+    return job
+
+
+def serialize_rejudge(job: RejudgeJob) -> dict:
+    return {
+        "id": str(job.id),
+        "question_id": str(job.question_id) if job.question_id else None,
+        "test_id": str(job.test_id) if job.test_id else None,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "changed": job.changed,
+        "errored": job.errored,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+async def claim_rejudge(worker_id: str, db: AsyncSession) -> Optional[RejudgeJob]:
+    """Claim the oldest queued rejudge, or one whose worker stopped heartbeating."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.JUDGE_JOB_LEASE_SECONDS)
+    job = (await db.execute(
+        select(RejudgeJob)
+        .where(
+            (RejudgeJob.status == "queued")
+            | ((RejudgeJob.status == "running") & (RejudgeJob.heartbeat_at < cutoff))
+        )
+        .order_by(RejudgeJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )).scalar_one_or_none()
+
+    if not job:
+        await db.rollback()
+        return None
+
+    job.status = "running"
+    job.worker_id = worker_id
+    job.heartbeat_at = datetime.now(timezone.utc)
+    await db.commit()
+    return job
+
+
+def _code_key(submission: Submission) -> tuple:
+    """Identifies a piece of code for one question and language."""
+    code_hash = hashlib.sha256(submission.code.encode("utf-8")).hexdigest()
+    return (submission.question_id, submission.language, code_hash)
+
+
+async def rejudge_batch(job: RejudgeJob, db: AsyncSession, verdicts: dict) -> int:
+    """
+    Rejudge the next REJUDGE_BATCH_SIZE submissions of job. Identical code
+    for the same question and language runs once per job: verdicts maps
+    _code_key() to the result of every piece judged so far, across batches.
+    A submission that cannot be rejudged is counted in job.errored and keeps
+    its verdict; the rest of the batch carries on. Returns how many were
+    handled.
+    """
+    submissions = (await db.execute(
+        _scope_query(job).offset(job.processed).limit(settings.REJUDGE_BATCH_SIZE)
+    )).scalars().all()
+
+    groups = {}
+    for submission in submissions:
+        # Still waiting for its first judging — the judge queue will handle it
+        if submission.status == "pending":
+            continue
+        groups.setdefault(_code_key(submission), []).append(submission)
+
+    changed = 0
+    errored = 0
+    for key, same_code in groups.items():
+        try:
+            # A failure undoes only this group's writes; it keeps its old verdict
+            async with db.begin_nested():
+                changed += await _rejudge_group(same_code, db, key, verdicts)
+        except Exception as e:
+            errored += len(same_code)
+            job.error = f"Submission {same_code[0].id}: {e}"
+            print(f"[Rejudge error] job {job.id}, submission {same_code[0].id}: {e}")
+
+    job.processed += len(submissions)
+    job.changed += changed
+    job.errored += errored
+    job.heartbeat_at = datetime.now(timezone.utc)
+    await db.commit()
+    return len(submissions)
+
+
+async def _rejudge_group(same_code: list, db: AsyncSession, key: tuple, verdicts: dict) -> int:
+    """
+    Store the verdict for one piece of code on every submission of it,
+    judging it only if no earlier batch of the job already did. Returns how
+    many changed.
+    """
+    changed = 0
+    result = verdicts.get(key)
+    if result is None:
+        # Full mode, lowest execution lane: live submissions go first
+        with execution_traces.job("rejudge", same_code[0].language, str(same_code[0].id)) as trace:
+            result = await run_submission(same_code[0], db, mode="full", lane="rejudge", rejudge=True)
+            trace.outcome = result["status"]
+        verdicts[key] = result
+    for submission in same_code:
+        if submission.status != result["status"]:
+            changed += 1
+        submission.status = result["status"]
+        submission.test_cases_passed = result["test_cases_passed"]
+        submission.test_cases_total = result["test_cases_total"]
+        submission.runtime_ms = result["runtime_ms"]
+        submission.memory_kb = result["memory_kb"]
+        await db.execute(
+            update(JudgeJob)
+            .where(JudgeJob.submission_id == submission.id)
+            .values(results=result["results"])
+        )
+    return changed
+
+
+async def run_rejudge(job_id):
+    """Work through a claimed rejudge batch by batch, then recompute rankings once."""
+    async with AsyncSessionLocal() as db:
+        job = await get_rejudge(job_id, db)
+        # Results by _code_key() for this run; a resumed job starts empty and re-judges
+        verdicts = {}
+        try:
+            while await rejudge_batch(job, db, verdicts):
+                await asyncio.sleep(settings.REJUDGE_BATCH_PAUSE_SECONDS)
+
+            test_id = job.test_id
+            if test_id is None:
+                test_id = (await db.execute(
+                    select(Question.test_id).where(Question.id == job.question_id)
+                )).scalar_one()
+            from app.services.ranking_service import compute_rankings
+            await compute_rankings(str(test_id), db)
+
+            job.status = "done"
+            job.finished_at = datetime.now(timezone.utc)
+            await db.commit()
+            print(
+                f"[Rejudge] job {job_id} done: {job.processed} submission(s), "
+                f"{job.changed} changed, {job.errored} errored"
+            )
+
+        except asyncio.CancelledError:
+            # Shutdown — another worker resumes from job.processed once the heartbeat goes stale
+            raise
+        except Exception as e:
+            await db.rollback()
+            print(f"[Rejudge error] job {job_id}: {e}")
+            await db.execute(
+                update(RejudgeJob)
+                .where(RejudgeJob.id == job_id)
+                .values(status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+            )
+            await db.commit()
+
+
+async def rejudge_worker(worker_id: str):
+    """Claim and run rejudge jobs, one at a time, until cancelled."""
+    while True:
+        try:
+            _rejudge_available.clear()
+            async with AsyncSessionLocal() as db:
+                job = await claim_rejudge(worker_id, db)
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(
+                        _rejudge_available.wait(),
+                        timeout=settings.JUDGE_POLL_INTERVAL_SECONDS * 10
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await run_rejudge(job.id)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Rejudge worker {worker_id} error]: {e}")
+            await asyncio.sleep(settings.JUDGE_POLL_INTERVAL_SECONDS)
@@ -1,12 +1,28 @@
+import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
 from app.models.submission import Submission
 from app.models.session import Session
 from app.models.question import Question
 from app.models.user import User
+from app.models.judge_job import JudgeJob
 from app.schemas.submission import SubmissionCreate
-from app.execution_engine.runner import run_submission
+from app.services.judge_service import enqueue_submission, notify_workers
+from app.services.execution_service import check_language
+from app.execution_engine.languages import (
+    LANGUAGE_CONFIG,
+    SPECULATIVE_COMPILE_ENABLED,
+    SPECULATIVE_MAX_CODE_KB,
+)
+from app.execution_engine.scheduler import execution_scheduler, QueueFull
+from app.execution_engine.test_set_cache import test_set_cache
+from app.execution_engine.runner import precompile
+
+# Running speculative compiles, referenced so they are not garbage-collected
+_precompile_tasks = set()
 
 
 async def create_submission(
@@ -48,6 +64,9 @@ async def create_submission(
             detail="Question not found"
         )
 
+    # Workers only claim languages they serve — an unknown one would stay pending
+    check_language(data.language)
+
     # Create submission record
     submission = Submission(
         session_id=session_id,
@@ -62,37 +81,38 @@ async def create_submission(
     await db.flush()
     await db.refresh(submission)
 
-    # Run code against test cases
-    execution_result = await run_submission(submission, db)
+    # Hand off to the judge queue — workers run test cases, detection and rankings
+    job = await enqueue_submission(submission, db)
+    await db.commit()
+    notify_workers()
 
-    # Update submission with results
-    submission.status = execution_result["status"]
-    submission.test_cases_passed = execution_result["test_cases_passed"]
-    submission.test_cases_total = execution_result["test_cases_total"]
-    submission.runtime_ms = execution_result["runtime_ms"]
+    return serialize_submission(submission, job)
 
-    await db.flush()
 
-    # 1. Run AI/plagiarism detection (best-effort — never blocks ranking)
-    try:
-        from app.services.analytics_service import run_detection
-        await run_detection(str(submission.id), db)
-    except Exception as e:
-        print(f"[Detection error — skipping, ranking will still run]: {e}")
+async def get_submission(
+    submission_id: str,
+    current_user: User,
+    db: AsyncSession
+) -> dict:
+    """Current verdict for a submission — polled by clients while it is judged."""
+    result = await db.execute(
+        select(Submission, JudgeJob)
+        .outerjoin(JudgeJob, JudgeJob.submission_id == Submission.id)
+        .where(Submission.id == submission_id)
+    )
+    row = result.first()
 
-    # 2. Always recompute rankings after every submission
-    try:
-        from app.services.ranking_service import compute_rankings
-        sess_result = await db.execute(
-            select(Session).where(Session.id == session_id)
+    if not row or (row[0].user_id != current_user.id and current_user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Submission not found"
         )
-        sess = sess_result.scalar_one_or_none()
-        if sess:
-            await compute_rankings(str(sess.test_id), db)
-            await db.flush()  # Ensure ranking rows are flushed before commit
-    except Exception as e:
-        print(f"[Ranking error]: {e}")
 
+    submission, job = row
+    return serialize_submission(submission, job)
+
+
+def serialize_submission(submission: Submission, job: JudgeJob = None) -> dict:
     return {
         "id": str(submission.id),
         "question_id": str(submission.question_id),
@@ -101,8 +121,51 @@ async def create_submission(
         "status": submission.status,
         "runtime_ms": submission.runtime_ms,
         "memory_kb": submission.memory_kb,
-        "test_cases_passed": submission.test_cases_passed,
-        "test_cases_total": submission.test_cases_total,
+        "test_cases_passed": submission.test_cases_passed or 0,
+        "test_cases_total": submission.test_cases_total or 0,
         "submitted_at": submission.submitted_at,
-        "results": execution_result["results"]
-    }
\ No newline at end of file
+        "job_id": str(job.id) if job else None,
+        "job_status": job.status if job else None,
+        "results": job.results if job else None
+    }
+
+
+async def precompile_snapshot(user_id: str, question_id: str, code: str, language: str):
+    """Compile an editor snapshot in the lowest lane; dropped if that lane is busy."""
+    try:
+        async with AsyncSessionLocal() as db:
+            test_set = await test_set_cache.get(question_id, db)
+        if test_set is None:
+            return
+        async with execution_scheduler.request("speculative", user_id, test_set.test_id):
+            await precompile(code, language, test_set)
+    except QueueFull:
+        # Already compiling this user's previous snapshot — the next idle event retries
+        pass
+    except Exception as e:
+        print(f"[Precompile error] question {question_id}: {e}")
+
+
+def schedule_precompile(user_id: str, question_id, payload: dict) -> bool:
+    """
+    Start compiling the code an editor sent when it went idle, so a Run or
+    Submit of the same code finds the build in the artifact cache. Only
+    compiled languages are worth it. Returns whether a compile was started.
+    """
+    if not SPECULATIVE_COMPILE_ENABLED or settings.EXECUTION_MODE == "remote":
+        # Judge workers have their own artifact caches
+        return False
+    if not question_id or not isinstance(payload, dict):
+        return False
+    code = payload.get("code")
+    language = payload.get("language")
+    config = LANGUAGE_CONFIG.get(language)
+    if not isinstance(code, str) or not config or not config["compile_cmd"]:
+        return False
+    if len(code.encode()) > SPECULATIVE_MAX_CODE_KB * 1024:
+        return False
+
+    task = asyncio.create_task(precompile_snapshot(user_id, question_id, code, language))
+    _precompile_tasks.add(task)
+    task.add_done_callback(_precompile_tasks.discard)
+    return True
@@ -1,14 +1,33 @@
+import asyncio
+from typing import BinaryIO, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
+from app.core.config import settings
 from app.models.test import Test
 from app.models.question import Question, TestCase
 from app.models.user import User
 from app.schemas.test import TestCreate, QuestionCreate
+from app.execution_engine.languages import (
+    TEST_DATA_INLINE_MAX_KB,
+    MIN_TIME_LIMIT_MS,
+    MAX_TIME_LIMIT_SECONDS,
+)
+from app.execution_engine.test_data import test_data_store
 import uuid
 
 
+def _check_time_limit(time_limit_ms: Optional[int]):
+    if time_limit_ms is not None and not (
+        MIN_TIME_LIMIT_MS <= time_limit_ms <= MAX_TIME_LIMIT_SECONDS * 1000
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"time_limit_ms must be between {MIN_TIME_LIMIT_MS} and {MAX_TIME_LIMIT_SECONDS * 1000}"
+        )
+
+
 async def create_test(
     data: TestCreate,
     current_user: User,
@@ -73,7 +92,29 @@ async def create_question(
         )
 
     import json
-    
+    from app.execution_engine.checker import CheckerError, compile_custom_checker, validate_checker
+
+    try:
+        validate_checker(data.checker, data.checker_config)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # Build a custom checker now so a broken one is rejected here, not at
+    # judge time. With remote execution the API has no compilers to try it.
+    if data.checker == "custom" and settings.EXECUTION_MODE != "remote":
+        try:
+            await compile_custom_checker(data.checker_config)
+        except CheckerError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Custom checker failed to compile: {e}"
+            )
+
+    _check_time_limit(data.time_limit_ms)
+
     # Create question
     new_question = Question(
         test_id=test_id,
@@ -84,14 +125,17 @@ async def create_question(
         constraints=data.constraints,
         examples=data.examples,
         function_signature=json.dumps(data.function_signature) if data.function_signature else None,
-        driver_code=json.dumps(data.driver_code) if data.driver_code else None
+        driver_code=json.dumps(data.driver_code) if data.driver_code else None,
+        checker=data.checker,
+        checker_config=data.checker_config,
+        time_limit_ms=data.time_limit_ms
     )
 
     db.add(new_question)
     await db.flush()
     await db.refresh(new_question)
 
-    # Create test cases
+    # Create test cases — large data goes to the test data store, not the row
     for tc in data.test_cases:
         new_tc = TestCase(
             question_id=new_question.id,
@@ -99,6 +143,7 @@ async def create_question(
             expected_output=tc.expected_output,
             is_hidden=tc.is_hidden
         )
+        _offload_test_data(new_tc)
         db.add(new_tc)
 
     await db.flush()
@@ -115,4 +160,73 @@ async def get_questions_for_test(
         .where(Question.test_id == test_id)
         .order_by(Question.order_index)
     )
-    return result.scalars().all()
\ No newline at end of file
+    return result.scalars().all()
+
+
+def _offload_test_data(test_case: TestCase):
+    """Move a test case's input/answer into the test data store if it is too big for the row."""
+    for column, hash_column, size_column in (
+        ("input", "input_hash", "input_size"),
+        ("expected_output", "output_hash", "output_size"),
+    ):
+        data = getattr(test_case, column).encode("utf-8")
+        if len(data) > TEST_DATA_INLINE_MAX_KB * 1024:
+            digest, size = test_data_store.put_bytes(data)
+            setattr(test_case, hash_column, digest)
+            setattr(test_case, size_column, size)
+            setattr(test_case, column, "")
+
+
+async def add_test_case_files(
+    question_id: str,
+    input_file: BinaryIO,
+    output_file: BinaryIO,
+    is_hidden: bool,
+    db: AsyncSession
+) -> TestCase:
+    """Add a test case whose input and answer are uploaded files, kept in the test data store."""
+    result = await db.execute(
+        select(Question).where(Question.id == question_id)
+    )
+    question = result.scalar_one_or_none()
+
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found"
+        )
+
+    # Hashing and copying tens of MB would stall the event loop
+    loop = asyncio.get_running_loop()
+    input_hash, input_size = await loop.run_in_executor(None, test_data_store.put_stream, input_file)
+    output_hash, output_size = await loop.run_in_executor(None, test_data_store.put_stream, output_file)
+
+    new_tc = TestCase(
+        question_id=question.id,
+        input="",
+        expected_output="",
+        input_hash=input_hash,
+        input_size=input_size,
+        output_hash=output_hash,
+        output_size=output_size,
+        is_hidden=is_hidden
+    )
+    # The insert bumps the question's test_set_version (see TEST_SET_VERSION_DDL)
+    db.add(new_tc)
+    await db.flush()
+    await db.refresh(new_tc)
+
+    return new_tc
+
+
+async def set_time_limit(question_id, time_limit_ms: Optional[int], db: AsyncSession):
+    """
+    Set a question's base time limit (None for the default). Caller commits.
+    A changed limit bumps the test set version in the database.
+    """
+    _check_time_limit(time_limit_ms)
+    await db.execute(
+        update(Question)
+        .where(Question.id == question_id)
+        .values(time_limit_ms=time_limit_ms)
+    )
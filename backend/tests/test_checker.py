@@ -0,0 +1,150 @@
+import mmap
+import shutil
+
+import pytest
+
+from app.execution_engine.checker import (
+    CheckerError,
+    check_exact,
+    check_float,
+    check_output,
+    check_tokens,
+    check_unordered_lines,
+    compile_custom_checker,
+    validate_checker,
+)
+from app.execution_engine.output import decode_trimmed, outputs_match, trim_bounds
+
+
+def test_outputs_match_ignores_surrounding_whitespace():
+    assert outputs_match(b"  42\n", "42")
+    assert outputs_match(b"1 2\n3\r\n", b"\n1 2\n3")
+    assert outputs_match(b"", "  \n")
+
+
+def test_outputs_match_keeps_inner_whitespace():
+    assert not outputs_match(b"1  2", "1 2")
+    assert not outputs_match(b"1\n2", "1 2")
+    assert not outputs_match(b"42", "421")
+    assert not outputs_match(b"43", "42")
+
+
+def test_outputs_match_reads_mapped_answers():
+    # File-backed expected outputs arrive memory-mapped (see test_data.py)
+    with mmap.mmap(-1, 6) as expected:
+        expected.write(b"  ok \n")
+        assert outputs_match(bytearray(b"ok\n"), expected)
+        assert not outputs_match(b"ok!", expected)
+        assert check_tokens(b"ok", expected, {})
+
+
+def test_trim_bounds_and_decode_trimmed():
+    assert trim_bounds(b"\t ab c \n") == (2, 6)
+    start, end = trim_bounds(b" \n ")
+    assert start == end
+    assert decode_trimmed(b"  caf\xc3\xa9\n") == "café"
+
+
+def test_exact_checker():
+    assert check_exact(b"YES\n", b"YES", {})
+    assert not check_exact(b"yes", b"YES", {})
+
+
+def test_tokens_checker_ignores_whitespace_layout():
+    assert check_tokens(b"1   2\n\n3 ", b"1 2 3", {})
+    assert not check_tokens(b"1 2", b"1 2 3", {})
+    assert not check_tokens(b"1 2 3 4", b"1 2 3", {})
+    assert not check_tokens(b"1 3 2", b"1 2 3", {})
+
+
+def test_float_checker_uses_absolute_or_relative_error():
+    assert check_float(b"0.3333333", b"0.333333333", {})
+    assert check_float(b"1000001", b"1000000", {"epsilon": 1e-6})
+    assert not check_float(b"1000010", b"1000000", {"epsilon": 1e-6})
+    assert check_float(b"1.05", b"1.0", {"epsilon": 0.1})
+    assert not check_float(b"1.2", b"1.0", {"epsilon": 0.1})
+
+
+def test_float_checker_compares_words_and_nan_exactly():
+    assert check_float(b"YES 1.0", b"YES 1.0000000001", {})
+    assert not check_float(b"NO 1.0", b"YES 1.0", {})
+    assert check_float(b"nan", b"nan", {})
+    assert not check_float(b"nan", b"0", {})
+    assert not check_float(b"1.0", b"1.0 2.0", {})
+
+
+def test_unordered_lines_checker():
+    assert check_unordered_lines(b"b\na  \nc\n", b"a\nb\nc", {})
+    assert not check_unordered_lines(b"a\na\nb", b"a\nb\nb", {})
+    assert not check_unordered_lines(b"a b\nc", b"a\nb c", {})
+
+
+@pytest.mark.parametrize("checker, config", [
+    ("exact", None),
+    ("tokens", {}),
+    ("float", {"epsilon": 0}),
+    ("float", {"epsilon": "1e-3"}),
+    ("custom", {"language": "python3", "code": "print(0)"}),
+])
+def test_validate_checker_accepts(checker, config):
+    validate_checker(checker, config)
+
+
+@pytest.mark.parametrize("checker, config", [
+    ("regex", None),
+    ("float", {"epsilon": "close"}),
+    ("float", {"epsilon": -1}),
+    ("float", {"epsilon": float("nan")}),
+    ("custom", {"language": "cobol", "code": "x"}),
+    ("custom", {"language": "python3"}),
+])
+def test_validate_checker_rejects(checker, config):
+    with pytest.raises(ValueError):
+        validate_checker(checker, config)
+
+
+def run(coro):
+    import asyncio
+    return asyncio.run(coro)
+
+
+def test_check_output_defaults_to_exact():
+    assert run(check_output(None, None, "", b"1 2\n", "1 2"))
+    assert not run(check_output(None, None, "", b"1  2", "1 2"))
+
+
+def test_check_output_uses_question_checker():
+    assert run(check_output("tokens", None, "", b"1  2", "1 2"))
+    assert run(check_output("float", {"epsilon": 0.5}, "", b"1.2", "1"))
+
+
+def test_check_output_compares_large_outputs_off_the_loop():
+    expected = b"7 " * 600_000
+    assert run(check_output("tokens", {}, "", expected.replace(b" ", b"\n"), expected))
+    assert not run(check_output("tokens", {}, "", expected + b"8", expected))
+
+
+def custom(code, language="python3"):
+    return {"language": language, "code": code}
+
+
+def test_custom_checker_judges_by_exit_code():
+    same = "import sys; sys.exit(open('output.txt').read() != open('answer.txt').read())"
+    assert run(check_output("custom", custom(same), "1", b"2", b"2"))
+    assert not run(check_output("custom", custom(same), "1", b"3", b"2"))
+    assert not run(check_output("custom", custom("raise SystemExit(2)"), "1", b"2", b"2"))
+
+
+def test_crashing_custom_checker_gives_no_verdict():
+    with pytest.raises(CheckerError):
+        run(check_output("custom", custom("import os; os.abort()"), "1", b"2", b"2"))
+
+
+@pytest.mark.skipif(not shutil.which("g++"), reason="needs g++")
+def test_broken_custom_checker_fails_to_compile():
+    broken = custom("int main() { return x; }", "cpp")
+    with pytest.raises(CheckerError):
+        run(compile_custom_checker(broken))
+    with pytest.raises(CheckerError):
+        run(check_output("custom", broken, "1", b"2", b"2"))
+    run(compile_custom_checker(custom("int main() { return 0; }", "cpp")))
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+# submission_service pulls in the API settings, models and database engine
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("asyncpg")
+pytest.importorskip("pydantic_settings")
+os.environ.setdefault("DATABASE_URL", "postgresql://codeshield@localhost/codeshield")
+os.environ.setdefault("JWT_SECRET", "test")
+
+from app.services import submission_service  # noqa: E402
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """Records the snapshots schedule_precompile() starts compiling."""
+    started = []
+
+    async def precompile_snapshot(user_id, question_id, code, language):
+        started.append((user_id, question_id, code, language))
+
+    monkeypatch.setattr(submission_service, "precompile_snapshot", precompile_snapshot)
+    monkeypatch.setattr(submission_service, "SPECULATIVE_COMPILE_ENABLED", True)
+    monkeypatch.setattr(submission_service.settings, "EXECUTION_MODE", "local")
+    return started
+
+
+def schedule(question_id, payload):
+    async def scenario():
+        scheduled = submission_service.schedule_precompile("u1", question_id, payload)
+        await asyncio.gather(*submission_service._precompile_tasks)
+        return scheduled
+
+    return asyncio.run(scenario())
+
+
+def test_editor_snapshot_is_compiled(compiled):
+    question_id = uuid.uuid4()
+    assert schedule(question_id, {"code": "int main() {}", "language": "cpp"})
+    assert compiled == [("u1", question_id, "int main() {}", "cpp")]
+
+
+@pytest.mark.parametrize("payload", [
+    {"code": "print(1)", "language": "python3"},
+    {"code": "int main() {}", "language": "cobol"},
+    {"code": None, "language": "cpp"},
+    {"code": "x" * (submission_service.SPECULATIVE_MAX_CODE_KB * 1024 + 1), "language": "cpp"},
+    "int main() {}",
+])
+def test_snapshots_not_worth_compiling_are_ignored(compiled, payload):
+    assert not schedule(uuid.uuid4(), payload)
+    assert compiled == []
+
+
+def test_snapshot_without_question_is_ignored(compiled):
+    assert not schedule(None, {"code": "int main() {}", "language": "cpp"})
+    assert compiled == []
+
+
+def test_remote_execution_leaves_compiling_to_workers(compiled, monkeypatch):
+    monkeypatch.setattr(submission_service.settings, "EXECUTION_MODE", "remote")
+    assert not schedule(uuid.uuid4(), {"code": "int main() {}", "language": "cpp"})
+    assert compiled == []
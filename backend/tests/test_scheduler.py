@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+
+from app.execution_engine import scheduler as scheduler_module
+from app.execution_engine.scheduler import ExecutionScheduler, QueueFull
+
+
+async def settle():
+    """Let every started task run until it blocks."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class Holder:
+    """Runs one sandbox slot's worth of work that lasts until release()."""
+
+    def __init__(self, scheduler, order, name, lane, owner=None, group=None):
+        self.done = asyncio.Event()
+        self.task = asyncio.create_task(self._run(scheduler, order, name, lane, owner, group))
+
+    async def _run(self, scheduler, order, name, lane, owner, group):
+        async with scheduler.request(lane, owner=owner, group=group):
+            async with scheduler.slot():
+                order.append(name)
+                await self.done.wait()
+
+    def release(self):
+        self.done.set()
+
+
+async def finish(*holders):
+    for holder in holders:
+        holder.release()
+    await asyncio.gather(*(holder.task for holder in holders))
+
+
+def test_free_slot_is_granted_at_once():
+    async def scenario():
+        scheduler = ExecutionScheduler(2)
+        order = []
+        a = Holder(scheduler, order, "a", "run")
+        b = Holder(scheduler, order, "b", "rejudge")
+        await settle()
+        assert order == ["a", "b"]
+        assert scheduler.free == 0
+        await finish(a, b)
+        assert scheduler.free == 2
+
+    asyncio.run(scenario())
+
+
+def test_freed_slot_goes_to_highest_lane():
+    async def scenario():
+        scheduler = ExecutionScheduler(1)
+        order = []
+        blocker = Holder(scheduler, order, "blocker", "run")
+        await settle()
+
+        waiters = [
+            Holder(scheduler, order, lane, lane, owner=lane)
+            for lane in ("speculative", "rejudge", "run", "samples", "submit")
+        ]
+        await settle()
+        assert order == ["blocker"]
+        assert scheduler.stats()["lanes"]["speculative"]["waiting"] == 1
+
+        blocker.release()
+        for waiter in reversed(waiters):
+            await settle()
+            waiter.release()
+        await finish(blocker, *waiters)
+        assert order == ["blocker", "submit", "samples", "run", "rejudge", "speculative"]
+
+    asyncio.run(scenario())
+
+
+def test_lane_slot_goes_to_least_running_group_then_owner():
+    async def scenario():
+        scheduler = ExecutionScheduler(2)
+        order = []
+        busy = Holder(scheduler, order, "busy", "submit", owner="u1", group="t1")
+        other = Holder(scheduler, order, "other", "submit", owner="u2", group="t2")
+        await settle()
+
+        # Same lane: t1 already holds a slot, t3 none — t3 goes first despite arriving later
+        same_group = Holder(scheduler, order, "same_group", "submit", owner="u1", group="t1")
+        new_group = Holder(scheduler, order, "new_group", "submit", owner="u3", group="t3")
+        await settle()
+
+        other.release()
+        await settle()
+        assert order[-1] == "new_group"
+
+        new_group.release()
+        await settle()
+        assert order[-1] == "same_group"
+        await finish(busy, other, same_group, new_group)
+
+    asyncio.run(scenario())
+
+
+def test_equal_waiters_are_served_in_arrival_order():
+    async def scenario():
+        scheduler = ExecutionScheduler(1)
+        order = []
+        blocker = Holder(scheduler, order, "blocker", "rejudge")
+        await settle()
+        first = Holder(scheduler, order, "first", "rejudge")
+        second = Holder(scheduler, order, "second", "rejudge")
+        await settle()
+
+        blocker.release()
+        await settle()
+        first.release()
+        await finish(blocker, first, second)
+        assert order == ["blocker", "first", "second"]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = ExecutionScheduler(1)
+        order = []
+        blocker = Holder(scheduler, order, "blocker", "run")
+        await settle()
+        gone = Holder(scheduler, order, "gone", "submit")
+        await settle()
+
+        gone.task.cancel()
+        await settle()
+        assert scheduler.stats()["lanes"]["submit"]["waiting"] == 0
+        await finish(blocker)
+        assert scheduler.free == 1
+        assert order == ["blocker"]
+
+    asyncio.run(scenario())
+
+
+def test_per_user_limit_rejects_extra_requests():
+    async def scenario():
+        scheduler = ExecutionScheduler(1)
+        async with scheduler.request("speculative", owner="u1"):
+            with pytest.raises(QueueFull):
+                async with scheduler.request("speculative", owner="u1"):
+                    pass
+            # Other users, and the same user in another lane, are unaffected
+            async with scheduler.request("speculative", owner="u2"):
+                pass
+            async with scheduler.request("run", owner="u1"):
+                pass
+        async with scheduler.request("speculative", owner="u1"):
+            pass
+        assert scheduler.lane_metrics["speculative"]["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_lane_queue_limit_rejects_when_full(monkeypatch):
+    monkeypatch.setitem(scheduler_module.LANE_QUEUE_LIMITS, "run", 2)
+
+    async def scenario():
+        scheduler = ExecutionScheduler(1)
+        async with scheduler.request("run", owner="a"), scheduler.request("run", owner="b"):
+            with pytest.raises(QueueFull):
+                async with scheduler.request("run", owner="c"):
+                    pass
+        async with scheduler.request("run", owner="c"):
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_unknown_lane_is_refused():
+    async def scenario():
+        with pytest.raises(ValueError):
+            async with ExecutionScheduler(1).request("urgent"):
+                pass
+
+    asyncio.run(scenario())
@@ -0,0 +1,116 @@
+import io
+import mmap
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# Imported by module: pytest would try to collect a Test* class as tests
+from app.execution_engine import test_data
+
+
+@pytest.fixture
+def store(tmp_path):
+    return test_data.TestDataStore(str(tmp_path / "test_data"))
+
+
+def stored_files(store):
+    return sorted(
+        name for _, _, names in os.walk(store.root) for name in names
+    )
+
+
+def test_put_bytes_lays_files_out_by_hash(store):
+    digest, size = store.put_bytes(b"1 2 3\n")
+    assert size == 6
+    assert len(digest) == 64
+    path = store.path(digest)
+    assert path == os.path.join(store.root, digest[:2], digest)
+    with open(path, "rb") as f:
+        assert f.read() == b"1 2 3\n"
+    # Published files are never rewritten in place
+    assert not os.stat(path).st_mode & 0o222
+
+
+def test_put_stream_hashes_like_put_bytes(store, monkeypatch):
+    # Small chunks so the upload is copied in several pieces
+    monkeypatch.setattr(test_data, "CHUNK_BYTES", 7)
+    data = bytes(range(256)) * 10
+    assert store.put_stream(io.BytesIO(data)) == store.put_bytes(data)
+
+
+def test_identical_content_is_stored_once(store):
+    first = store.put_stream(io.BytesIO(b"same answer"))
+    second = store.put_bytes(b"same answer")
+    third = store.put_stream(io.BytesIO(b"same answer"))
+    other = store.put_bytes(b"other answer")
+
+    assert first == second == third
+    assert other[0] != first[0]
+    assert stored_files(store) == sorted([first[0], other[0]])
+
+
+def test_open_maps_stored_file(store):
+    digest, _ = store.put_bytes(b"x" * 100_000)
+    data = store.open(digest)
+    assert isinstance(data, mmap.mmap)
+    assert len(data) == 100_000
+    assert data[:3] == b"xxx"
+    assert test_data.preview(data) == "[100000 bytes of test data]"
+    data.close()
+
+
+def test_open_empty_file(store):
+    digest, size = store.put_bytes(b"")
+    assert size == 0
+    assert store.open(digest) == b""
+
+
+def test_failed_upload_leaves_nothing_behind(store):
+    class Broken(io.RawIOBase):
+        def read(self, n=-1):
+            raise OSError("connection reset")
+
+    with pytest.raises(OSError):
+        store.put_stream(Broken())
+    assert stored_files(store) == []
+
+
+def offload(store, monkeypatch, input_data, expected_output):
+    # test_service imports the models, and with them SQLAlchemy
+    pytest.importorskip("sqlalchemy")
+    from app.services import test_service
+
+    monkeypatch.setattr(test_service, "test_data_store", store)
+    test_case = SimpleNamespace(
+        input=input_data,
+        expected_output=expected_output,
+        input_hash=None,
+        input_size=None,
+        output_hash=None,
+        output_size=None,
+    )
+    test_service._offload_test_data(test_case)
+    return test_case
+
+
+def test_small_test_data_stays_inline(store, monkeypatch):
+    from app.execution_engine.languages import TEST_DATA_INLINE_MAX_KB
+
+    at_limit = "1" * (TEST_DATA_INLINE_MAX_KB * 1024)
+    test_case = offload(store, monkeypatch, at_limit, "2")
+    assert test_case.input == at_limit
+    assert test_case.input_hash is None and test_case.output_hash is None
+    assert stored_files(store) == []
+
+
+def test_large_test_data_is_offloaded(store, monkeypatch):
+    from app.execution_engine.languages import TEST_DATA_INLINE_MAX_KB
+
+    large = "7" * (TEST_DATA_INLINE_MAX_KB * 1024 + 1)
+    test_case = offload(store, monkeypatch, large, "7")
+    assert test_case.input == ""
+    assert test_case.input_size == len(large)
+    assert test_case.expected_output == "7"
+    assert test_case.output_hash is None
+    assert bytes(store.open(test_case.input_hash)) == large.encode()
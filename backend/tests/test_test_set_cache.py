@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# TestSetCache reads questions through SQLAlchemy
+pytest.importorskip("sqlalchemy")
+
+from app.execution_engine import test_set_cache  # noqa: E402
+from app.execution_engine.verdict_cache import verdict_key  # noqa: E402
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.value)
+
+
+class FakeDB:
+    """
+    Answers TestSetCache.get()'s queries in the order it makes them: the
+    question's test_set_version, then on a miss the question and its cases.
+    """
+
+    def __init__(self, question, test_cases):
+        self.question = question
+        self.test_cases = test_cases
+        self._pending = []
+
+    async def execute(self, statement):
+        if not self._pending:
+            self._pending = [self.question.test_set_version, self.question, self.test_cases]
+        return FakeResult(self._pending.pop(0))
+
+    def reset(self):
+        self._pending = []
+
+
+def make_question(version):
+    return SimpleNamespace(
+        id="q1",
+        test_id="t1",
+        test_set_version=version,
+        driver_code=None,
+        checker="exact",
+        checker_config=None,
+        time_limit_ms=None,
+    )
+
+
+def make_case(case_id, hidden):
+    return SimpleNamespace(
+        id=case_id,
+        input="1",
+        expected_output="1",
+        input_hash=None,
+        output_hash=None,
+        is_hidden=hidden,
+        failure_count=0,
+    )
+
+
+def test_test_set_is_reused_until_version_moves():
+    async def scenario():
+        cache = test_set_cache.TestSetCache(4)
+        db = FakeDB(make_question(1), [make_case("c1", True), make_case("c2", False)])
+
+        first = await cache.get("q1", db)
+        assert [tc.id for tc in first.submit_cases] == ["c2", "c1"]
+        assert [tc.id for tc in first.sample_cases] == ["c2"]
+
+        db.reset()
+        assert await cache.get("q1", db) is first
+        assert cache.stats() == {"hits": 1, "misses": 1, "questions": 1}
+
+        # Editing the question or its cases bumps test_set_version (see models/question.py)
+        db.question = make_question(2)
+        db.reset()
+        second = await cache.get("q1", db)
+        assert second is not first
+        assert (first.cache_key, second.cache_key) == ("q1:1", "q1:2")
+        # ...which retires verdicts cached against the old test set
+        assert verdict_key("x", "c", first.cache_key) != verdict_key("x", "c", second.cache_key)
+
+    asyncio.run(scenario())
+
+
+def test_missing_question_is_not_cached():
+    async def scenario():
+        cache = test_set_cache.TestSetCache(4)
+        db = FakeDB(SimpleNamespace(test_set_version=None), [])
+        assert await cache.get("q1", db) is None
+        assert cache.stats()["questions"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+# runner and calibrate import the models, and with them SQLAlchemy
+pytest.importorskip("sqlalchemy")
+
+from app.execution_engine.calibrate import base_limit_ms  # noqa: E402
+from app.execution_engine.languages import (  # noqa: E402
+    CALIBRATION_SAFETY_FACTOR,
+    MAX_TIME_LIMIT_SECONDS,
+    MIN_TIME_LIMIT_MS,
+    TIME_LIMIT_MULTIPLIERS,
+    TIME_LIMIT_SECONDS,
+)
+from app.execution_engine.runner import time_limit_of  # noqa: E402
+
+
+def question(time_limit_ms):
+    return SimpleNamespace(time_limit_ms=time_limit_ms)
+
+
+def test_questions_without_base_limit_get_default():
+    assert time_limit_of(None, "cpp") == TIME_LIMIT_SECONDS
+    assert time_limit_of(question(None), "python3") == TIME_LIMIT_SECONDS
+    assert time_limit_of(question(0), "python3") == TIME_LIMIT_SECONDS
+
+
+def test_base_limit_is_scaled_per_language():
+    assert time_limit_of(question(1000), "cpp") == 1.0
+    assert time_limit_of(question(1000), "python3") == TIME_LIMIT_MULTIPLIERS["python3"]
+    assert time_limit_of(question(500), "java") == 0.5 * TIME_LIMIT_MULTIPLIERS["java"]
+    # Unknown languages run at the base limit
+    assert time_limit_of(question(700), "brainfuck") == 0.7
+
+
+def test_scaled_limit_is_capped():
+    assert time_limit_of(question(9000), "python3") == MAX_TIME_LIMIT_SECONDS
+
+
+def test_base_limit_covers_slowest_language():
+    assert CALIBRATION_SAFETY_FACTOR == 2.0
+    # 120 ms in C needs 240 ms, rounded up to 300
+    assert base_limit_ms([("c", 120)]) == 300
+    # 600 ms in Python is 400 ms of C time after its multiplier
+    assert base_limit_ms([("python3", 600)]) == 400
+    assert base_limit_ms([("cpp", 120), ("python3", 600)]) == 400
+
+
+def test_base_limit_is_clamped():
+    assert base_limit_ms([("cpp", 1)]) == MIN_TIME_LIMIT_MS
+    assert base_limit_ms([("cpp", 60_000)]) == MAX_TIME_LIMIT_SECONDS * 1000
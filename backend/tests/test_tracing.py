@@ -0,0 +1,41 @@
+from app.execution_engine.tracing import Histogram
+
+
+def test_empty_histogram():
+    histogram = Histogram(bounds=(1, 5, 10))
+    assert histogram.quantile(0.5) == 0
+    assert histogram.to_dict()["avg_ms"] == 0
+
+
+def test_observations_land_in_upper_bound_buckets():
+    histogram = Histogram(bounds=(1, 5, 10))
+    for ms in (0.5, 1, 3, 5, 7, 50):
+        histogram.observe(ms)
+    assert histogram.buckets == [2, 2, 1, 1]
+    assert histogram.to_dict()["buckets"] == {"le_1": 2, "le_5": 2, "le_10": 1, "inf": 1}
+
+
+def test_quantiles_report_bucket_bounds_capped_at_max():
+    histogram = Histogram(bounds=(1, 5, 10))
+    for ms in (0.5, 3, 3, 7, 50):
+        histogram.observe(ms)
+    assert histogram.quantile(0.2) == 1
+    assert histogram.quantile(0.5) == 5
+    assert histogram.quantile(0.8) == 10
+    # Beyond the last bound only the observed maximum is known
+    assert histogram.quantile(1.0) == 50
+
+    small = Histogram(bounds=(1, 5, 10))
+    small.observe(2.34)
+    assert small.quantile(0.99) == 2.3
+
+
+def test_to_dict_summary():
+    histogram = Histogram(bounds=(10, 100))
+    for ms in (4, 6, 20):
+        histogram.observe(ms)
+    summary = histogram.to_dict()
+    assert summary["count"] == 3
+    assert summary["avg_ms"] == 10.0
+    assert summary["p50_ms"] == 10
+    assert summary["max_ms"] == 20
@@ -0,0 +1,48 @@
+
+from app.execution_engine.verdict_cache import VerdictCache, verdict_key
+
+
+def test_key_depends_on_code_language_and_test_set():
+    key = verdict_key("print(1)", "python3", "q1:1")
+    assert key == verdict_key("print(1)", "python3", "q1:1")
+    assert key != verdict_key("print(2)", "python3", "q1:1")
+    assert key != verdict_key("print(1)", "javascript", "q1:1")
+    assert key != verdict_key("print(1)", "python3", "q1:2")
+    assert key != verdict_key("print(1)", "python3", "q2:1")
+
+
+def test_key_parts_cannot_run_together():
+    assert verdict_key("x", "c", "q1:1") != verdict_key("x", "cq", "1:1")
+    assert verdict_key("1x", "c", "q1:") != verdict_key("x", "c", "q1:1")
+
+
+def test_get_and_put_copy_results():
+    cache = VerdictCache(4)
+    result = {"status": "accepted", "results": [{"passed": True}]}
+    cache.put("k", result)
+    result["results"][0]["passed"] = False
+
+    first = cache.get("k")
+    assert first["results"][0]["passed"] is True
+    first["status"] = "wrong_answer"
+    assert cache.get("k")["status"] == "accepted"
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerdictCache(2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("c") == {"n": 3}
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 2}
+
+
+def test_zero_size_disables_cache():
+    cache = VerdictCache(0)
+    cache.put("a", {"n": 1})
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
@@ -352,6 +352,7 @@ export default function ExamPage() {
                   }
                 }
                 
+                monitoringSocket.scheduleCodeSnapshot(newCode, language);
                 setCode(newCode);
               }}
               theme="vs-dark"
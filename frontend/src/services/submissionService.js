@@ -1,12 +1,30 @@
 import api from "./api";
 
+const POLL_INTERVAL_MS = 1000;
+const POLL_TIMEOUT_MS = 120000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+export const getSubmission = async (submissionId) => {
+  const response = await api.get(`/api/submissions/${submissionId}`);
+  return response.data;
+};
+
+// Submit is queued server-side — poll until a judge worker records the verdict
 export const submitCode = async (sessionId, questionId, code, language) => {
   const response = await api.post(`/api/submissions/${sessionId}/submit`, {
     question_id: questionId,
     code,
     language,
   });
-  return response.data;
+
+  let submission = response.data;
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (submission.status === "pending" && Date.now() < deadline) {
+    await sleep(POLL_INTERVAL_MS);
+    submission = await getSubmission(submission.id);
+  }
+  return submission;
 };
 
 export const runCode = async (code, language, input = "") => {
@@ -25,4 +43,4 @@ export const runSamples = async (code, language, questionId) => {
     question_id: questionId,
   });
   return response.data;
-};
\ No newline at end of file
+};
@@ -1,5 +1,10 @@
 import { WS_URL } from "../config/api";
 
+// Editor idle time before its code is sent for speculative compilation
+const SNAPSHOT_IDLE_MS = 1500;
+// Only compiled languages gain anything from a build ahead of Run/Submit
+const SNAPSHOT_LANGUAGES = ["cpp", "c", "java"];
+
 class MonitoringSocket {
   constructor() {
     this.socket = null;
@@ -11,6 +16,8 @@ class MonitoringSocket {
     this.keystrokeBuffer = [];
     this.lastKeystrokeTime = null;
     this.typingSpeedBuffer = [];
+    this.snapshotTimer = null;
+    this.lastSnapshot = null;
   }
 
   connect(sessionId, token) {
@@ -133,6 +140,18 @@ class MonitoringSocket {
     this.sendEvent(type, details);
   }
 
+  // Debounced: sends the code once the editor has been idle for SNAPSHOT_IDLE_MS
+  scheduleCodeSnapshot(code, language) {
+    clearTimeout(this.snapshotTimer);
+    if (!SNAPSHOT_LANGUAGES.includes(language)) return;
+    this.snapshotTimer = setTimeout(() => {
+      const snapshot = `${this.questionId}:${language}:${code}`;
+      if (snapshot === this.lastSnapshot) return;
+      this.lastSnapshot = snapshot;
+      this.sendEvent("code_snapshot", { code, language });
+    }, SNAPSHOT_IDLE_MS);
+  }
+
   getAvgTypingSpeed() {
     if (this.typingSpeedBuffer.length === 0) return 0;
     const avg = this.typingSpeedBuffer.reduce((a, b) => a + b, 0) / this.typingSpeedBuffer.length;
@@ -140,6 +159,7 @@ class MonitoringSocket {
   }
 
   disconnect() {
+    clearTimeout(this.snapshotTimer);
     if (this.socket) {
       this.socket.close();
       this.socket = null;